@@ -1,22 +1,35 @@
+import numpy as np
 from macro_signals import safe_pull
 from fund_trends import score_fund
 
-def recommend_allocation(macro_score, fund_scores):
+# (minimum macro score, risk budget), highest band first; below every band -> RISK_FLOOR
+RISK_BANDS = [(6, 0.9), (4, 0.7), (1, 0.5), (-2, 0.3)]
+RISK_FLOOR = 0.1
+
+def risk_budget(macro_score, bands=None) -> float:
+    """
+    Risk budget for a macro regime score: the first band whose minimum it reaches.
+    """
+    for cutoff, weight in RISK_BANDS if bands is None else bands:
+        if macro_score >= cutoff:
+            return weight
+    return RISK_FLOOR
+
+def risk_budget_array(macro_scores, bands=None) -> np.ndarray:
+    """
+    risk_budget() over an array of macro scores.
+    """
+    bands = RISK_BANDS if bands is None else bands
+    scores = np.asarray(macro_scores, dtype=float)
+    return np.select([scores >= cutoff for cutoff, _ in bands], [weight for _, weight in bands], RISK_FLOOR)
+
+def recommend_allocation(macro_score, fund_scores, bands=None):
     """
     Generates allocation weights for TSP funds based on macro regime score and fund trend strength.
     """
 
     # Determine risk budget based on macro regime score
-    if macro_score >= 6:
-        risk_weight = 0.9
-    elif macro_score >= 4:
-        risk_weight = 0.7
-    elif macro_score >= 1:
-        risk_weight = 0.5
-    elif macro_score >= -2:
-        risk_weight = 0.3
-    else:
-        risk_weight = 0.1
+    risk_weight = risk_budget(macro_score, bands)
 
     # Allocate among positive-trending funds
     allocation = {"C": 0, "S": 0, "I": 0, "F": 0, "G": 0}
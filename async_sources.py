@@ -0,0 +1,141 @@
+import os
+import asyncio
+import httpx
+import pandas as pd
+
+import price_store
+from providers import get_provider
+import macro_signals
+import market_data
+from macro_signals import cache_state, store_fetched, OFFLINE as FRED_OFFLINE
+from market_data import plan_refresh, frame_from_store, OFFLINE as MARKET_OFFLINE
+from fetch_planner import plan_series, plan_market
+from resilience import acall, report_stale, revalidate, CircuitOpenError
+from telemetry import span, count
+
+# Deadline for every request to a source; whatever has not arrived by then is
+# served from cache (if any) and flagged in the result.
+SOURCE_TIMEOUTS = {
+    "fred": float(os.getenv("FRED_TIMEOUT", "8")),
+    "yahoo": float(os.getenv("YAHOO_TIMEOUT", "6")),
+}
+
+MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "20"))
+
+async def fetch_fred_series(client: httpx.AsyncClient, name: str, observation_start=None) -> pd.Series:
+    with span("fred_fetch", series=name):
+        series = await get_provider().aget_series(client, name, observation_start=observation_start)
+    count("tsp_fetch_bytes_total", series.memory_usage(index=True), source="fred")
+    return series
+
+async def fetch_yahoo_bars(client: httpx.AsyncClient, ticker: str, period: str = None, start=None) -> pd.DataFrame:
+    with span("market_download", ticker=ticker):
+        bars = await get_provider().aget_ticker_bars(client, ticker, period=period, start=start)
+    count("tsp_fetch_bytes_total", bars.memory_usage(index=True).sum(), source="yahoo")
+    return bars
+
+async def _gather_with_deadline(coros: dict, timeout: float) -> tuple[dict, list, dict]:
+    """
+    Runs every coroutine concurrently under one deadline.
+    Returns (results by key, keys that timed out, exceptions by key that failed).
+    """
+    if not coros:
+        return {}, [], {}
+    tasks = {asyncio.ensure_future(coro): key for key, coro in coros.items()}
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    # Let the cancelled requests unwind (and release their connections) before returning
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    results, errors = {}, {}
+    for task in done:
+        key = tasks[task]
+        if task.exception() is not None:
+            print(f"⚠️ Error fetching {key}: {task.exception()}")
+            errors[key] = task.exception()
+        else:
+            results[key] = task.result()
+    return results, [tasks[t] for t in pending], errors
+
+def _store_bars(results: dict, cold=(), searched_from=None):
+    for ticker, bars in results.items():
+        price_store.append_bars(ticker, bars, searched_from if ticker in cold else None)
+
+def _fallback_reason(key, timed_out: list, errors: dict) -> str:
+    if key in timed_out:
+        return "timed_out"
+    return "circuit_open" if isinstance(errors.get(key), CircuitOpenError) else "fetch_failed"
+
+async def fetch_macro_data_async(client: httpx.AsyncClient) -> tuple[dict, dict]:
+    """
+    Async counterpart of fetch_planner.fetch_macro_data(), sharing the on-disk
+    cache and the stale-while-revalidate window of macro_signals.get_series().
+    """
+    data, coros, cached_copies, refreshed_at = {}, {}, {}, {}
+    for name in plan_series():
+        cached, start, hit = cache_state(name)
+        count("tsp_cache_total", cache="fred", result="hit" if hit else "miss")
+        if hit or FRED_OFFLINE:
+            data[name] = cached if cached is not None else pd.Series(dtype=float)
+            continue
+        refreshed_at[name] = macro_signals.last_refresh(name) if cached is not None else None
+        if cached is not None and macro_signals.within_stale_window(refreshed_at[name]):
+            report_stale("fred", name, refreshed_at[name], "revalidating")
+            revalidate(("fred", name), lambda name=name, cached=cached, start=start: macro_signals.refresh_series(name, cached, start))
+            data[name] = cached
+            continue
+        cached_copies[name] = cached
+        coros[name] = acall("fred", fetch_fred_series, client, name, observation_start=start)
+
+    results, timed_out, errors = await _gather_with_deadline(coros, SOURCE_TIMEOUTS["fred"])
+    for name, cached in cached_copies.items():
+        if name in results:
+            data[name] = store_fetched(name, cached, results[name])
+        else:
+            report_stale("fred", name, refreshed_at[name], _fallback_reason(name, timed_out, errors))
+            data[name] = cached if cached is not None else pd.Series(dtype=float)
+    return data, {"timed_out": sorted(timed_out), "failed": sorted(errors)}
+
+async def fetch_market_data_async(client: httpx.AsyncClient) -> tuple[pd.DataFrame, dict]:
+    """
+    Async counterpart of fetch_planner.fetch_market_data(), backed by the price store.
+    Yahoo's chart endpoint is per ticker, so each ticker is one concurrent request.
+    """
+    tickers, period = plan_market()
+    coros, refreshed_at, cold = {}, {}, []
+    if not MARKET_OFFLINE:
+        cold, warm, start = plan_refresh(tickers, period)
+        count("tsp_cache_total", len(tickers) - len(cold) - len(warm), cache="prices", result="hit")
+        count("tsp_cache_total", len(cold) + len(warm), cache="prices", result="miss")
+        refreshed_at = {t: market_data.last_refresh(t) for t in cold + warm}
+        if warm and all(market_data.within_stale_window(refreshed_at[t]) for t in warm):
+            for ticker in warm:
+                report_stale("yahoo", ticker, refreshed_at[ticker], "revalidating")
+            revalidate(("yahoo", tuple(warm)), lambda warm=warm, start=start: market_data.refresh_incremental(warm, start))
+            warm = []
+        coros.update({t: acall("yahoo", fetch_yahoo_bars, client, t, period=period) for t in cold})
+        coros.update({t: acall("yahoo", fetch_yahoo_bars, client, t, start=start) for t in warm})
+
+    results, timed_out, errors = await _gather_with_deadline(coros, SOURCE_TIMEOUTS["yahoo"])
+    # Appending rewrites the store's files; keep that disk I/O off the event loop
+    await asyncio.to_thread(_store_bars, results, cold, market_data.coverage_start(period))
+    for ticker in coros:
+        if ticker not in results:
+            report_stale("yahoo", ticker, refreshed_at.get(ticker), _fallback_reason(ticker, timed_out, errors))
+    return frame_from_store(tickers, period), {"timed_out": sorted(timed_out), "failed": sorted(errors)}
+
+async def fetch_inputs_async() -> tuple[dict, pd.DataFrame, dict]:
+    """
+    Gathers FRED and market inputs concurrently, each under its own deadline.
+    The flags dict lists, per source, what timed out or failed and was served
+    from cache (or left empty) instead.
+    """
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS)
+    timeout = httpx.Timeout(max(SOURCE_TIMEOUTS.values()))
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        (data, fred_flags), (prices, yahoo_flags) = await asyncio.gather(
+            fetch_macro_data_async(client),
+            fetch_market_data_async(client),
+        )
+    return data, prices, {"fred": fred_flags, "yahoo": yahoo_flags}
@@ -0,0 +1,126 @@
+"""
+Recorded FRED and Yahoo inputs for offline benchmarks.
+
+Layout under a fixture directory:
+    fred/<SERIES_ID>.csv   date,value
+    yahoo/<TICKER>.csv     date,Open,High,Low,Close,Adj Close,Volume
+
+`python benchmarks/fixtures.py record` captures live data through the normal
+fetch path. `python benchmarks/fixtures.py synthesize` writes a deterministic
+stand-in with the same layout and realistic frequencies for machines without
+API access.
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from providers import save_series, save_bars, load_series, load_bars, combine_bars
+
+FIXTURE_DIR = os.getenv("FIXTURE_DIR", os.path.join(ROOT, "benchmarks", "fixtures"))
+
+def load_fixtures(directory: str = FIXTURE_DIR) -> tuple[dict, pd.DataFrame]:
+    """
+    Every recorded series as a dict, and every recorded ticker as one
+    (field, ticker) frame, the same shapes the live fetch path produces.
+    """
+    data = {}
+    fred_dir = os.path.join(directory, "fred")
+    for file_name in sorted(os.listdir(fred_dir)) if os.path.isdir(fred_dir) else []:
+        name = file_name.removesuffix(".csv")
+        data[name] = load_series(directory, name)
+
+    frames = {}
+    yahoo_dir = os.path.join(directory, "yahoo")
+    for file_name in sorted(os.listdir(yahoo_dir)) if os.path.isdir(yahoo_dir) else []:
+        ticker = file_name.removesuffix(".csv")
+        frames[ticker] = load_bars(directory, ticker)
+    return data, combine_bars(frames)
+
+def record_fixtures(directory: str = FIXTURE_DIR, price_period: str = "10y"):
+    """
+    Captures the live inputs for every pillar, overlay and fund trend.
+    """
+    from fetch_planner import plan_series, plan_market
+    from macro_signals import fetch_series_batch
+    from market_data import get_prices
+
+    for name, series in fetch_series_batch(plan_series()).items():
+        save_series(directory, name, series)
+    tickers, _ = plan_market()
+    prices = get_prices(tickers, period=price_period)
+    for ticker in tickers:
+        save_bars(directory, ticker, prices.xs(ticker, axis=1, level=-1).dropna(how="all"))
+
+# (frequency, start level, drift per step, volatility per step) for synthesized series
+SYNTHETIC_SERIES = {
+    "GDPC1": ("QS", 9000, 0.006, 0.008),
+    "USSLIND": ("MS", 1.0, 0.0, 0.4),
+    "INDPRO": ("MS", 60, 0.002, 0.007),
+    "CPIAUCSL": ("MS", 130, 0.0025, 0.002),
+    "PCEPI": ("MS", 60, 0.0022, 0.002),
+    "CES0500000003": ("MS", 18, 0.003, 0.002),
+    "FEDFUNDS": ("MS", 5.0, 0.0, 0.15),
+    "GS10": ("MS", 6.0, 0.0, 0.2),
+    "GS2": ("MS", 5.5, 0.0, 0.22),
+    "WALCL": ("W-WED", 700000, 0.002, 0.004),
+    "ANFCI": ("W-FRI", 0.0, 0.0, 0.05),
+    "VIXCLS": ("B", 18, 0.0, 0.06),
+    "BAMLH0A0HYM2": ("B", 4.5, 0.0, 0.02),
+    "DCOILWTICO": ("B", 25, 0.0002, 0.02),
+    "DTWEXEMEGS": ("B", 100, 0.0, 0.004),
+}
+
+# Levels that should mean-revert rather than compound
+LEVEL_SERIES = {"USSLIND", "FEDFUNDS", "GS10", "GS2", "ANFCI"}
+
+def synthesize_fixtures(directory: str = FIXTURE_DIR, start: str = "1995-01-01", end: str = "2025-06-27", seed: int = 7):
+    """
+    Writes deterministic stand-in fixtures with the recorded layout.
+    """
+    from fetch_planner import plan_market
+
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end)
+    for name, (freq, level, drift, vol) in SYNTHETIC_SERIES.items():
+        index = pd.date_range(start, end, freq=freq)
+        shocks = rng.normal(drift, vol, len(index))
+        if name in LEVEL_SERIES:
+            values = np.empty(len(index))
+            values[0] = level
+            for i in range(1, len(index)):
+                values[i] = values[i - 1] + 0.05 * (level - values[i - 1]) + shocks[i] * max(abs(level), 1)
+        else:
+            values = level * np.exp(np.cumsum(shocks))
+        save_series(directory, name, pd.Series(values, index=index))
+
+    tickers, _ = plan_market()
+    index = pd.bdate_range(max(pd.Timestamp(start), end - pd.DateOffset(years=10)), end)
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.011, len(index))))
+        spread = np.abs(rng.normal(0, 0.006, len(index))) + 0.002
+        bars = pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.002, len(index))),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, len(index)).astype(float),
+        }, index=index)
+        save_bars(directory, ticker, bars)
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    target = sys.argv[2] if len(sys.argv) > 2 else FIXTURE_DIR
+    if command == "record":
+        record_fixtures(target)
+    elif command == "synthesize":
+        synthesize_fixtures(target)
+    else:
+        print("Usage: python benchmarks/fixtures.py record|synthesize [DIR]")
+        sys.exit(2)
+    print(f"✅ Fixtures written to {target}")
@@ -0,0 +1,58 @@
+"""
+Cold-import budget check for the API and CLI entry points.
+
+Each module is imported in a fresh interpreter several times and the fastest
+run is compared against its budget. Exits non-zero when any budget is exceeded,
+so it can gate CI or container builds:
+
+    python benchmarks/import_budget.py
+    IMPORT_BUDGET_API=0.8 python benchmarks/import_budget.py --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds allowed for `import <module>` in a fresh interpreter
+BUDGETS = {
+    "main_api": float(os.getenv("IMPORT_BUDGET_API", "1.5")),
+    "main": float(os.getenv("IMPORT_BUDGET_CLI", "1.0")),
+}
+
+def cold_import_seconds(module: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+    return time.perf_counter() - started
+
+def interpreter_seconds() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], cwd=ROOT, check=True)
+    return time.perf_counter() - started
+
+def check(runs: int = 3) -> dict:
+    baseline = min(interpreter_seconds() for _ in range(runs))
+    results = {}
+    for module, budget in BUDGETS.items():
+        best = min(cold_import_seconds(module) for _ in range(runs))
+        results[module] = {
+            "seconds": round(best - baseline, 4),
+            "budget": budget,
+            "ok": best - baseline <= budget,
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = check(args.runs)
+    print(json.dumps(results, indent=2))
+    if not all(r["ok"] for r in results.values()):
+        print("⚠️ Import time budget exceeded")
+        sys.exit(1)
+    print("✅ Import times within budget")
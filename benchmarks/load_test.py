@@ -0,0 +1,341 @@
+"""
+Load generator for main_api.
+
+Starts the FRED/Yahoo stand-in (standin_server.py) serving the recorded
+fixtures with the given upstream latency, starts the API under uvicorn
+against it with throwaway caches, then drives it from `--concurrency`
+closed-loop clients for `--duration` seconds and writes throughput,
+p50/p95/p99 latency and error rates to
+benchmarks/results/load-<timestamp>-<commit>.json:
+
+    python benchmarks/load_test.py --concurrency 32 --duration 30
+    python benchmarks/load_test.py --workers 4 --api-env SHARED_SNAPSHOT=1 --upstream-latency-ms 200
+    python benchmarks/load_test.py --mix run=8,batch=1,project=1 --profiles 5000 --profile-dist zipf
+    python benchmarks/load_test.py --revalidate 0.9                      # front-end polling with ETags
+    python benchmarks/load_test.py --target http://10.0.0.5:8000 --out -  # existing deployment, JSON to stdout
+
+The generator shares the machine with the API unless --target points
+elsewhere; on small machines it competes for the same CPUs.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+from collections import Counter, defaultdict
+
+import numpy as np
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import FIXTURE_DIR
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+RISK_TOLERANCES = ["Conservative", "Moderate", "Aggressive"]
+PERCENTILES = [50, 95, 99]
+
+# endpoint name -> (method, path)
+ENDPOINTS = {
+    "run": ("POST", "/run"),
+    "batch": ("POST", "/run/batch"),
+    "project": ("POST", "/project"),
+    "metrics": ("GET", "/metrics"),
+}
+
+def parse_weights(spec: str, allowed) -> dict:
+    """
+    "run=8,batch=1" -> {"run": 8.0, "batch": 1.0}
+    """
+    weights = {}
+    for item in filter(None, spec.split(",")):
+        key, _, value = item.partition("=")
+        if key not in allowed:
+            raise ValueError(f"Unknown key {key!r}; expected one of {', '.join(allowed)}")
+        weights[key] = float(value or 1)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"No positive weights in {spec!r}")
+    return weights
+
+def make_profiles(count: int, risk_mix: dict, rng: random.Random) -> list:
+    """
+    `count` employees aged 22-64 retiring at 60-67, with risk tolerances drawn from `risk_mix`.
+    """
+    year = datetime.date.today().year
+    risks, weights = list(risk_mix), list(risk_mix.values())
+    profiles = []
+    for i in range(count):
+        age = rng.randint(22, 64)
+        profiles.append({
+            "name": f"employee-{i}",
+            "age": age,
+            "retirement_year": year + max(rng.randint(60, 67) - age, 0),
+            "risk_tolerance": rng.choices(risks, weights)[0],
+        })
+    return profiles
+
+def profile_weights(count: int, dist: str, zipf_s: float) -> np.ndarray:
+    """
+    How often each profile is picked: evenly, or Zipf-skewed so a few employees poll most.
+    """
+    if dist == "uniform":
+        return np.full(count, 1 / count)
+    weights = 1 / np.arange(1, count + 1) ** zipf_s
+    return weights / weights.sum()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_until_up(url: str, process, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode} before it came up")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+def start_stack(args, scratch: str) -> tuple[str, list]:
+    """
+    Launches the stand-in and the API; returns the API base URL and the processes.
+    """
+    standin_port, api_port = free_port(), free_port()
+    log = open(os.path.join(scratch, "server.log"), "w")
+    standin = subprocess.Popen(
+        [sys.executable, "standin_server.py", "--dir", args.fixtures, "--port", str(standin_port),
+         "--latency-ms", str(args.upstream_latency_ms), "--jitter-ms", str(args.upstream_jitter_ms),
+         "--error-rate", str(args.upstream_error_rate)],
+        cwd=ROOT, stdout=log, stderr=subprocess.STDOUT
+    )
+    processes = [standin]
+    wait_until_up(f"http://127.0.0.1:{standin_port}/openapi.json", standin)
+
+    env = dict(os.environ)
+    env.update({
+        "DATA_PROVIDER": "http",
+        "FRED_BASE_URL": f"http://127.0.0.1:{standin_port}/fred",
+        "YAHOO_BASE_URL": f"http://127.0.0.1:{standin_port}",
+        "FRED_CACHE_DIR": os.path.join(scratch, "fred"),
+        "PRICE_STORE_DIR": os.path.join(scratch, "prices"),
+        "LOG_DB": os.path.join(scratch, "history.db"),
+        "SIGNAL_STATE_FILE": os.path.join(scratch, "signal_state.npz"),
+        "SHARED_SNAPSHOT_FILE": os.path.join(scratch, "snapshot.shm"),
+    })
+    for item in args.api_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main_api:app", "--port", str(api_port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    processes.append(api)
+    base_url = f"http://127.0.0.1:{api_port}"
+    wait_until_up(f"{base_url}/openapi.json", api)
+    return base_url, processes
+
+def stop_stack(processes: list):
+    for process in reversed(processes):
+        process.terminate()
+    for process in reversed(processes):
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+class LoadGenerator:
+    """
+    Closed-loop clients: each sends its next request as soon as the previous
+    one completes. ETags are remembered per profile, as each employee's
+    browser would, and sent back on `revalidate` of /run requests.
+    """
+
+    def __init__(self, base_url: str, profiles: list, args):
+        self.base_url = base_url
+        self.profiles = profiles
+        self.args = args
+        mix = parse_weights(args.mix, ENDPOINTS)
+        self.endpoints = list(mix)
+        self.endpoint_cdf = np.cumsum(list(mix.values())) / sum(mix.values())
+        self.profile_cdf = np.cumsum(profile_weights(len(profiles), args.profile_dist, args.zipf_s))
+        self.rng = np.random.default_rng(args.seed)
+        self.etags = {}
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def pick_profiles(self, size: int) -> np.ndarray:
+        picks = np.searchsorted(self.profile_cdf, self.rng.random(size), side="right")
+        return np.minimum(picks, len(self.profiles) - 1)
+
+    def next_request(self) -> tuple[str, dict]:
+        pick = int(np.searchsorted(self.endpoint_cdf, self.rng.random(), side="right"))
+        endpoint = self.endpoints[min(pick, len(self.endpoints) - 1)]
+        if endpoint == "metrics":
+            return endpoint, {}
+        if endpoint == "batch":
+            picks = self.pick_profiles(self.args.batch_size)
+            return endpoint, {"json": {"profiles": [self.profiles[i] for i in picks]}}
+        index = int(self.pick_profiles(1)[0])
+        body = dict(self.profiles[index])
+        if endpoint == "project":
+            body.update({"balance": 250_000.0, "annual_contribution": 12_000.0, "paths": self.args.paths})
+            return endpoint, {"json": body}
+        request = {"json": body, "profile": index}
+        if index in self.etags and self.rng.random() < self.args.revalidate:
+            request["headers"] = {"If-None-Match": self.etags[index]}
+        return endpoint, request
+
+    async def send(self, client: httpx.AsyncClient, record: bool):
+        endpoint, request = self.next_request()
+        method, path = ENDPOINTS[endpoint]
+        profile = request.pop("profile", None)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, f"{self.base_url}{path}", **request)
+            status = str(response.status_code)
+            etag = response.headers.get("etag")
+            if profile is not None and etag:
+                self.etags[profile] = etag
+        except httpx.HTTPError as e:
+            status = f"error:{type(e).__name__}"
+        if record:
+            self.samples[endpoint].append((time.perf_counter() - started) * 1000)
+            self.statuses[endpoint][status] += 1
+
+    async def client_loop(self, client: httpx.AsyncClient, until: float, record: bool):
+        while time.monotonic() < until:
+            await self.send(client, record)
+
+    async def run(self) -> float:
+        """
+        Warm-up (not recorded), then the measured phase; returns its wall time.
+        """
+        limits = httpx.Limits(max_connections=self.args.concurrency, max_keepalive_connections=self.args.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=self.args.timeout) as client:
+            if self.args.warmup > 0:
+                until = time.monotonic() + self.args.warmup
+                await asyncio.gather(*(self.client_loop(client, until, False) for _ in range(self.args.concurrency)))
+            started = time.monotonic()
+            until = started + self.args.duration
+            await asyncio.gather(*(self.client_loop(client, until, True) for _ in range(self.args.concurrency)))
+            return time.monotonic() - started
+
+def is_error(status: str) -> bool:
+    return status.startswith("error:") or int(status) >= 400
+
+def summarize(samples: list, statuses: Counter, elapsed: float) -> dict:
+    latencies = np.array(samples, dtype=float)
+    total = int(sum(statuses.values()))
+    errors = sum(n for status, n in statuses.items() if is_error(status))
+    summary = {
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed > 0 else None,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else None,
+        "statuses": dict(sorted(statuses.items())),
+    }
+    if len(latencies):
+        summary["latency_ms"] = {
+            **{f"p{p}": round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))},
+            "mean": round(float(latencies.mean()), 3),
+            "max": round(float(latencies.max()), 3),
+        }
+    return summary
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def run_load_test(args) -> dict:
+    rng = random.Random(args.seed)
+    profiles = make_profiles(args.profiles, parse_weights(args.risk_mix, RISK_TOLERANCES), rng)
+    scratch = tempfile.mkdtemp(prefix="tsp-load-")
+    processes = []
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            base_url, processes = start_stack(args, scratch)
+        generator = LoadGenerator(base_url, profiles, args)
+        elapsed = asyncio.run(generator.run())
+    finally:
+        stop_stack(processes)
+
+    all_samples = [v for samples in generator.samples.values() for v in samples]
+    all_statuses = sum(generator.statuses.values(), Counter())
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key != "out"},
+        "server_log": None if args.target else os.path.join(scratch, "server.log"),
+        "duration_s": round(elapsed, 3),
+        "total": summarize(all_samples, all_statuses, elapsed),
+        "endpoints": {
+            endpoint: summarize(generator.samples[endpoint], generator.statuses[endpoint], elapsed)
+            for endpoint in ENDPOINTS if generator.statuses[endpoint]
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test main_api against the local FRED/Yahoo stand-ins")
+    parser.add_argument("--target", help="base URL of a running API; skips starting the stand-in and uvicorn")
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous closed-loop clients")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unrecorded seconds first (includes the cold snapshot)")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--mix", default="run=1", help="endpoint weights, e.g. run=8,batch=1,project=1,metrics=0")
+    parser.add_argument("--profiles", type=int, default=1000, help="distinct employee profiles")
+    parser.add_argument("--profile-dist", default="uniform", choices=["uniform", "zipf"])
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for --profile-dist zipf")
+    parser.add_argument("--risk-mix", default="Conservative=1,Moderate=2,Aggressive=1")
+    parser.add_argument("--revalidate", type=float, default=0.0, help="share of /run requests sending If-None-Match")
+    parser.add_argument("--batch-size", type=int, default=100, help="profiles per /run/batch request")
+    parser.add_argument("--paths", type=int, default=2000, help="Monte Carlo paths per /project request")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--api-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the API, e.g. SHARED_SNAPSHOT=1 (repeatable)")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="recorded data the stand-in serves")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="results file (default: benchmarks/results/load-<time>-<commit>.json; - for stdout)")
+    args = parser.parse_args()
+
+    report = run_load_test(args)
+    if args.out == "-":
+        print(json.dumps(report, indent=2))
+        sys.exit(0)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for endpoint, stats in [("total", report["total"]), *report["endpoints"].items()]:
+        latency = stats.get("latency_ms", {})
+        print(f"• {endpoint:8s} {stats['throughput_rps']:9.1f} req/s  "
+              f"p50 {latency.get('p50', float('nan')):8.2f}  p95 {latency.get('p95', float('nan')):8.2f}  "
+              f"p99 {latency.get('p99', float('nan')):8.2f} ms  errors {stats['error_rate']:.2%}")
+    print(f"✅ Results written to {out}")
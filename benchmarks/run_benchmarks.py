@@ -0,0 +1,259 @@
+"""
+Offline benchmark suite for every pipeline stage.
+
+Runs against recorded fixtures (see benchmarks/fixtures.py) with the network
+disabled, times each stage at several history lengths and batch sizes, and
+writes the numbers to benchmarks/results/<timestamp>-<commit>.json:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --quick --compare benchmarks/results/<older>.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Everything runs from fixtures and a throwaway log store: never the network or logs/
+_scratch = tempfile.mkdtemp(prefix="tsp-bench-")
+os.environ["FRED_OFFLINE"] = "1"
+os.environ["MARKET_OFFLINE"] = "1"
+os.environ["LOG_DB"] = os.path.join(_scratch, "history.db")
+os.environ["FRED_CACHE_DIR"] = os.path.join(_scratch, "fred")
+os.environ["PRICE_STORE_DIR"] = os.path.join(_scratch, "prices")
+os.environ["SIGNAL_STATE_FILE"] = os.path.join(_scratch, "signal_state.npz")
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import FIXTURE_DIR, load_fixtures, synthesize_fixtures
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+HISTORY_LENGTHS = [12, 120, 1200, 12000]
+BATCH_SIZES = [1, 100, 1000, 10000]
+PROJECTION_PATHS = [10_000, 100_000]
+UNIVERSE_SIZES = [1, 30, 500]
+QUICK_HISTORY_LENGTHS = [12, 1200]
+QUICK_BATCH_SIZES = [1, 1000]
+
+def measure(fn, repeat: int = 5, number: int = 1) -> dict:
+    """
+    Best/median/mean milliseconds per call over `repeat` rounds of `number` calls.
+    Stage output (the pipeline prints freely) is swallowed while timing.
+    """
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()  # warm-up
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - started) * 1000 / number)
+    return {
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "repeat": repeat,
+        "number": number,
+    }
+
+def seed_history(length: int, rng):
+    """
+    Fills the scratch log store with `length` runs of every metric.
+    """
+    import log_store
+
+    conn = log_store.connect()
+    for metric in log_store.METRICS:
+        conn.execute(f'DELETE FROM "{metric}"')
+    stamps = np.datetime64("2020-01-01T00:00:00") + np.arange(length) * np.timedelta64(1, "h")
+    regimes = rng.dirichlet(np.ones(5), size=length)
+    for i, stamp in enumerate(stamps.astype(str)):
+        log_store.append_many([
+            ("macro_score", float(rng.integers(-10, 12))),
+            ("coherence", float(rng.random())),
+            ("velocity", float(rng.random())),
+            ("risk_weight", float(rng.random())),
+            ("regime", dict(zip(log_store.METRICS["regime"], regimes[i]))),
+            ("allocation", dict(zip(log_store.METRICS["allocation"], rng.dirichlet(np.ones(5)) * 100))),
+        ], timestamp=stamp)
+
+def run_suite(quick: bool = False) -> dict:
+    from macro_framework import get_macro_pillars
+    from market_data import slice_period
+    from regime_matrix import classify_regime
+    from coherence_score import score_coherence
+    from narrative_velocity import score_velocity_array
+    from phase_shift_detector import detect_phase_shift
+    from exposure_modulator import modulate_risk_weight
+    from personalize import personalize_allocation, personalize_allocations
+    from regime_history import reconstruct_regime_history
+    from user_profile import UserProfile
+    from projection import project_allocation
+    from fund_trends import score_funds
+    from snapshot import build_snapshot, BASE_ALLOCATION
+    from signal_state import SignalState, current_state
+    import log_store
+
+    if not os.path.isdir(os.path.join(FIXTURE_DIR, "fred")):
+        print(f"📦 No recorded fixtures in {FIXTURE_DIR}; synthesizing stand-ins")
+        synthesize_fixtures(FIXTURE_DIR)
+    data, prices = load_fixtures(FIXTURE_DIR)
+    recent = slice_period(prices, "6mo")
+
+    rng = np.random.default_rng(0)
+    history_lengths = QUICK_HISTORY_LENGTHS if quick else HISTORY_LENGTHS
+    batch_sizes = QUICK_BATCH_SIZES if quick else BATCH_SIZES
+    repeat = 3 if quick else 7
+    results = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pillars = get_macro_pillars(data, recent)
+    regime = classify_regime(pillars)
+    coherence = score_coherence(pillars)
+
+    results["get_macro_pillars"] = measure(lambda: get_macro_pillars(data, recent), repeat)
+    results["classify_regime"] = measure(lambda: classify_regime(pillars), repeat, number=1000)
+    results["score_coherence"] = measure(lambda: score_coherence(pillars), repeat, number=1000)
+    results["modulate_risk_weight"] = measure(
+        lambda: modulate_risk_weight(0.7, regime["stability"], coherence, 0.2, False), repeat, number=10000
+    )
+    results["reconstruct_regime_history"] = measure(lambda: reconstruct_regime_history(data, prices), repeat)
+
+    # Synthetic universe: random walks on the SPY calendar, scored from one wide close matrix
+    spy = recent["Close"]["SPY"].dropna()
+    walks = spy.to_numpy()[:, None] * np.exp(np.cumsum(rng.normal(0, 0.01, (len(spy), max(UNIVERSE_SIZES))), axis=0))
+    universe = pd.DataFrame(walks, index=spy.index, columns=[f"T{i:03d}" for i in range(walks.shape[1])])
+    for size in UNIVERSE_SIZES:
+        results[f"score_funds[tickers={size}]"] = measure(lambda: score_funds(list(universe.columns[:size]), universe), repeat, number=10)
+
+    for length in history_lengths:
+        seed_history(length, rng)
+        _, regime_history = log_store.window("regime", length)
+        _, coherence_history = log_store.window("coherence", length)
+        _, macro_scores = log_store.window("macro_score", length)
+        results[f"log_window[n={length}]"] = measure(lambda: log_store.window("regime", length), repeat, number=10)
+        results[f"score_velocity[n={length}]"] = measure(lambda: score_velocity_array(regime_history), repeat, number=10)
+        results[f"detect_phase_shift[n={length}]"] = measure(
+            lambda: detect_phase_shift(regime_history, coherence_history, 0.2, macro_scores.tolist(), 1), repeat, number=10
+        )
+        results[f"signal_state_rebuild[n={length}]"] = measure(SignalState.from_log, repeat, number=10)
+        results[f"signal_state_current[n={length}]"] = measure(current_state, repeat, number=10)
+        state = current_state()
+        results[f"signal_state_update[n={length}]"] = measure(
+            lambda: state.update(regime_history[-1], 0.5, 1.0), repeat, number=100
+        )
+        results[f"build_snapshot[n={length}]"] = measure(lambda: build_snapshot(data, recent), repeat)
+
+    user = UserProfile(name="Bench", age=41, retirement_year=2049, risk_tolerance="Moderate")
+    results["personalize_allocation"] = measure(
+        lambda: personalize_allocation(BASE_ALLOCATION, user, 2025), repeat, number=1000
+    )
+    for size in batch_sizes:
+        years = rng.integers(2026, 2070, size)
+        tolerances = rng.choice(["Conservative", "Moderate", "Aggressive"], size)
+        results[f"personalize_allocations[batch={size}]"] = measure(
+            lambda: personalize_allocations(BASE_ALLOCATION, years, tolerances, 2025), repeat
+        )
+
+    alloc = personalize_allocation(BASE_ALLOCATION, user, 2025)
+    for paths in PROJECTION_PATHS[:1] if quick else PROJECTION_PATHS:
+        results[f"project_allocation[paths={paths}]"] = measure(
+            lambda: project_allocation(alloc, user, 250_000, 12_000, n_paths=paths, current_year=2025, seed=0, workers=1),
+            repeat
+        )
+
+    results.update(bench_api(data, recent, batch_sizes, repeat))
+    return results
+
+def bench_api(data, recent, batch_sizes, repeat) -> dict:
+    """
+    Times the /run and /run/batch handlers end to end through FastAPI's test client.
+    The snapshot cache is pointed at the fixtures, so "cold" includes a full
+    snapshot build and "warm" is the steady state served from the cache.
+    """
+    from fastapi.testclient import TestClient
+    import main_api
+    from snapshot import build_snapshot
+
+    cache = main_api.snapshot_cache
+    cache.compute = lambda: build_snapshot(data, recent)
+
+    async def compute_async():
+        return build_snapshot(data, recent)
+
+    cache.compute_async = compute_async
+    client = TestClient(main_api.app)
+    profile = {"name": "Bench", "age": 41, "retirement_year": 2049, "risk_tolerance": "Moderate"}
+
+    def cold_run():
+        cache.invalidate()
+        cache._snapshot = None
+        client.post("/run", json=profile)
+
+    results = {
+        "api_run[cold]": measure(cold_run, repeat),
+        "api_run[warm]": measure(lambda: client.post("/run", json=profile), repeat, number=20),
+    }
+    for size in batch_sizes:
+        body = {"profiles": [profile] * size}
+        results[f"api_run_batch[batch={size}]"] = measure(lambda: client.post("/run/batch", json=body), repeat)
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def compare(current: dict, previous_path: str):
+    with open(previous_path, "r") as f:
+        previous = json.load(f)["results"]
+    print(f"\n📊 Median vs {os.path.basename(previous_path)}")
+    for stage, stats in current.items():
+        if stage not in previous:
+            continue
+        before, after = previous[stage]["median_ms"], stats["median_ms"]
+        ratio = after / before if before else float("inf")
+        flag = "⚠️" if ratio > 1.2 else "  "
+        print(f"{flag} {stage:45s} {before:10.3f} → {after:10.3f} ms  ({ratio:.2f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for every pipeline stage")
+    parser.add_argument("--quick", action="store_true", help="fewer sizes and rounds")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    args = parser.parse_args()
+
+    results = run_suite(quick=args.quick)
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fixtures": FIXTURE_DIR,
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, stats in results.items():
+        print(f"• {stage:45s} {stats['median_ms']:10.3f} ms")
+    print(f"✅ Results written to {out}")
+    if args.compare:
+        compare(results, args.compare)
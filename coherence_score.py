@@ -15,3 +15,14 @@ def score_coherence(pillars: dict) -> float:
     coherence = dot_matrix.mean()
 
     return round(coherence, 4)
+
+def score_coherence_matrix(scores) -> np.ndarray:
+    """
+    Vectorized score_coherence() over a (dates, pillars) score history.
+    The mean of outer(v, v) is (sum v)^2 / n^2, so no per-row matrix is built.
+    """
+    values = np.asarray(scores, dtype=float)
+    if values.shape[1] == 0:
+        return np.zeros(len(values))
+    vectors = values / (np.linalg.norm(values, axis=1, keepdims=True) + 1e-9)
+    return np.round(vectors.sum(axis=1) ** 2 / values.shape[1] ** 2, 4)
@@ -1,23 +1,52 @@
+import numpy as np
+
+# Cutoffs and penalty multipliers; sweep.py calibrates these against history
+RISK_RULES = {
+    "stability_below": 0.3,
+    "stability_penalty": 0.85,
+    "coherence_below": 0.4,
+    "coherence_penalty": 0.85,
+    "velocity_above": 0.6,
+    "velocity_penalty": 0.8,
+    "fragility_penalty": 0.75,
+    "floor": 0.1,
+    "cap": 1.0,
+}
+
 def modulate_risk_weight(
     base_risk: float,
     stability: float,
     coherence: float,
     velocity: float,
-    fragility_flag: bool
+    fragility_flag: bool,
+    rules: dict | None = None
 ) -> float:
     """
     Adjusts risk weight based on macro integrity and market structure signals
     """
+    rules = RISK_RULES if rules is None else {**RISK_RULES, **rules}
 
     # Apply stability and coherence penalties
-    if stability < 0.3:
-        base_risk *= 0.85
-    if coherence < 0.4:
-        base_risk *= 0.85
-    if velocity > 0.6:
-        base_risk *= 0.8
+    if stability < rules["stability_below"]:
+        base_risk *= rules["stability_penalty"]
+    if coherence < rules["coherence_below"]:
+        base_risk *= rules["coherence_penalty"]
+    if velocity > rules["velocity_above"]:
+        base_risk *= rules["velocity_penalty"]
     if fragility_flag:
-        base_risk *= 0.75
+        base_risk *= rules["fragility_penalty"]
+
+    # Bound between floor and cap (0.1 and 1.0 by default)
+    return round(min(max(base_risk, rules["floor"]), rules["cap"]), 2)
 
-    # Bound between 0.1 and 1.0
-    return round(min(max(base_risk, 0.1), 1.0), 2)
+def modulate_risk_weight_array(base_risk, stability, coherence, velocity, fragility_flag, rules: dict | None = None) -> np.ndarray:
+    """
+    modulate_risk_weight() over arrays of inputs, e.g. one element per historical date.
+    """
+    rules = RISK_RULES if rules is None else {**RISK_RULES, **rules}
+    risk = np.asarray(base_risk, dtype=float).copy()
+    risk = risk * np.where(np.asarray(stability) < rules["stability_below"], rules["stability_penalty"], 1.0)
+    risk = risk * np.where(np.asarray(coherence) < rules["coherence_below"], rules["coherence_penalty"], 1.0)
+    risk = risk * np.where(np.asarray(velocity) > rules["velocity_above"], rules["velocity_penalty"], 1.0)
+    risk = risk * np.where(np.asarray(fragility_flag, dtype=bool), rules["fragility_penalty"], 1.0)
+    return np.round(np.clip(risk, rules["floor"], rules["cap"]), 2)
@@ -0,0 +1,38 @@
+from macro_signals import fetch_series_batch, MAX_FETCH_WORKERS
+from macro_framework import pillar_series, CYCLICAL_TICKERS, DEFENSIVE_TICKERS, MARKET_INTERNALS_PERIOD
+from flow_overlay import FRAGILITY_SERIES, FRAGILITY_TICKERS, FRAGILITY_PERIOD
+from fund_trends import FUND_TREND_TICKERS, FUND_TREND_PERIOD
+from market_data import plan_downloads, get_prices
+
+def plan_series() -> list:
+    """
+    Union of every FRED series declared by the pillars and overlays.
+    Each ID appears once, so shared inputs like VIXCLS are only downloaded once.
+    """
+    return list(dict.fromkeys(pillar_series() + FRAGILITY_SERIES))
+
+def fetch_macro_data(max_workers: int = MAX_FETCH_WORKERS) -> dict:
+    """
+    Fetches the planned series concurrently and returns the shared series dict
+    to pass into get_macro_pillars() and detect_fragility().
+    """
+    return fetch_series_batch(plan_series(), max_workers=max_workers)
+
+def plan_market() -> tuple[list, str]:
+    """
+    Every ticker needed by the fund trends, market internals and fragility
+    checks, plus the widest window among them.
+    """
+    return plan_downloads([
+        (FUND_TREND_TICKERS, FUND_TREND_PERIOD),
+        (CYCLICAL_TICKERS + DEFENSIVE_TICKERS, MARKET_INTERNALS_PERIOD),
+        (FRAGILITY_TICKERS, FRAGILITY_PERIOD),
+    ])
+
+def fetch_market_data():
+    """
+    Builds one shared multi-ticker frame from the price store, downloading only
+    bars newer than the stored tail; consumers slice their own window from it.
+    """
+    tickers, period = plan_market()
+    return get_prices(tickers, period=period)
@@ -1,33 +1,58 @@
-import yfinance as yf
-from macro_signals import get_series, safe_pull
+from macro_signals import fetch_series_batch, lookup_series, safe_pull
+from market_data import get_prices, ticker_frame
 
-def detect_fragility() -> tuple[bool, str]:
+# FRED series the fragility triggers depend on (shared with the pillars)
+FRAGILITY_SERIES = ["VIXCLS", "BAMLH0A0HYM2", "DTWEXEMEGS"]
+
+# Market data for the range and credit-stress checks
+FRAGILITY_TICKERS = ["SPY"]
+FRAGILITY_PERIOD = "5d"
+
+# Trigger levels; sweep.py calibrates these against history
+FRAGILITY_TRIGGERS = {
+    "vix_below": 12,
+    "spy_range_below": 0.007,
+    "hy_spreads_above": 5,
+    "spy_price_above": 400,
+    "em_fx_yoy_below": -0.05,
+}
+
+def detect_fragility(data=None, prices=None, triggers=None) -> tuple[bool, str]:
+    triggers = FRAGILITY_TRIGGERS if triggers is None else {**FRAGILITY_TRIGGERS, **triggers}
+    if data is None:
+        data = fetch_series_batch(FRAGILITY_SERIES)
+    if prices is None:
+        prices = get_prices(FRAGILITY_TICKERS, period=FRAGILITY_PERIOD)
     warnings = []
 
     # 1. VIX Compression
-    vix = safe_pull(get_series("VIXCLS"), "VIX")
-    if vix is not None and vix < 12:
-        warnings.append("VIX compression detected (<12)")
+    vix = safe_pull(lookup_series(data, "VIXCLS"), "VIX")
+    if vix is not None and vix < triggers["vix_below"]:
+        warnings.append(f"VIX compression detected (<{triggers['vix_below']})")
 
     # 2. SPY Gamma Pinning (low daily range)
     try:
-        spy = yf.download("SPY", period="5d", interval="1d", progress=False)
+        spy = ticker_frame(prices, "SPY", FRAGILITY_PERIOD)
         daily_ranges = spy["High"] - spy["Low"]
         avg_range_pct = (daily_ranges / spy["Close"]).mean()
-        if avg_range_pct < 0.007:
+        if avg_range_pct < triggers["spy_range_below"]:
             warnings.append("SPY showing narrow daily range (possible gamma pinning)")
     except Exception as e:
         warnings.append("SPY range error")
 
     # 3. Credit Stress
-    spreads = safe_pull(get_series("BAMLH0A0HYM2"), "High Yield Spreads")
-    spy_price = yf.download("SPY", period="1d", progress=False)["Close"].iloc[-1]
-    if spreads is not None and spreads > 5 and spy_price > 400:
+    spreads = safe_pull(lookup_series(data, "BAMLH0A0HYM2"), "High Yield Spreads")
+    try:
+        spy_price = ticker_frame(prices, "SPY", "1d")["Close"].iloc[-1]
+    except Exception:
+        spy_price = None
+    if (spreads is not None and spreads > triggers["hy_spreads_above"]
+            and spy_price is not None and spy_price > triggers["spy_price_above"]):
         warnings.append("Credit spreads elevated while SPY rallies")
 
     # 4. FX Fragility
-    em_fx = safe_pull(get_series("DTWEXEMEGS").pct_change(12), "EM FX YoY")
-    if em_fx is not None and em_fx < -0.05:
+    em_fx = safe_pull(lookup_series(data, "DTWEXEMEGS").pct_change(12), "EM FX YoY")
+    if em_fx is not None and em_fx < triggers["em_fx_yoy_below"]:
         warnings.append("EM FX weakening sharply (possible carry stress)")
 
     fragility = len(warnings) > 0
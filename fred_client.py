@@ -0,0 +1,132 @@
+"""
+Built-in FRED client: one pooled keep-alive HTTP session, a token-bucket
+limiter that keeps every process under FRED's request limit, and a decoder
+that turns the JSON observations into datetime64/float64 arrays column-wise.
+
+    series = FredClient().get_series("DGS10", observation_start="2024-01-01")
+
+The async path in async_sources.py shares the limiter and the decoder.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+
+FRED_BASE_URL = os.getenv("FRED_BASE_URL", "https://api.stlouisfed.org/fred")
+FRED_TIMEOUT = float(os.getenv("FRED_TIMEOUT", "8"))
+
+# FRED allows 120 requests per minute per API key. The bucket refills at
+# (limit - burst) / 60 per second, so no 60s window can exceed the limit.
+FRED_RATE_LIMIT = int(os.getenv("FRED_RATE_LIMIT", "120"))
+FRED_RATE_BURST = int(os.getenv("FRED_RATE_BURST", "30"))
+
+# Idle connections kept open for reuse, and for how long
+FRED_KEEPALIVE = int(os.getenv("FRED_KEEPALIVE", "8"))
+FRED_KEEPALIVE_EXPIRY = float(os.getenv("FRED_KEEPALIVE_EXPIRY", "30"))
+
+def parse_frequencies(spec: str) -> dict:
+    """
+    "DGS10=w,BAMLH0A0HYM2=w" -> {"DGS10": "w", "BAMLH0A0HYM2": "w"}
+    """
+    pairs = (item.split("=", 1) for item in spec.split(",") if "=" in item)
+    return {name.strip(): freq.strip() for name, freq in pairs}
+
+# Series requested at a lower frequency than FRED publishes them (d, w, bw, m, q, sa, a);
+# FRED averages server-side. Empty by default: every series comes at its native frequency.
+SERIES_FREQUENCY = parse_frequencies(os.getenv("FRED_FREQUENCY", ""))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. reserve() takes a token and returns how long
+    the caller must wait before using it, so sync and async callers can
+    share one bucket and each sleep in their own way.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+# One bucket per process, shared by every client and the async path
+limiter = TokenBucket(max(FRED_RATE_LIMIT - FRED_RATE_BURST, 1) / 60, FRED_RATE_BURST)
+
+def decode_observations(content: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (datetime64[D] dates, float64 values) from a /series/observations JSON
+    body; "." marks a missing value. The strings are pulled out column-wise
+    and converted by NumPy in one pass each, with no per-observation float()
+    or Timestamp.
+    """
+    observations = json.loads(content).get("observations", [])
+    dates = np.array(list(map(itemgetter("date"), observations)), dtype="S10")
+    values = np.array(list(map(itemgetter("value"), observations)), dtype="S")
+    # Convert around the missing markers: the buffer is only as wide as the
+    # longest value, so writing "nan" into it could be truncated
+    missing = values == b"."
+    decoded = np.full(len(values), np.nan)
+    decoded[~missing] = values[~missing].astype(float)
+    return dates.astype("datetime64[D]"), decoded
+
+def observations_series(content: bytes) -> pd.Series:
+    dates, values = decode_observations(content)
+    return pd.Series(values, index=pd.DatetimeIndex(dates))
+
+def observation_params(name: str, observation_start=None, frequency=None) -> dict:
+    params = {"series_id": name, "api_key": os.getenv("FRED_API_KEY", ""), "file_type": "json"}
+    if observation_start:
+        params["observation_start"] = pd.Timestamp(observation_start).strftime("%Y-%m-%d")
+    frequency = frequency or SERIES_FREQUENCY.get(name)
+    if frequency:
+        params["frequency"] = frequency
+    return params
+
+class FredClient:
+    """
+    /series/observations over one keep-alive httpx.Client. Safe to share
+    across the fetch pool's threads; connections are reused between calls.
+    """
+
+    def __init__(self, base_url: str = FRED_BASE_URL, timeout: float = FRED_TIMEOUT, bucket: TokenBucket = limiter):
+        import httpx
+
+        self.base_url = base_url.rstrip("/")
+        self.bucket = bucket
+        self.client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_keepalive_connections=FRED_KEEPALIVE, keepalive_expiry=FRED_KEEPALIVE_EXPIRY),
+        )
+
+    def get_series(self, name: str, observation_start=None, frequency=None) -> pd.Series:
+        self.bucket.acquire()
+        response = self.client.get(
+            f"{self.base_url}/series/observations", params=observation_params(name, observation_start, frequency)
+        )
+        response.raise_for_status()
+        return observations_series(response.content)
+
+    def close(self):
+        self.client.close()
@@ -1,54 +1,187 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
 import warnings
+from market_data import get_prices, slice_period
+from telemetry import count
+
+# Tickers scored for the fund trend overlay and the window each score needs
+FUND_TREND_TICKERS = ["SPY", "IWM"]
+FUND_TREND_PERIOD = "6mo"
+
+# Exchange-traded proxies for the TSP index funds; the G Fund has none
+TSP_FUND_PROXIES = {"C": "SPY", "S": "VXF", "I": "EFA", "F": "AGG"}
+
+# The G Fund is synthesized as a steady accrual at this annual rate
+G_FUND_RATE = 0.04
+
+# Approximate C/S/I/F/G mixes of the lifecycle funds; TSP shifts them every quarter
+L_FUND_WEIGHTS = {
+    "L Income": {"C": 0.18, "S": 0.05, "I": 0.10, "F": 0.06, "G": 0.61},
+    "L 2030": {"C": 0.32, "S": 0.09, "I": 0.19, "F": 0.06, "G": 0.34},
+    "L 2035": {"C": 0.36, "S": 0.11, "I": 0.22, "F": 0.06, "G": 0.25},
+    "L 2040": {"C": 0.40, "S": 0.12, "I": 0.25, "F": 0.06, "G": 0.17},
+    "L 2045": {"C": 0.43, "S": 0.13, "I": 0.27, "F": 0.06, "G": 0.11},
+    "L 2050": {"C": 0.46, "S": 0.14, "I": 0.29, "F": 0.05, "G": 0.06},
+    "L 2055": {"C": 0.50, "S": 0.15, "I": 0.30, "F": 0.05, "G": 0.00},
+    "L 2060": {"C": 0.50, "S": 0.15, "I": 0.30, "F": 0.05, "G": 0.00},
+    "L 2065": {"C": 0.50, "S": 0.15, "I": 0.30, "F": 0.05, "G": 0.00},
+    "L 2070": {"C": 0.50, "S": 0.15, "I": 0.30, "F": 0.05, "G": 0.00},
+}
+
+# Sector ETFs scored alongside the funds
+WATCHLIST = ["XLB", "XLC", "XLE", "XLF", "XLI", "XLK", "XLP", "XLRE", "XLU", "XLV", "XLY"]
+
+# Everything score_funds() covers by default: proxies, the G Fund, L funds, watchlist
+FUND_UNIVERSE = list(dict.fromkeys(list(TSP_FUND_PROXIES.values()) + ["G Fund"] + list(L_FUND_WEIGHTS) + WATCHLIST))
+
+# Trading days behind each component of the score
+MA_SHORT, MA_LONG, RETURN_DAYS, MIN_DAYS = 20, 50, 63, 65
 
 # Suppress all FutureWarnings globally
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
-def score_fund(ticker: str, debug: bool = False) -> int:
+def trend_scores(close: np.ndarray) -> dict:
     """
-    Scores a fund's trend using:
-    +1 if price > 20DMA
-    +1 if price > 50DMA
-    +1 if 3-month return > 0%
-    Returns integer score from –3 to +3.
+    Trend score for every column of a (days, tickers) close matrix at once:
+    +1/-1 for price above/below its 20DMA, the same for the 50DMA, and for
+    a positive/negative 63-day return, so each score is in [-3, +3].
+    NaNs (days a ticker did not trade) are skipped per column; columns with
+    fewer than 65 closes score 0. Returns the score vector and its inputs.
     """
+    close = np.asarray(close, dtype=float)
+    if close.ndim == 1:
+        close = close[:, None]
+    valid = ~np.isnan(close)
+    days = valid.sum(axis=0)
 
-    try:
-        data = yf.download(ticker, period="6mo", interval="1d", progress=False, auto_adjust=False)
-
-        if "Close" not in data.columns or data.empty:
-            raise ValueError(f"No valid 'Close' data returned for {ticker}")
+    # Move each column's closes to the bottom, in order, so the last rows are its last trading days
+    order = np.argsort(valid, axis=0, kind="stable")
+    packed = np.take_along_axis(close, order, axis=0)
 
-        close_prices = data["Close"].dropna()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        price = packed[-1] if len(packed) else np.full(close.shape[1], np.nan)
+        ma20 = packed[-MA_SHORT:].mean(axis=0) if len(packed) >= MA_SHORT else np.full_like(price, np.nan)
+        ma50 = packed[-MA_LONG:].mean(axis=0) if len(packed) >= MA_LONG else np.full_like(price, np.nan)
+        ret_3mo = price / packed[-RETURN_DAYS] - 1 if len(packed) >= RETURN_DAYS else np.full_like(price, np.nan)
 
-        if len(close_prices) < 65:
-            raise ValueError(f"Not enough data to compute trend for {ticker} (have {len(close_prices)} days)")
+    ok = (days >= MIN_DAYS) & ~np.isnan(ma20) & ~np.isnan(ma50) & ~np.isnan(ret_3mo)
+    score = (
+        np.where(price > ma20, 1, -1)
+        + np.where(price > ma50, 1, -1)
+        + np.where(ret_3mo > 0, 1, -1)
+    )
+    return {
+        "score": np.where(ok, score, 0),
+        "price": price,
+        "ma20": ma20,
+        "ma50": ma50,
+        "ret_3mo": ret_3mo,
+        "days": days,
+        "ok": ok,
+    }
 
-        price_now = close_prices.iloc[-1].item()
-        price_3mo_ago = close_prices.iloc[-63].item()
+def blend_closes(close: pd.DataFrame, weights: dict) -> pd.Series:
+    """
+    Synthetic price of a daily-rebalanced C/S/I/F/G mix, from the proxy closes
+    and the G Fund accrual, on the dates every needed proxy traded.
+    """
+    daily_g = (1 + G_FUND_RATE) ** (1 / 252) - 1
+    funds = [f for f, w in weights.items() if w and f != "G"]
+    returns = close[[TSP_FUND_PROXIES[f] for f in funds]].dropna().pct_change().fillna(0)
+    mix = returns.to_numpy() @ np.array([weights[f] for f in funds]) + weights.get("G", 0) * daily_g
+    return pd.Series(100 * np.cumprod(1 + mix), index=returns.index)
 
-        ma20_series = close_prices.rolling(window=20).mean()
-        ma50_series = close_prices.rolling(window=50).mean()
-        ma20 = ma20_series.iloc[-1].item()
-        ma50 = ma50_series.iloc[-1].item()
-        ret_3mo = (price_now / price_3mo_ago) - 1
+def _required_tickers(names) -> list:
+    tickers = []
+    for name in names:
+        if name in L_FUND_WEIGHTS:
+            tickers += [TSP_FUND_PROXIES[f] for f, w in L_FUND_WEIGHTS[name].items() if w and f != "G"]
+        elif name != "G Fund":
+            tickers.append(name)
+    return list(dict.fromkeys(tickers))
 
-        # NaN check
-        if pd.isna(ma20) or pd.isna(ma50) or pd.isna(ret_3mo):
-            raise ValueError(f"Computed MA or return is NaN for {ticker}")
+def fund_close_matrix(names, prices: pd.DataFrame) -> pd.DataFrame:
+    """
+    One close column per name, in order: tickers straight from `prices` (the
+    shared (field, ticker) frame or a wide close matrix), L funds blended from
+    the proxies, "G Fund" accrued. Names with no data come back all-NaN.
+    """
+    close = prices["Close"] if isinstance(prices.columns, pd.MultiIndex) else prices
+    close = slice_period(close.dropna(how="all").sort_index(), FUND_TREND_PERIOD)
+    matrix = close.reindex(columns=names)
+    for name in names:
+        if name == "G Fund":
+            step = (1 + G_FUND_RATE) ** (1 / 252)
+            matrix[name] = 100 * step ** np.arange(len(close))
+        elif name in L_FUND_WEIGHTS:
+            try:
+                matrix[name] = blend_closes(close, L_FUND_WEIGHTS[name])
+            except KeyError:
+                pass  # a proxy is missing; the column stays NaN
+    return matrix
 
-        score = 0
-        score += 1 if price_now > ma20 else -1
-        score += 1 if price_now > ma50 else -1
-        score += 1 if ret_3mo > 0 else -1
+def score_funds(tickers=None, prices=None) -> tuple[pd.Series, pd.DataFrame]:
+    """
+    Scores every ticker (default FUND_UNIVERSE: TSP proxies, the G Fund,
+    the L funds and the WATCHLIST) in one NumPy pass, the same way as
+    score_fund(). Returns (scores, diagnostics), both indexed by ticker;
+    diagnostics holds price, ma20, ma50, ret_3mo, days and an error note.
+    Pass `prices` from a shared batched download to skip the fetch.
+    """
+    names = list(dict.fromkeys(tickers or FUND_UNIVERSE))
+    if prices is None:
+        prices = get_prices(_required_tickers(names), period=FUND_TREND_PERIOD)
 
-        if debug:
-            print(f"🔍 {ticker} Price: {price_now:.2f} | MA20: {ma20:.2f} | MA50: {ma50:.2f} | 3mo Ret: {ret_3mo:.2%}")
-            print(f"→ Trend Score: {score}")
+    if prices is None or prices.empty:
+        close = pd.DataFrame(np.nan, index=pd.DatetimeIndex([]), columns=names)
+    else:
+        close = fund_close_matrix(names, prices)
+    result = trend_scores(close.to_numpy(dtype=float))
 
-        return score
+    diagnostics = pd.DataFrame(
+        {key: result[key] for key in ["price", "ma20", "ma50", "ret_3mo", "days"]}, index=pd.Index(names, name="ticker")
+    )
+    diagnostics["error"] = None
+    for i in np.flatnonzero(~result["ok"]):
+        name = names[i]
+        days = int(result["days"][i])
+        error = f"No valid 'Close' data returned for {name}" if days == 0 else (
+            f"Not enough data to compute trend for {name} (have {days} days)"
+        )
+        diagnostics.iloc[i, diagnostics.columns.get_loc("error")] = error
+        print(f"⚠️ Error scoring {name}: {error}")
+        count("tsp_signal_errors_total", signal=name)
+    scores = pd.Series(result["score"], index=diagnostics.index, name="score")
+    return scores, diagnostics
 
+def score_fund(ticker: str, debug: bool = False, prices=None) -> int:
+    """
+    Scores a fund's trend using:
+    +1 if price > 20DMA
+    +1 if price > 50DMA
+    +1 if 3-month return > 0%
+    Returns integer score from –3 to +3.
+    Pass `prices` from a shared batched download to avoid a per-ticker fetch.
+    """
+    try:
+        scores, diagnostics = score_funds([ticker], prices)
     except Exception as e:
         print(f"⚠️ Error scoring {ticker}: {e}")
+        count("tsp_signal_errors_total", signal=ticker)
         return 0
+
+    score = int(scores[ticker])
+    if debug and diagnostics.at[ticker, "error"] is None:
+        row = diagnostics.loc[ticker]
+        print(f"🔍 {ticker} Price: {row.price:.2f} | MA20: {row.ma20:.2f} | MA50: {row.ma50:.2f} | 3mo Ret: {row.ret_3mo:.2%}")
+        print(f"→ Trend Score: {score}")
+    return score
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    scores, diagnostics = score_funds()
+    elapsed = time.perf_counter() - started
+    print(diagnostics.assign(score=scores).to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"✅ Scored {len(scores)} funds in {elapsed * 1000:.1f}ms")
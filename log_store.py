@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import sqlite3
+import threading
+import numpy as np
+from datetime import datetime
+from telemetry import span
+
+LOG_DIR = "logs"
+DB_PATH = os.getenv("LOG_DB", os.path.join(LOG_DIR, "history.db"))
+
+# Rows kept per metric by prune(); 0 keeps everything. Writers never prune.
+RETENTION = int(os.getenv("LOG_RETENTION", "0"))
+
+# Columns stored for each metric; scalar metrics keep a single "value"
+METRICS = {
+    "macro_score": ["value"],
+    "coherence": ["value"],
+    "velocity": ["value"],
+    "risk_weight": ["value"],
+    "regime": ["Expansion", "Recovery", "Neutral", "Contraction", "Crisis"],
+    "allocation": ["C", "S", "I", "F", "G"],
+}
+
+_local = threading.local()
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _row_values(metric: str, value) -> list:
+    columns = METRICS[metric]
+    if columns == ["value"]:
+        if isinstance(value, dict):
+            value = value.get("TotalScore", value.get("value", 0))
+        return [float(value)]
+    return [None if value.get(col) is None else float(value[col]) for col in columns]
+
+def _row_entry(metric: str, row) -> dict:
+    columns = METRICS[metric]
+    if columns == ["value"]:
+        value = row[1]
+    else:
+        value = dict(zip(columns, row[1:]))
+    return {"timestamp": row[0], "value": value}
+
+def _import_legacy(conn, metric: str):
+    path = os.path.join(LOG_DIR, f"{metric}_log.json")
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return
+    rows = []
+    for entry in entries:
+        try:
+            rows.append([entry["timestamp"]] + _row_values(metric, entry["value"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    _insert_rows(conn, metric, rows)
+
+def _insert_rows(conn, metric: str, rows: list):
+    if not rows:
+        return
+    columns = ", ".join(["ts"] + [_quote(c) for c in METRICS[metric]])
+    marks = ", ".join("?" * (len(METRICS[metric]) + 1))
+    conn.executemany(f"INSERT INTO {_quote(metric)} ({columns}) VALUES ({marks})", rows)
+
+def _init_db(conn):
+    """
+    Creates one table per metric (indexed on its ISO timestamp, which sorts
+    chronologically as text) and, for tables that are still empty, imports
+    the legacy logs/*_log.json history. BEGIN IMMEDIATE serializes this across
+    processes so the import runs once.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for metric, columns in METRICS.items():
+            cols = ", ".join(f"{_quote(c)} REAL" for c in columns)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(metric)} (ts TEXT NOT NULL, {cols})")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(metric + '_ts')} ON {_quote(metric)} (ts)")
+            if conn.execute(f"SELECT 1 FROM {_quote(metric)} LIMIT 1").fetchone() is None:
+                _import_legacy(conn, metric)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def connect() -> sqlite3.Connection:
+    """
+    Per-thread connection in WAL mode: readers never block the single writer,
+    and concurrent writers queue on SQLite's lock instead of clobbering a file.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _init_db(conn)
+        _local.conn = conn
+    return conn
+
+def append_many(entries, timestamp: str | None = None):
+    """
+    Appends (metric, value) pairs in one transaction, so a whole run costs one commit.
+    """
+    timestamp = timestamp or datetime.now().isoformat()
+    with span("log_write"):
+        conn = connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for metric, value in entries:
+                _insert_rows(conn, metric, [[timestamp] + _row_values(metric, value)])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+def append(metric: str, value, timestamp: str | None = None):
+    append_many([(metric, value)], timestamp=timestamp)
+
+def read_log(metric: str, last_n: int | None = None) -> list:
+    """
+    Returns the last `last_n` entries (all when None) as [{"timestamp", "value"}, ...],
+    oldest first, the same shape the JSON logs used.
+    """
+    columns = ", ".join(["ts"] + [_quote(c) for c in METRICS[metric]])
+    query = f"SELECT {columns} FROM {_quote(metric)} ORDER BY rowid DESC"
+    params = ()
+    if last_n is not None:
+        query += " LIMIT ?"
+        params = (last_n,)
+    rows = connect().execute(query, params).fetchall()
+    return [_row_entry(metric, row) for row in reversed(rows)]
+
+def _to_arrays(metric: str, rows) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Converts (ts, col...) rows into a datetime64 vector and a float64 array:
+    shape (n,) for scalar metrics, (n, len(columns)) otherwise. Missing values are NaN.
+    """
+    columns = METRICS[metric]
+    if not rows:
+        empty = np.empty((0,) if columns == ["value"] else (0, len(columns)))
+        return np.array([], dtype="datetime64[us]"), empty
+    timestamps = np.array([row[0] for row in rows], dtype="datetime64[us]")
+    values = np.array([row[1:] for row in rows], dtype=float)
+    if columns == ["value"]:
+        values = values[:, 0]
+    return timestamps, values
+
+def window(metric: str, last_n: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The newest `last_n` rows of a metric, oldest first, as (timestamps, values) arrays.
+    """
+    columns = ", ".join(["ts"] + [_quote(c) for c in METRICS[metric]])
+    with span("log_read", metric=metric):
+        rows = connect().execute(
+            f"SELECT {columns} FROM {_quote(metric)} ORDER BY ts DESC LIMIT ?", (last_n,)
+        ).fetchall()
+    return _to_arrays(metric, rows[::-1])
+
+def latest_timestamp(metric: str) -> str | None:
+    """
+    The newest stored timestamp of a metric, exactly as written; None when empty.
+    """
+    return connect().execute(f"SELECT MAX(ts) FROM {_quote(metric)}").fetchone()[0]
+
+def time_range(metric: str, start=None, end=None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rows with start <= timestamp < end (either bound optional) as (timestamps, values)
+    arrays, served from the timestamp index.
+    """
+    columns = ", ".join(["ts"] + [_quote(c) for c in METRICS[metric]])
+    query, params = f"SELECT {columns} FROM {_quote(metric)} WHERE 1=1", []
+    if start is not None:
+        query += " AND ts >= ?"
+        params.append(_iso(start))
+    if end is not None:
+        query += " AND ts < ?"
+        params.append(_iso(end))
+    rows = connect().execute(query + " ORDER BY ts", params).fetchall()
+    return _to_arrays(metric, rows)
+
+def _iso(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, np.datetime64):
+        return str(value.astype("datetime64[us]"))
+    return value.isoformat()
+
+def prune(keep: int = RETENTION):
+    """
+    Applies retention outside the write path: keeps the newest `keep` rows per metric.
+    """
+    if keep <= 0:
+        return
+    conn = connect()
+    for metric in METRICS:
+        table = _quote(metric)
+        conn.execute(
+            f"DELETE FROM {table} WHERE rowid NOT IN (SELECT rowid FROM {table} ORDER BY rowid DESC LIMIT ?)",
+            (keep,)
+        )
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "prune":
+        keep = int(sys.argv[2]) if len(sys.argv) > 2 else RETENTION
+        prune(keep)
+        print(f"✅ Pruned logs to the last {keep} entries per metric")
+    else:
+        print("Usage: python log_store.py prune [N]")
@@ -1,33 +1,16 @@
-import os
-import json
+import log_store
 from datetime import datetime
+from signal_state import current_state, state_lock
 
-LOG_DIR = "logs"
-MAX_ENTRIES = 12  # keep last 12 runs per log
-
-os.makedirs(LOG_DIR, exist_ok=True)
+def metric_name(file_name: str) -> str:
+    """
+    Maps a legacy log file name such as "regime_log.json" to its metric ("regime").
+    """
+    return file_name.removesuffix(".json").removesuffix("_log")
 
 def append_log(file_name: str, new_data: dict | float | int):
-    path = os.path.join(LOG_DIR, file_name)
-
-    # Load old log if it exists
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            history = json.load(f)
-    else:
-        history = []
-
-    # Add new entry with timestamp
-    entry = {
-        "timestamp": datetime.now().isoformat(),
-        "value": new_data
-    }
-    history.append(entry)
-    history = history[-MAX_ENTRIES:]  # keep only last N
-
-    # Write back to file
-    with open(path, "w") as f:
-        json.dump(history, f, indent=2)
+    # O(1) insert into the metric's table; retention is applied by log_store.prune()
+    log_store.append(metric_name(file_name), new_data)
 
 def save_logs(
     user,
@@ -38,9 +21,25 @@ def save_logs(
     risk_weight: float,
     allocation: dict
 ):
-    append_log("macro_score_log.json", sum(macro_pillars.values()))
-    append_log("coherence_log.json", coherence)
-    append_log("velocity_log.json", velocity)
-    append_log("risk_weight_log.json", round(risk_weight, 4))
-    append_log("regime_log.json", regime["probabilities"])
-    append_log("allocation_log.json", allocation)
+    # One transaction (and one fsync) for the whole run
+    timestamp = datetime.now().isoformat()
+    macro_score = sum(macro_pillars.values())
+    # Held from loading the state to saving it, so concurrent runs each fold
+    # into the state the previous one saved instead of overwriting it
+    with state_lock():
+        state = current_state()
+        log_store.append_many([
+            ("macro_score", macro_score),
+            ("coherence", coherence),
+            ("velocity", velocity),
+            ("risk_weight", round(risk_weight, 4)),
+            ("regime", regime["probabilities"]),
+            ("allocation", allocation),
+        ], timestamp=timestamp)
+
+        # Fold the run into the detector state so the next run does not re-read the log
+        state.update(regime["probabilities"], coherence, macro_score, timestamp)
+        try:
+            state.save()
+        except OSError as e:
+            print(f"⚠️ Could not save signal state: {e}")
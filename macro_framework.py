@@ -1,74 +1,110 @@
-from macro_signals import get_series, safe_pull
-import yfinance as yf
+from macro_signals import fetch_series_batch, lookup_series, safe_pull
+from market_data import get_prices, close_prices
+from telemetry import span
 import pandas as pd
 
-def score_growth():
-    gdp = safe_pull(get_series("GDPC1").pct_change(4), "Real GDP YoY")
-    lei = safe_pull(get_series("USSLIND"), "Leading Index")
-    ip = safe_pull(get_series("INDPRO").pct_change(12), "Industrial Production YoY")
+# FRED series each pillar depends on; the fetch planner unions these
+PILLAR_SERIES = {
+    "Growth": ["GDPC1", "USSLIND", "INDPRO"],
+    "Inflation": ["CPIAUCSL", "PCEPI", "CES0500000003"],
+    "Monetary Policy": ["FEDFUNDS", "GS10", "GS2", "WALCL"],
+    "Risk Sentiment": ["VIXCLS", "BAMLH0A0HYM2", "ANFCI"],
+    "Market Internals": [],
+    "Global Macro": ["DCOILWTICO", "DTWEXEMEGS"],
+}
+
+# Pillar cutoffs, shared by the live scorers and the vectorized history engine
+THRESHOLDS = {
+    "gdp_yoy": 0.01,
+    "leading_index": 0,
+    "ip_yoy": 0,
+    "cpi_yoy": 0.035,
+    "pce_yoy": 0.035,
+    "wages_yoy": 0.04,
+    "fed_funds": 4.5,
+    "yield_curve": 0,
+    "balance_sheet_yoy": 0,
+    "vix": 20,
+    "hy_spreads": 5,
+    "fci": 0,
+    "oil_yoy": 0.2,
+    "em_fx_yoy": -0.05,
+}
+
+# Sector ETFs compared by the market internals pillar
+CYCLICAL_TICKERS = ["XLF", "XLY"]
+DEFENSIVE_TICKERS = ["XLU", "XLV"]
+MARKET_INTERNALS_PERIOD = "6mo"
+
+def score_growth(data=None, prices=None):
+    gdp = safe_pull(lookup_series(data, "GDPC1").pct_change(4), "Real GDP YoY")
+    lei = safe_pull(lookup_series(data, "USSLIND"), "Leading Index")
+    ip = safe_pull(lookup_series(data, "INDPRO").pct_change(12), "Industrial Production YoY")
 
     score = 0
     if gdp is not None:
-        score += 1 if gdp > 0.01 else -1
+        score += 1 if gdp > THRESHOLDS["gdp_yoy"] else -1
     if lei is not None:
-        score += 1 if lei > 0 else -1
+        score += 1 if lei > THRESHOLDS["leading_index"] else -1
     if ip is not None:
-        score += 1 if ip > 0 else -1
+        score += 1 if ip > THRESHOLDS["ip_yoy"] else -1
 
     return score
 
-def score_inflation():
-    cpi = safe_pull(get_series("CPIAUCSL").pct_change(12, fill_method=None), "CPI YoY")
-    pce = safe_pull(get_series("PCEPI").pct_change(12, fill_method=None), "PCE YoY")
-    wages = safe_pull(get_series("CES0500000003").pct_change(12, fill_method=None), "Avg Hourly Earnings YoY")
+def score_inflation(data=None, prices=None):
+    cpi = safe_pull(lookup_series(data, "CPIAUCSL").pct_change(12, fill_method=None), "CPI YoY")
+    pce = safe_pull(lookup_series(data, "PCEPI").pct_change(12, fill_method=None), "PCE YoY")
+    wages = safe_pull(lookup_series(data, "CES0500000003").pct_change(12, fill_method=None), "Avg Hourly Earnings YoY")
 
     score = 0
     if cpi is not None:
-        score += -1 if cpi > 0.035 else 1
+        score += -1 if cpi > THRESHOLDS["cpi_yoy"] else 1
     if pce is not None:
-        score += -1 if pce > 0.035 else 1
+        score += -1 if pce > THRESHOLDS["pce_yoy"] else 1
     if wages is not None:
-        score += -1 if wages > 0.04 else 1
+        score += -1 if wages > THRESHOLDS["wages_yoy"] else 1
 
     return score
 
-def score_monetary_policy():
-    fed_funds = safe_pull(get_series("FEDFUNDS"), "Fed Funds Rate")
-    ten = safe_pull(get_series("GS10"), "10Y Yield")
-    two = safe_pull(get_series("GS2"), "2Y Yield")
-    balance_sheet = safe_pull(get_series("WALCL").pct_change(12, fill_method=None), "Fed Balance Sheet YoY")
+def score_monetary_policy(data=None, prices=None):
+    fed_funds = safe_pull(lookup_series(data, "FEDFUNDS"), "Fed Funds Rate")
+    ten = safe_pull(lookup_series(data, "GS10"), "10Y Yield")
+    two = safe_pull(lookup_series(data, "GS2"), "2Y Yield")
+    balance_sheet = safe_pull(lookup_series(data, "WALCL").pct_change(12, fill_method=None), "Fed Balance Sheet YoY")
 
     score = 0
     if fed_funds is not None:
-        score += -1 if fed_funds > 4.5 else 1
+        score += -1 if fed_funds > THRESHOLDS["fed_funds"] else 1
     if ten is not None and two is not None:
         curve = ten - two
-        score += 1 if curve > 0 else -1
+        score += 1 if curve > THRESHOLDS["yield_curve"] else -1
     if balance_sheet is not None:
-        score += 1 if balance_sheet > 0 else -1
+        score += 1 if balance_sheet > THRESHOLDS["balance_sheet_yoy"] else -1
 
     return score
 
-def score_risk_sentiment():
-    vix = safe_pull(get_series("VIXCLS"), "VIX")
-    spreads = safe_pull(get_series("BAMLH0A0HYM2"), "High Yield Credit Spreads")
-    fci = safe_pull(get_series("ANFCI"), "Financial Conditions Index")
+def score_risk_sentiment(data=None, prices=None):
+    vix = safe_pull(lookup_series(data, "VIXCLS"), "VIX")
+    spreads = safe_pull(lookup_series(data, "BAMLH0A0HYM2"), "High Yield Credit Spreads")
+    fci = safe_pull(lookup_series(data, "ANFCI"), "Financial Conditions Index")
 
     score = 0
     if vix is not None:
-        score += -1 if vix > 20 else 1
+        score += -1 if vix > THRESHOLDS["vix"] else 1
     if spreads is not None:
-        score += -1 if spreads > 5 else 1
+        score += -1 if spreads > THRESHOLDS["hy_spreads"] else 1
     if fci is not None:
-        score += -1 if fci > 0 else 1
+        score += -1 if fci > THRESHOLDS["fci"] else 1
 
     return score
 
-def score_market_internals():
+def score_market_internals(data=None, prices=None):
     score = 0
     try:
-        cyc = yf.download(["XLF", "XLY"], period="6mo", progress=False, auto_adjust=False)["Close"]
-        defn = yf.download(["XLU", "XLV"], period="6mo", progress=False, auto_adjust=False)["Close"]
+        if prices is None:
+            prices = get_prices(CYCLICAL_TICKERS + DEFENSIVE_TICKERS, period=MARKET_INTERNALS_PERIOD)
+        cyc = close_prices(prices, CYCLICAL_TICKERS, MARKET_INTERNALS_PERIOD)
+        defn = close_prices(prices, DEFENSIVE_TICKERS, MARKET_INTERNALS_PERIOD)
 
         cyc_perf = (cyc.iloc[-1] / cyc.iloc[0]).mean()
         defn_perf = (defn.iloc[-1] / defn.iloc[0]).mean()
@@ -78,28 +114,47 @@ def score_market_internals():
         print(f"⚠️ Sector rotation data error: {e}")
     return score
 
-def score_global_macro():
-    oil = safe_pull(get_series("DCOILWTICO").pct_change(12, fill_method=None), "Oil YoY")
-    em_fx = safe_pull(get_series("DTWEXEMEGS").pct_change(12, fill_method=None), "EM FX YoY")
+def score_global_macro(data=None, prices=None):
+    oil = safe_pull(lookup_series(data, "DCOILWTICO").pct_change(12, fill_method=None), "Oil YoY")
+    em_fx = safe_pull(lookup_series(data, "DTWEXEMEGS").pct_change(12, fill_method=None), "EM FX YoY")
     # TEMP PATCH — remove/replace China PMI if no reliable FRED series available
     china_pmi = None  # Optional: plug in external source or proxy later
 
     score = 0
     if oil is not None:
-        score += -1 if oil > 0.2 else 1
+        score += -1 if oil > THRESHOLDS["oil_yoy"] else 1
     if em_fx is not None:
-        score += -1 if em_fx < -0.05 else 1
+        score += -1 if em_fx < THRESHOLDS["em_fx_yoy"] else 1
     if china_pmi is not None:
         score += 1 if china_pmi > 50 else -1
 
     return score
 
-def get_macro_pillars():
-    return {
-        "Growth": score_growth(),
-        "Inflation": score_inflation(),
-        "Monetary Policy": score_monetary_policy(),
-        "Risk Sentiment": score_risk_sentiment(),
-        "Market Internals": score_market_internals(),
-        "Global Macro": score_global_macro()
-    }
+# Every scorer takes (data, prices); only Market Internals reads prices
+PILLAR_SCORERS = {
+    "Growth": score_growth,
+    "Inflation": score_inflation,
+    "Monetary Policy": score_monetary_policy,
+    "Risk Sentiment": score_risk_sentiment,
+    "Market Internals": score_market_internals,
+    "Global Macro": score_global_macro
+}
+
+def pillar_series() -> list:
+    """
+    Unique FRED series IDs needed by every pillar, in declaration order.
+    """
+    return list(dict.fromkeys(sid for ids in PILLAR_SERIES.values() for sid in ids))
+
+def get_macro_pillars(data=None, prices=None):
+    """
+    Scores every pillar against one shared batch of FRED series.
+    Pass `data` and `prices` from fetch_planner to reuse inputs across overlays.
+    """
+    if data is None:
+        data = fetch_series_batch(pillar_series())
+    pillars = {}
+    for name, scorer in PILLAR_SCORERS.items():
+        with span("pillar", pillar=name):
+            pillars[name] = scorer(data, prices)
+    return pillars
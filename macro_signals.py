@@ -1,10 +1,21 @@
-from fredapi import Fred
 import os
-import yfinance as yf
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+import series_cache
+from fred_client import SERIES_FREQUENCY
+from providers import get_provider
+from resilience import call, report_stale, revalidate, CircuitOpenError
+from telemetry import span, count, propagate
 
-# Initialize FRED client
-fred = Fred(api_key=os.getenv("FRED_API_KEY"))
+# Serve every series from the local cache and never touch the network
+OFFLINE = os.getenv("FRED_OFFLINE", "0") == "1"
+
+# Upper bound on concurrent FRED requests per batch
+MAX_FETCH_WORKERS = int(os.getenv("FRED_MAX_WORKERS", "8"))
+
+# For this long past FRED_CACHE_TTL a cached series is served as-is while it refreshes in the background
+STALE_WHILE_REVALIDATE = float(os.getenv("FRED_STALE_WHILE_REVALIDATE", "3600"))
 
 def safe_pull(series, name):
     """
@@ -16,14 +27,106 @@ def safe_pull(series, name):
         return val
     except Exception as e:
         print(f"⚠️ Error pulling {name}: {e}")
+        count("tsp_signal_errors_total", signal=name)
         return None
 
-def get_series(name):
+def cache_state(name):
+    """
+    Returns (cached series or None, observation_start for an incremental refresh, hit).
+    On a hit the cached copy can be served without touching the network. A copy
+    cached at a different FRED_FREQUENCY than the one now configured counts as
+    missing (except offline), so the series is refetched in full rather than
+    mixing frequencies.
+    """
+    cached = series_cache.load_series(name)
+    meta = series_cache.load_meta(name)
+    if cached is not None and meta and not OFFLINE and meta.get("frequency") != SERIES_FREQUENCY.get(name):
+        print(f"🔁 {name} was cached at frequency {meta.get('frequency') or 'native'}; refetching")
+        cached = None
+    hit = cached is not None and (OFFLINE or series_cache.is_fresh(meta))
+    start = meta.get("last_observation") if cached is not None and meta else None
+    return cached, start, hit
+
+def store_fetched(name, cached, new):
     """
-    Fetches raw time series from FRED using its ID.
+    Merges newly fetched observations into the cache and returns the full series.
     """
+    if cached is not None and new.empty:
+        series_cache.touch(name)
+        return cached
+
+    merged = series_cache.merge_series(cached, new)
     try:
-        return fred.get_series(name)
+        series_cache.store_series(name, merged, frequency=SERIES_FREQUENCY.get(name))
     except Exception as e:
-        print(f"⚠️ Error fetching {name}: {e}")
-        return pd.Series(dtype=float)
+        print(f"⚠️ Could not cache {name}: {e}")
+    return merged
+
+def last_refresh(name) -> float | None:
+    meta = series_cache.load_meta(name)
+    return meta.get("last_refresh") if meta else None
+
+def within_stale_window(refreshed_at) -> bool:
+    return refreshed_at is not None and time.time() - refreshed_at < series_cache.CACHE_TTL + STALE_WHILE_REVALIDATE
+
+def refresh_series(name, cached, start):
+    """
+    Fetches observations from `start` through the FRED breaker and retries,
+    merges them into the cache and returns the full series. Raises on failure.
+    """
+    with span("fred_fetch", series=name):
+        new = call("fred", get_provider().get_series, name, observation_start=start)
+    count("tsp_fetch_bytes_total", new.memory_usage(index=True), source="fred")
+    return store_fetched(name, cached, new)
+
+def get_series(name, force: bool = False):
+    """
+    Fetches raw time series from FRED (via the configured provider) using its ID.
+    History is served from the on-disk cache; once the cache is older than
+    FRED_CACHE_TTL (or when `force` is set) only observations from the cached
+    tail onward are requested. A copy that expired less than
+    FRED_STALE_WHILE_REVALIDATE ago is served at once and refreshed in the
+    background; when a refresh fails the last good copy is served. Either way
+    the fallback is reported through resilience.report_stale().
+    """
+    with span("get_series", series=name):
+        cached, start, hit = cache_state(name)
+        if hit and not (force and not OFFLINE):
+            count("tsp_cache_total", cache="fred", result="hit")
+            return cached
+        count("tsp_cache_total", cache="fred", result="miss")
+        if OFFLINE:
+            print(f"⚠️ {name} not in cache (offline mode)")
+            return pd.Series(dtype=float)
+
+        refreshed_at = last_refresh(name) if cached is not None else None
+        if not force and cached is not None and within_stale_window(refreshed_at):
+            report_stale("fred", name, refreshed_at, "revalidating")
+            revalidate(("fred", name), lambda: refresh_series(name, cached, start))
+            return cached
+
+        try:
+            return refresh_series(name, cached, start)
+        except Exception as e:
+            print(f"⚠️ Error fetching {name}: {e}")
+            report_stale("fred", name, refreshed_at, "circuit_open" if isinstance(e, CircuitOpenError) else "fetch_failed")
+            return cached if cached is not None else pd.Series(dtype=float)
+
+def fetch_series_batch(names, max_workers: int = MAX_FETCH_WORKERS, force: bool = False) -> dict:
+    """
+    Fetches each unique FRED series once on a bounded thread pool.
+    Returns a dict of series ID -> raw time series for the scorers to share.
+    """
+    unique = list(dict.fromkeys(names))
+    if not unique:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique)))) as pool:
+        return dict(zip(unique, pool.map(propagate(lambda name: get_series(name, force=force)), unique)))
+
+def lookup_series(data, name):
+    """
+    Returns a series from a pre-fetched batch, falling back to a direct fetch.
+    """
+    if data is not None and name in data:
+        return data[name]
+    return get_series(name)
@@ -1,24 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, JSONResponse, StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 from user_profile import UserProfile
-from macro_framework import get_macro_pillars
-from regime_matrix import classify_regime
-from coherence_score import score_coherence
-from narrative_velocity import score_velocity
-from flow_overlay import detect_fragility
-from phase_shift_detector import detect_phase_shift
-from exposure_modulator import modulate_risk_weight
-from fund_trends import score_fund
-from personalize import personalize_allocation
+from personalize import personalize_allocation, personalize_allocations
+from snapshot import snapshot_cache, BASE_ALLOCATION
+from projection import project_allocation
+from response_cache import response_cache, make_etag, etag_matches
+import telemetry
 
+import asyncio
 import datetime
 import json
 import os
+import time
 
-app = FastAPI(title="TSP Allocator API", version="1.0")
+# Precompute snapshots on a background thread instead of on request
+BACKGROUND_REFRESH = os.getenv("BACKGROUND_REFRESH", "0") == "1"
 
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresher = None
+    if BACKGROUND_REFRESH:
+        from refresher import SnapshotRefresher
+        refresher = SnapshotRefresher()
+        # With SHARED_SNAPSHOT=1 only the leader refreshes; a follower starts
+        # the refresher if it takes over later
+        if snapshot_cache.leads():
+            refresher.start()
+        else:
+            snapshot_cache.on_lead = refresher.start
+    yield
+    if refresher is not None:
+        refresher.stop()
+
+app = FastAPI(title="TSP Allocator API", version="1.0", lifespan=lifespan)
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates, not raw URLs, keep the label set bounded
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        telemetry.observe("tsp_http_request_duration_seconds", time.perf_counter() - started, path=path)
+        telemetry.count("tsp_http_requests_total", path=path, status=status)
 
 class ProfileInput(BaseModel):
     name: str
@@ -26,73 +58,135 @@ class ProfileInput(BaseModel):
     retirement_year: int
     risk_tolerance: str  # 'Conservative', 'Moderate', 'Aggressive'
 
-def load_json(path, default=[]):
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)[-12:]
-    return default
+class ProjectionInput(ProfileInput):
+    balance: float
+    annual_contribution: float = 0.0
+    paths: int = 20_000
+    regime_conditioned: bool = True  # condition the first years on the snapshot's regime probabilities
+    target: float | None = None
+
+class BatchInput(BaseModel):
+    profiles: list[ProfileInput]
+    stream: bool = False  # NDJSON: one snapshot line, then one line per profile
+
+def snapshot_fields(snapshot: dict) -> dict:
+    """
+    Response fields shared by every profile for a given macro snapshot.
+    """
+    regime_result = snapshot["regime"]
+    probs = regime_result["probabilities"]
+    summary = f"{max(probs, key=probs.get)} regime with coherence {round(snapshot['coherence'],2)} and risk weight {round(snapshot['risk_weight'],2)}"
+    return {
+        "regime": probs,
+        "stability": regime_result["stability"],
+        "coherence": snapshot["coherence"],
+        "velocity": snapshot["velocity"],
+        "risk_weight": round(snapshot["risk_weight"], 4),
+        "fragility": snapshot["fragility"],
+        "phase_shift": snapshot["phase_shift"],
+        "macro_score": round(snapshot["macro_score"], 3),
+        "summary": summary,
+        "snapshot_version": snapshot.get("version"),
+        "snapshot_at": snapshot["computed_at"],
+        "partial": snapshot.get("partial", False),
+        "sources": snapshot.get("sources"),
+        "stale": snapshot.get("stale", {}),
+        "held": snapshot.get("held", [])
+    }
 
 @app.post("/run")
-def run_allocator(profile: ProfileInput):
-    user = UserProfile(**profile.dict())
+async def run_allocator(profile: ProfileInput, debug: bool = False, if_none_match: str | None = Header(None)):
+    """
+    Responses carry an ETag built from the snapshot version and the profile;
+    a request whose If-None-Match still matches gets a 304 without running
+    personalization, and repeat requests are served from response_cache.
+    With ?debug=true the response also carries "trace": every timed stage
+    this request ran (only personalization when the snapshot was cached),
+    and is never cached.
+    """
     CURRENT_YEAR = datetime.datetime.now().year
 
-    # Macro signal
-    pillars = get_macro_pillars()
-    macro_score = sum(pillars.values())
-    regime_result = classify_regime(pillars)
-    stability = regime_result["stability"]
+    with telemetry.trace(enabled=debug) as spans:
+        with telemetry.span("snapshot"):
+            snapshot = await snapshot_cache.aget()
+        etag = make_etag(profile.dict(), snapshot, CURRENT_YEAR)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if not debug:
+            if etag_matches(if_none_match, etag):
+                telemetry.count("tsp_cache_total", cache="response", result="not_modified")
+                return Response(status_code=304, headers=headers)
+            body = response_cache.get(etag)
+            if body is not None:
+                return Response(body, media_type="application/json", headers=headers)
+        with telemetry.span("personalize"):
+            user = UserProfile(**profile.dict())
+            alloc = personalize_allocation(BASE_ALLOCATION, user, CURRENT_YEAR)
 
-    # Coherence + fragility
-    coherence = score_coherence(pillars)
-    velocity = score_velocity(load_json("logs/regime_log.json"))
-    fragility_flag, _ = detect_fragility()
+    response = snapshot_fields(snapshot)
+    response["allocation"] = alloc
+    if spans is not None:
+        response["trace"] = spans
+        return response
+    rendered = JSONResponse(jsonable_encoder(response), headers=headers)
+    response_cache.put(etag, snapshot.get("version"), rendered.body)
+    return rendered
 
-    # Fund momentum
-    try:
-        fund_trend_score = score_fund("SPY") + score_fund("IWM")
-    except:
-        fund_trend_score = 0
-
-    macro_score_log = [
-        entry.get("value", {}).get("TotalScore", 0)
-        if isinstance(entry.get("value"), dict)
-        else entry.get("value")
-        for entry in load_json("logs/macro_score_log.json")
-    ]
-    macro_score_log.append(macro_score)
-
-    phase_shift_flag, _ = detect_phase_shift(
-        regime_history=load_json("logs/regime_log.json"),
-        coherence_history=load_json("logs/coherence_log.json", default=[coherence]),
-        velocity=velocity,
-        macro_scores=macro_score_log,
-        fund_trend_score=fund_trend_score
-    )
+# Upper bound on simulated paths per /project request
+MAX_PROJECTION_PATHS = int(os.getenv("MAX_PROJECTION_PATHS", "200000"))
 
-    # Risk-adjusted weight
-    risk_weight = modulate_risk_weight(
-        base_risk=0.7,
-        stability=stability,
-        coherence=coherence,
-        velocity=velocity,
-        fragility_flag=fragility_flag
+@app.post("/project")
+async def project(request: ProjectionInput):
+    """
+    Monte Carlo retirement balances for the personalized allocation.
+    """
+    user = UserProfile(request.name, request.age, request.retirement_year, request.risk_tolerance)
+    CURRENT_YEAR = datetime.datetime.now().year
+
+    snapshot = await snapshot_cache.aget()
+    alloc = personalize_allocation(BASE_ALLOCATION, user, CURRENT_YEAR)
+    with telemetry.span("projection"):
+        result = await asyncio.to_thread(
+            project_allocation, alloc, user, request.balance, request.annual_contribution,
+            n_paths=max(1, min(request.paths, MAX_PROJECTION_PATHS)),
+            regime_probs=snapshot["regime"]["probabilities"] if request.regime_conditioned else None,
+            current_year=CURRENT_YEAR, target=request.target, workers=1
+        )
+
+    return {"allocation": alloc, "snapshot_version": snapshot.get("version"), **result}
+
+@app.post("/run/batch")
+async def run_batch(batch: BatchInput):
+    """
+    Personalizes a whole cohort against a single macro snapshot.
+    """
+    CURRENT_YEAR = datetime.datetime.now().year
+
+    snapshot = await snapshot_cache.aget()
+    funds, weights = personalize_allocations(
+        BASE_ALLOCATION,
+        retirement_years=[p.retirement_year for p in batch.profiles],
+        risk_tolerances=[p.risk_tolerance for p in batch.profiles],
+        current_year=CURRENT_YEAR
     )
+    shared = snapshot_fields(snapshot)
+    rows = weights.tolist()
 
-    base_alloc = {"C": 40, "S": 15, "I": 5, "F": 10, "G": 30}
-    alloc = personalize_allocation(base_alloc, user, CURRENT_YEAR)
+    def results():
+        for profile, row in zip(batch.profiles, rows):
+            yield {"name": profile.name, "allocation": dict(zip(funds, row))}
 
-    summary = f"{max(regime_result['probabilities'], key=regime_result['probabilities'].get)} regime with coherence {round(coherence,2)} and risk weight {round(risk_weight,2)}"
+    if batch.stream:
+        def ndjson():
+            yield json.dumps({"snapshot": shared}) + "\n"
+            for result in results():
+                yield json.dumps(result) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
-    return {
-        "regime": regime_result["probabilities"],
-        "stability": stability,
-        "coherence": coherence,
-        "velocity": velocity,
-        "risk_weight": round(risk_weight, 4),
-        "fragility": fragility_flag,
-        "phase_shift": phase_shift_flag,
-        "allocation": alloc,
-        "macro_score": round(macro_score, 3),
-        "summary": summary
-    }
+    return {"snapshot": shared, "count": len(rows), "results": list(results())}
+
+@app.get("/metrics")
+def metrics():
+    """
+    Stage latency histograms and fetch/cache/error counters in the Prometheus text format.
+    """
+    return PlainTextResponse(telemetry.render(), media_type="text/plain; version=0.0.4")
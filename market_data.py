@@ -0,0 +1,202 @@
+import os
+import re
+import time
+import pandas as pd
+import price_store
+from providers import get_provider
+from resilience import call, breaker, report_stale, revalidate
+from telemetry import span, count
+
+# Serve bars from the local price store only and never touch the network
+OFFLINE = os.getenv("MARKET_OFFLINE", "0") == "1"
+
+# Slack for weekends/holidays when checking that stored history covers a window
+COVERAGE_GRACE = pd.Timedelta(days=7)
+
+# For this long past PRICE_STORE_TTL stored bars are served as-is while they refresh in the background
+STALE_WHILE_REVALIDATE = float(os.getenv("PRICE_STALE_WHILE_REVALIDATE", "900"))
+
+def period_offset(period: str):
+    """
+    Converts a yfinance period string into (rows, DateOffset); exactly one is set.
+    "5d" means the last five trading sessions, "6mo"/"1y" are calendar look-backs.
+    """
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return n, None
+    if unit == "wk":
+        return None, pd.DateOffset(weeks=n)
+    if unit == "mo":
+        return None, pd.DateOffset(months=n)
+    return None, pd.DateOffset(years=n)
+
+def _period_days(period: str) -> float:
+    rows, offset = period_offset(period)
+    if rows is not None:
+        return rows * 7 / 5  # trading sessions -> calendar days
+    anchor = pd.Timestamp("2000-01-01")
+    return ((anchor + offset) - anchor).days
+
+def widest_period(periods) -> str:
+    """
+    Returns the period that covers every other requested window.
+    """
+    return max(periods, key=_period_days)
+
+def plan_downloads(needs) -> tuple[list, str]:
+    """
+    Unions the (tickers, period) needs declared by each consumer into a single
+    ticker list and the widest window to download.
+    """
+    tickers, periods = [], []
+    for need_tickers, period in needs:
+        tickers.extend(need_tickers)
+        periods.append(period)
+    return list(dict.fromkeys(tickers)), widest_period(periods)
+
+def download_prices(tickers, period: str = "6mo", start=None) -> pd.DataFrame:
+    """
+    One multi-ticker daily download; columns are a (field, ticker) MultiIndex.
+    With `start`, only bars from that date onward are requested.
+    """
+    try:
+        with span("market_download", window="incremental" if start is not None else period):
+            frame = call("yahoo", get_provider().get_bars, tickers, period=period, start=start)
+    except Exception as e:
+        print(f"⚠️ Market data download error: {e}")
+        return pd.DataFrame()
+    count("tsp_fetch_bytes_total", frame.memory_usage(index=True).sum(), source="yahoo")
+    return frame
+
+def slice_period(frame: pd.DataFrame, period: str | None) -> pd.DataFrame:
+    """
+    Trims a shared frame down to the window a consumer originally asked for.
+    """
+    if period is None or frame.empty:
+        return frame
+    rows, offset = period_offset(period)
+    if rows is not None:
+        return frame.iloc[-rows:]
+    return frame[frame.index >= frame.index[-1] - offset]
+
+def ticker_frame(prices: pd.DataFrame, ticker: str, period: str | None = None) -> pd.DataFrame:
+    """
+    Open/High/Low/Close/... columns for one ticker, without the rows where it did not trade.
+    """
+    frame = prices.xs(ticker, axis=1, level=-1).dropna(how="all")
+    return slice_period(frame, period)
+
+def close_prices(prices: pd.DataFrame, tickers, period: str | None = None) -> pd.DataFrame:
+    """
+    Close prices for a group of tickers, one column each.
+    """
+    frame = prices["Close"][list(tickers)].dropna(how="all")
+    return slice_period(frame, period)
+
+def _store_download(frame: pd.DataFrame, tickers, searched_from=None):
+    if frame.empty:
+        return  # the download failed and already said so; keep serving what is stored
+    for ticker in tickers:
+        try:
+            bars = frame.xs(ticker, axis=1, level=-1)
+        except KeyError:
+            print(f"⚠️ No bars returned for {ticker}")
+            continue
+        price_store.append_bars(ticker, bars, searched_from)
+
+def coverage_start(period: str) -> pd.Timestamp:
+    """
+    Oldest bar date stored history has to reach for `period` to count as covered.
+    """
+    return pd.Timestamp.today().normalize() - pd.Timedelta(days=_period_days(period)) + COVERAGE_GRACE
+
+def plan_refresh(tickers, period: str) -> tuple[list, list, object]:
+    """
+    Splits tickers into cold (not enough stored history for `period`) and warm
+    (stored but stale), plus the oldest stored tail to fetch the warm ones from.
+    Fresh tickers appear in neither list. A ticker listed inside the window is
+    covered once the store holds its first available bar.
+    """
+    since = coverage_start(period)
+    cold, warm = [], []
+    for ticker in tickers:
+        if not price_store.covers(ticker, since):
+            cold.append(ticker)
+        elif not price_store.is_fresh(ticker):
+            warm.append(ticker)
+    start = min(price_store.last_date(t) for t in warm) if warm else None
+    return cold, warm, start
+
+def last_refresh(ticker) -> float | None:
+    meta = price_store.load_meta(ticker)
+    return meta.get("last_refresh") if meta else None
+
+def within_stale_window(refreshed_at) -> bool:
+    return refreshed_at is not None and time.time() - refreshed_at < price_store.STORE_TTL + STALE_WHILE_REVALIDATE
+
+def report_unrefreshed(tickers, refreshed_at: dict):
+    """
+    Reports every ticker whose download did not land, so its stored bars (if
+    any) are what gets served.
+    """
+    reason = "circuit_open" if breaker("yahoo").state == "open" else "fetch_failed"
+    for ticker in tickers:
+        if not price_store.is_fresh(ticker):
+            report_stale("yahoo", ticker, refreshed_at.get(ticker), reason)
+
+def refresh_incremental(tickers, start):
+    """
+    Downloads bars from `start` onward for tickers already in the store and appends them.
+    """
+    _store_download(download_prices(tickers, start=start), tickers)
+
+def refresh_store(tickers, period: str):
+    """
+    Brings the price store up to date for `tickers` with at most two downloads:
+    a full-window fetch for tickers without enough history, and one incremental
+    fetch from the oldest stored tail for everything else. When every stale
+    ticker expired less than PRICE_STALE_WHILE_REVALIDATE ago, the incremental
+    fetch runs in the background and the stored bars are served meanwhile.
+    """
+    cold, warm, start = plan_refresh(tickers, period)
+    count("tsp_cache_total", len(tickers) - len(cold) - len(warm), cache="prices", result="hit")
+    count("tsp_cache_total", len(cold) + len(warm), cache="prices", result="miss")
+    refreshed_at = {t: last_refresh(t) for t in cold + warm}
+    if cold:
+        _store_download(download_prices(cold, period=period), cold, coverage_start(period))
+        report_unrefreshed(cold, refreshed_at)
+    if warm and all(within_stale_window(refreshed_at[t]) for t in warm):
+        for ticker in warm:
+            report_stale("yahoo", ticker, refreshed_at[ticker], "revalidating")
+        revalidate(("yahoo", tuple(warm)), lambda: refresh_incremental(warm, start))
+    elif warm:
+        refresh_incremental(warm, start)
+        report_unrefreshed(warm, refreshed_at)
+
+def frame_from_store(tickers, period: str) -> pd.DataFrame:
+    """
+    Shared (field, ticker) frame built from the mapped per-ticker files.
+    """
+    frames = {t: price_store.load_bars(t) for t in tickers}
+    frames = {t: f for t, f in frames.items() if f is not None}
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    return slice_period(combined, period)
+
+def get_prices(tickers, period: str = "6mo") -> pd.DataFrame:
+    """
+    Store-backed equivalent of download_prices(): only bars newer than the
+    stored tail go over the network, the rest is read from mapped files.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    try:
+        if not OFFLINE:
+            refresh_store(tickers, period)
+        return frame_from_store(tickers, period)
+    except Exception as e:
+        print(f"⚠️ Price store error, downloading directly: {e}")
+        return pd.DataFrame() if OFFLINE else download_prices(tickers, period=period)
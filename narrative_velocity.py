@@ -1,5 +1,18 @@
 import numpy as np
 
+def cosine_drift(a, b) -> np.ndarray:
+    """
+    Cosine distance between regime vectors along the last axis. Two all-zero
+    vectors (no regime scored either time) have not moved, so their distance
+    is 0; a zero vector against a non-zero one has nothing in common (1).
+    """
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    norm_a, norm_b = np.linalg.norm(a, axis=-1), np.linalg.norm(b, axis=-1)
+    dot = np.asarray((a * b).sum(axis=-1))
+    norm = norm_a * norm_b
+    similarity = np.divide(dot, norm, out=np.zeros_like(dot), where=norm != 0)
+    return np.where((norm_a == 0) & (norm_b == 0), 0.0, 1 - similarity)
+
 def regime_vector_distance(a, b):
     """
     Computes cosine distance between two regime probability vectors.
@@ -7,11 +20,7 @@ def regime_vector_distance(a, b):
     """
     a_vec = np.array([float(v) for v in a.values()])
     b_vec = np.array([float(v) for v in b.values()])
-
-    dot = np.dot(a_vec, b_vec)
-    norm = np.linalg.norm(a_vec) * np.linalg.norm(b_vec)
-    cosine_similarity = dot / norm if norm != 0 else 0
-    return 1 - cosine_similarity  # distance = 1 - similarity
+    return float(cosine_drift(a_vec, b_vec))  # distance = 1 - similarity
 
 
 def score_velocity(history):
@@ -36,3 +45,15 @@ def score_velocity(history):
         return 0.0
 
     return round(sum(distances) / len(distances), 4)
+
+
+def score_velocity_array(probabilities):
+    """
+    score_velocity() over a (snapshots, regimes) probability array, as returned by
+    log_store.window("regime", n). All consecutive distances are computed at once.
+    """
+    probs = np.nan_to_num(np.asarray(probabilities, dtype=float))
+    if probs.ndim != 2 or len(probs) < 2:
+        return 0.0
+
+    return round(float(cosine_drift(probs[:-1], probs[1:]).mean()), 4)
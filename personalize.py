@@ -1,16 +1,19 @@
+import numpy as np
+
+RISK_LEVELS = {
+    "aggressive": 1.2,
+    "moderate": 1.0,
+    "conservative": 0.5
+}
+
 def personalize_allocation(base_alloc: dict, user_profile, current_year: int) -> dict:
     """
     Adjusts base TSP allocation based on user profile and market context.
     Includes risk tolerance scaling and optional glidepath toward retirement.
     """
     # Normalize risk tolerance input
-    risk_levels = {
-        "aggressive": 1.2,
-        "moderate": 1.0,
-        "conservative": 0.5
-    }
     risk_input = user_profile.risk_tolerance.lower()
-    risk_multiplier = risk_levels.get(risk_input, 1.0)  # fallback to moderate
+    risk_multiplier = RISK_LEVELS.get(risk_input, 1.0)  # fallback to moderate
 
     # Calculate years until retirement
     years_left = max(user_profile.retirement_year - current_year, 0)
@@ -28,3 +31,23 @@ def personalize_allocation(base_alloc: dict, user_profile, current_year: int) ->
             personalized[fund] = round(personalized[fund] * 100 / total, 2)
 
     return personalized
+
+def personalize_allocations(base_alloc: dict, retirement_years, risk_tolerances, current_year: int):
+    """
+    Vectorized personalize_allocation() for a whole cohort.
+    Returns (fund names, array of shape (profiles, funds)) with each row summing to 100.
+    """
+    funds = list(base_alloc)
+    base = np.array([base_alloc[f] for f in funds], dtype=float)
+
+    risk_multiplier = np.array([RISK_LEVELS.get(r.lower(), 1.0) for r in risk_tolerances])
+    years_left = np.maximum(np.asarray(retirement_years, dtype=float) - current_year, 0)
+    glide_factor = np.maximum(1 - years_left / 40, 0.3)
+
+    adjusted = np.round(base[None, :] * (risk_multiplier * glide_factor)[:, None], 2)
+
+    # Rebalance each row to total 100%
+    total = adjusted.sum(axis=1, keepdims=True)
+    safe_total = np.where(total > 0, total, 1)
+    personalized = np.where(total > 0, np.round(adjusted * 100 / safe_total, 2), adjusted)
+    return funds, personalized
@@ -1,3 +1,5 @@
+import numpy as np
+
 def detect_phase_shift(regime_history, coherence_history, velocity, macro_scores, fund_trend_score):
     """
     Detects if a macro regime phase shift is occurring by analyzing regime conviction,
@@ -8,7 +10,7 @@ def detect_phase_shift(regime_history, coherence_history, velocity, macro_scores
         - diagnostics: dict with breakdown of drivers
     """
 
-    # Extract coherence float values safely
+    # Extract coherence float values safely (arrays from log_store.window pass straight through)
     coherence_values = [
         float(entry.get("value", entry)) if isinstance(entry, dict) else float(entry)
         for entry in coherence_history
@@ -18,7 +20,10 @@ def detect_phase_shift(regime_history, coherence_history, velocity, macro_scores
     # 1. Regime Drift
     regime_drift = False
     if len(regime_history) >= 3:
-        top_probs = [max(d.values()) for d in regime_history[-3:]]
+        if isinstance(regime_history, np.ndarray):
+            top_probs = np.nan_to_num(regime_history[-3:]).max(axis=1)
+        else:
+            top_probs = [max(d.values()) for d in regime_history[-3:]]
         regime_drift = (top_probs[0] - top_probs[-1]) > 0.15
 
     # 2. Coherence Drop
@@ -29,7 +34,7 @@ def detect_phase_shift(regime_history, coherence_history, velocity, macro_scores
 
     # 4. Macro vs Trend
     macro_momentum = macro_scores[-1] - macro_scores[-2] if len(macro_scores) >= 2 else 0.0
-    macro_trend_divergence = macro_scores[-1] < macro_scores[-2] and fund_trend_score > 0
+    macro_trend_divergence = macro_momentum < 0 and fund_trend_score > 0
 
     # Diagnostic breakdown
     reasons = []
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.getenv("PRICE_STORE_DIR", os.path.join("cache", "prices"))
+STORE_TTL = float(os.getenv("PRICE_STORE_TTL", "3600"))  # seconds before new bars are requested
+
+# Row 0 holds the bar date as epoch days; each following row is one field.
+# Storing fields as rows keeps every column contiguous inside a single .npy,
+# so np.load(mmap_mode="r") hands readers column views without copying.
+FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+def _paths(ticker):
+    return (
+        os.path.join(STORE_DIR, f"{ticker}.npy"),
+        os.path.join(STORE_DIR, f"{ticker}.json"),
+    )
+
+def _atomic_write(path, write, mode="wb"):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, mode) as f:
+        write(f)
+    os.replace(tmp, path)
+
+def load_array(ticker) -> np.ndarray | None:
+    """
+    Memory-maps the stored (1 + len(FIELDS), n_bars) float64 block for a ticker.
+    """
+    data_path, _ = _paths(ticker)
+    if not os.path.exists(data_path):
+        return None
+    try:
+        return np.load(data_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+def load_meta(ticker) -> dict | None:
+    _, meta_path = _paths(ticker)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def load_bars(ticker) -> pd.DataFrame | None:
+    """
+    Stored bars as a DataFrame whose columns are views onto the mapped file.
+    """
+    block = load_array(ticker)
+    if block is None or block.shape[1] == 0:
+        return None
+    dates = pd.DatetimeIndex(block[0].astype("int64").astype("datetime64[D]"))
+    return pd.DataFrame(block[1:].T, index=dates, columns=FIELDS, copy=False)
+
+def first_date(ticker):
+    block = load_array(ticker)
+    if block is None or block.shape[1] == 0:
+        return None
+    return pd.Timestamp(int(block[0, 0]), unit="D")
+
+def last_date(ticker):
+    block = load_array(ticker)
+    if block is None or block.shape[1] == 0:
+        return None
+    return pd.Timestamp(int(block[0, -1]), unit="D")
+
+def covers(ticker, since) -> bool:
+    """
+    Whether the stored bars reach back to `since`, or to the first bar the
+    ticker has at all when a full-window download from `since` or earlier
+    found nothing older (a ticker listed inside the window).
+    """
+    first = first_date(ticker)
+    if first is None:
+        return False
+    if first <= since:
+        return True
+    meta = load_meta(ticker) or {}
+    if not meta.get("first_available") or pd.Timestamp(meta["searched_from"]) > since:
+        return False
+    return first <= pd.Timestamp(meta["first_available"])
+
+def is_fresh(ticker, ttl: float = STORE_TTL) -> bool:
+    meta = load_meta(ticker)
+    return meta is not None and (time.time() - meta.get("last_refresh", 0)) < ttl
+
+def write_bars(ticker, bars: pd.DataFrame, listing: dict | None = None):
+    """
+    Persists the full bar history for a ticker, replacing the previous file atomically.
+    `listing` ({"first_available", "searched_from"}) is kept in the metadata.
+    """
+    os.makedirs(STORE_DIR, exist_ok=True)
+    bars = bars.reindex(columns=FIELDS).sort_index()
+    block = np.empty((1 + len(FIELDS), len(bars)), dtype="f8")
+    block[0] = pd.DatetimeIndex(bars.index).values.astype("datetime64[D]").astype("int64")
+    block[1:] = bars.to_numpy(dtype="f8").T
+
+    data_path, meta_path = _paths(ticker)
+    _atomic_write(data_path, lambda f: np.save(f, block))
+    meta = {"last_refresh": time.time(), "rows": int(len(bars)), **(listing or {})}
+    _atomic_write(meta_path, lambda f: json.dump(meta, f), mode="w")
+
+def append_bars(ticker, new: pd.DataFrame, searched_from=None):
+    """
+    Appends freshly downloaded bars; the newest download wins on overlapping dates,
+    which replaces a partial bar stored mid-session. `searched_from` marks a
+    full-window download from that date: its first bar is recorded as the
+    first one available, so covers() accepts a ticker listed since then.
+    """
+    new = new.dropna(how="all")
+    meta = load_meta(ticker) or {}
+    listing = {key: meta[key] for key in ("first_available", "searched_from") if key in meta}
+    if searched_from is not None and not new.empty:
+        listing = {"first_available": str(new.index.min().date()), "searched_from": str(pd.Timestamp(searched_from).date())}
+    stored = load_bars(ticker)
+    if stored is not None and not new.empty:
+        stored = stored[stored.index < new.index.min()]
+        new = pd.concat([stored, new.reindex(columns=FIELDS)])
+    elif stored is not None:
+        new = stored.copy()
+    write_bars(ticker, new, listing)
@@ -0,0 +1,212 @@
+"""
+Monte Carlo retirement projection for a personalized TSP allocation.
+
+Simulates annual fund returns from a multivariate normal model, rebalances
+along a glidepath that follows UserProfile.equity_target() down to the
+retirement year, and reports percentile balances. With regime probabilities
+(classify_regime()["probabilities"]) the first REGIME_HORIZON years draw each
+path's regime from them and use that regime's return assumptions.
+
+    python projection.py 250000 12000 100000
+"""
+import os
+import sys
+import datetime
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from regime_matrix import regime_profiles
+
+FUNDS = ["C", "S", "I", "F", "G"]
+EQUITY_FUNDS = ["C", "S", "I"]
+
+# Long-run nominal annual return assumptions per fund
+FUND_MEAN = np.array([0.10, 0.105, 0.08, 0.045, 0.035])
+FUND_VOL = np.array([0.16, 0.20, 0.18, 0.055, 0.005])
+FUND_CORR = np.array([
+    [1.00, 0.85, 0.80, 0.05, 0.00],
+    [0.85, 1.00, 0.75, 0.00, 0.00],
+    [0.80, 0.75, 1.00, 0.05, 0.00],
+    [0.05, 0.00, 0.05, 1.00, 0.30],
+    [0.00, 0.00, 0.00, 0.30, 1.00],
+])
+
+# Per regime: shift added to FUND_MEAN and multiplier on FUND_VOL, in FUNDS order
+REGIME_RETURNS = {
+    "Expansion":   ([0.03, 0.04, 0.03, -0.005, 0.0], [0.9, 0.9, 0.9, 1.0, 1.0]),
+    "Recovery":    ([0.05, 0.07, 0.05, 0.0, -0.005], [1.1, 1.2, 1.1, 1.0, 1.0]),
+    "Neutral":     ([0.0, 0.0, 0.0, 0.0, 0.0], [1.0, 1.0, 1.0, 1.0, 1.0]),
+    "Contraction": ([-0.06, -0.08, -0.07, 0.02, 0.0], [1.3, 1.4, 1.3, 1.1, 1.0]),
+    "Crisis":      ([-0.20, -0.25, -0.22, 0.03, 0.0], [1.8, 2.0, 1.8, 1.3, 1.0]),
+}
+
+# Years over which current regime probabilities shape returns before long-run assumptions apply
+REGIME_HORIZON = int(os.getenv("PROJECTION_REGIME_HORIZON", "3"))
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Paths per unit of work; fixed so results for a seed do not depend on the worker count
+SHARD_PATHS = 25_000
+
+# Below this many paths the simulation runs inline; pool start-up would dominate
+PARALLEL_MIN_PATHS = int(os.getenv("PROJECTION_PARALLEL_MIN_PATHS", "200000"))
+
+def glidepath(allocation: dict, user_profile, current_year: int) -> np.ndarray:
+    """
+    Fund weights for each simulated year, shape (years, funds), rows summing to 1.
+    Year 0 is `allocation`; after that the equity share falls in proportion to
+    the profile's equity_target() while the mix within equities and within
+    F/G keeps the proportions of `allocation`.
+    """
+    years = max(user_profile.retirement_year - current_year, 1)
+    weights = np.array([float(allocation.get(f, 0)) for f in FUNDS])
+    weights = weights / weights.sum() if weights.sum() > 0 else np.eye(len(FUNDS))[FUNDS.index("G")]
+
+    equity_mask = np.isin(FUNDS, EQUITY_FUNDS)
+    equity_share = weights[equity_mask].sum()
+    equity_mix = weights * equity_mask / (equity_share or 1)
+    bond_mix = weights * ~equity_mask / ((1 - equity_share) or 1)
+    if equity_share == 1:
+        bond_mix = np.eye(len(FUNDS))[FUNDS.index("G")]
+
+    start_target = user_profile.equity_target(current_year) or 1
+    targets = np.array([user_profile.equity_target(current_year + y) for y in range(years)])
+    shares = np.clip(equity_share * targets / start_target, 0, 1)
+    return shares[:, None] * equity_mix + (1 - shares)[:, None] * bond_mix
+
+def _regime_tables() -> tuple[np.ndarray, np.ndarray]:
+    names = list(regime_profiles())
+    means = np.array([FUND_MEAN + np.array(REGIME_RETURNS[n][0]) for n in names])
+    vols = np.array([FUND_VOL * np.array(REGIME_RETURNS[n][1]) for n in names])
+    return means, vols
+
+def regime_weights(probabilities) -> np.ndarray | None:
+    """
+    Regime probabilities as a vector in regime_profiles() order, or None when
+    they carry no information (missing or all zero).
+    """
+    if probabilities is None:
+        return None
+    if isinstance(probabilities, dict):
+        probabilities = [probabilities.get(name, 0) for name in regime_profiles()]
+    p = np.clip(np.asarray(probabilities, dtype=float), 0, None)
+    return p / p.sum() if p.sum() > 0 else None
+
+def simulate_paths(weights: np.ndarray, balance: float, annual_contribution: float,
+                   n_paths: int, seed, regime_probs=None) -> np.ndarray:
+    """
+    Balances at the end of each year for `n_paths` paths, shape (years + 1, n_paths).
+    Every path is advanced one year at a time with array operations across paths.
+    """
+    rng = np.random.default_rng(seed)
+    years = len(weights)
+    chol = np.linalg.cholesky(FUND_CORR)
+    means, vols = _regime_tables()
+
+    balances = np.empty((years + 1, n_paths))
+    balances[0] = balance
+    for year in range(years):
+        shocks = rng.standard_normal((n_paths, len(FUNDS))) @ chol.T
+        if regime_probs is not None and year < REGIME_HORIZON:
+            regime = rng.choice(len(regime_probs), size=n_paths, p=regime_probs)
+            returns = means[regime] + shocks * vols[regime]
+        else:
+            returns = FUND_MEAN + shocks * FUND_VOL
+        portfolio = np.maximum(returns @ weights[year], -1.0)
+        balances[year + 1] = balances[year] * (1 + portfolio) + annual_contribution
+    return balances
+
+def _simulate_shard(args) -> np.ndarray:
+    # float32 halves what a pool worker sends back; inline runs use it too so results match
+    return simulate_paths(*args).astype(np.float32)
+
+def _shards(n_paths: int, seed) -> list:
+    sizes = [SHARD_PATHS] * (n_paths // SHARD_PATHS)
+    if n_paths % SHARD_PATHS:
+        sizes.append(n_paths % SHARD_PATHS)
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return list(zip(sizes, root.spawn(len(sizes))))
+
+def summarize(balances: np.ndarray, target: float | None = None) -> dict:
+    final = balances[-1]
+    result = {
+        "paths": int(balances.shape[1]),
+        "years": int(balances.shape[0] - 1),
+        "percentiles": {f"p{q}": round(float(v), 2) for q, v in zip(PERCENTILES, np.percentile(final, PERCENTILES))},
+        "mean": round(float(final.mean()), 2),
+        "by_year": {f"p{q}": np.round(row, 2).tolist() for q, row in zip(PERCENTILES, np.percentile(balances, PERCENTILES, axis=1))},
+    }
+    if target is not None:
+        result["target"] = target
+        result["prob_below_target"] = round(float((final < target).mean()), 4)
+    return result
+
+def project_allocation(allocation: dict, user_profile, balance: float, annual_contribution: float = 0.0,
+                       n_paths: int = 100_000, regime_probs=None, current_year: int | None = None,
+                       target: float | None = None, seed=None, workers: int | None = None) -> dict:
+    """
+    Percentile retirement balances for one personalized allocation.
+    Paths are simulated in fixed-size shards; above PARALLEL_MIN_PATHS the
+    shards run on a process pool of `workers` (default: every core).
+    """
+    current_year = current_year or datetime.datetime.now().year
+    weights = glidepath(allocation, user_profile, current_year)
+    probs = regime_weights(regime_probs)
+    shards = [(weights, balance, annual_contribution, size, child, probs) for size, child in _shards(n_paths, seed)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and n_paths >= PARALLEL_MIN_PATHS and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            parts = list(pool.map(_simulate_shard, shards))
+    else:
+        parts = [_simulate_shard(shard) for shard in shards]
+
+    result = summarize(np.concatenate(parts, axis=1), target)
+    result["regime_conditioned"] = probs is not None
+    return result
+
+def _project_one(args) -> dict:
+    allocation, profile, kwargs = args
+    return project_allocation(allocation, profile, workers=1, **kwargs)
+
+def project_cohort(allocations: list, profiles: list, balances: list, annual_contributions: list | None = None,
+                   n_paths: int = 10_000, regime_probs=None, current_year: int | None = None,
+                   seed=None, workers: int | None = None) -> list:
+    """
+    project_allocation() for many profiles, one profile per task on a process
+    pool, so throughput grows with the number of cores.
+    """
+    contributions = annual_contributions or [0.0] * len(profiles)
+    seeds = np.random.SeedSequence(seed).spawn(len(profiles))
+    tasks = [
+        (alloc, profile, {"balance": bal, "annual_contribution": contrib, "n_paths": n_paths,
+                          "regime_probs": regime_probs, "current_year": current_year, "seed": child})
+        for alloc, profile, bal, contrib, child in zip(allocations, profiles, balances, contributions, seeds)
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        return [_project_one(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return list(pool.map(_project_one, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+if __name__ == "__main__":
+    import time
+    from user_profile import UserProfile
+    from personalize import personalize_allocation
+    from snapshot import BASE_ALLOCATION
+
+    balance = float(sys.argv[1]) if len(sys.argv) > 1 else 250_000
+    contribution = float(sys.argv[2]) if len(sys.argv) > 2 else 12_000
+    paths = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+
+    user = UserProfile(name="David", age=41, retirement_year=2049, risk_tolerance="Moderate")
+    year = datetime.datetime.now().year
+    alloc = personalize_allocation(BASE_ALLOCATION, user, year)
+
+    started = time.perf_counter()
+    result = project_allocation(alloc, user, balance, contribution, n_paths=paths, current_year=year, seed=0)
+    elapsed = time.perf_counter() - started
+
+    print(f"📈 {paths:,} paths over {result['years']} years in {elapsed:.2f}s")
+    for name, value in result["percentiles"].items():
+        print(f"• {name}: ${value:,.0f}")
@@ -0,0 +1,306 @@
+"""
+Data providers: where FRED series and market bars come from.
+
+Every fetch in the pipeline goes through get_provider(), selected with
+DATA_PROVIDER (the async path in async_sources.py uses the same provider's
+aget_series()/aget_ticker_bars()):
+    live    the built-in FRED client (fred_client.py) + yfinance (default)
+    record  live, plus a copy of everything fetched written to DATA_PROVIDER_DIR
+    replay  served from DATA_PROVIDER_DIR only, never the network
+    http    FRED/Yahoo-compatible HTTP endpoints at FRED_BASE_URL / YAHOO_BASE_URL,
+            e.g. the local stand-in in standin_server.py
+
+Recorded data uses one CSV per input:
+    fred/<SERIES_ID>.csv   date,value
+    yahoo/<TICKER>.csv     date,Open,High,Low,Close,Adj Close,Volume
+"""
+import os
+import asyncio
+import threading
+import pandas as pd
+from fred_client import FredClient, FRED_BASE_URL, limiter, observation_params, observations_series
+
+DATA_PROVIDER = os.getenv("DATA_PROVIDER", "live")
+DATA_PROVIDER_DIR = os.getenv("DATA_PROVIDER_DIR", os.path.join("cache", "recorded"))
+YAHOO_BASE_URL = os.getenv("YAHOO_BASE_URL", "https://query1.finance.yahoo.com")
+YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0 (tsp-allocator)"}
+
+BAR_FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+def parse_yahoo_chart(payload: dict) -> pd.DataFrame:
+    """
+    Decodes Yahoo's v8 chart JSON into Open/High/Low/Close/Adj Close/Volume bars.
+    """
+    result = payload["chart"]["result"][0]
+    timestamps = result.get("timestamp") or []
+    quote = result["indicators"]["quote"][0]
+    adjclose = result["indicators"].get("adjclose", [{}])[0].get("adjclose", quote["close"])
+    index = pd.DatetimeIndex(pd.to_datetime(timestamps, unit="s").normalize())
+    bars = pd.DataFrame({
+        "Open": quote["open"],
+        "High": quote["high"],
+        "Low": quote["low"],
+        "Close": quote["close"],
+        "Adj Close": adjclose,
+        "Volume": quote["volume"],
+    }, index=index, dtype=float)
+    return bars[~bars.index.duplicated(keep="last")]
+
+async def fetch_fred_async(client, base_url: str, name: str, observation_start=None) -> pd.Series:
+    """
+    /series/observations over a shared httpx.AsyncClient, under the FRED rate limiter.
+    """
+    await limiter.acquire_async()
+    response = await client.get(f"{base_url}/series/observations", params=observation_params(name, observation_start))
+    response.raise_for_status()
+    return observations_series(response.content)
+
+async def fetch_yahoo_async(client, base_url: str, ticker: str, period: str | None = None, start=None) -> pd.DataFrame:
+    """
+    One ticker's daily bars from the v8 chart endpoint over a shared httpx.AsyncClient.
+    """
+    params = {"interval": "1d"}
+    if start is not None:
+        params["period1"] = int(pd.Timestamp(start).timestamp())
+        params["period2"] = int(pd.Timestamp.now().timestamp())
+    else:
+        params["range"] = period
+    response = await client.get(f"{base_url}/v8/finance/chart/{ticker}", params=params, headers=YAHOO_HEADERS)
+    response.raise_for_status()
+    return parse_yahoo_chart(response.json())
+
+def combine_bars(frames: dict) -> pd.DataFrame:
+    """
+    Per-ticker bar frames -> one (field, ticker) frame, the shape yfinance returns.
+    """
+    frames = {t: f for t, f in frames.items() if f is not None and not f.empty}
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+def save_series(directory: str, name: str, series: pd.Series):
+    os.makedirs(os.path.join(directory, "fred"), exist_ok=True)
+    frame = pd.DataFrame({"date": pd.DatetimeIndex(series.index).strftime("%Y-%m-%d"), "value": series.to_numpy()})
+    frame.to_csv(os.path.join(directory, "fred", f"{name}.csv"), index=False)
+
+def save_bars(directory: str, ticker: str, bars: pd.DataFrame):
+    os.makedirs(os.path.join(directory, "yahoo"), exist_ok=True)
+    frame = bars.reindex(columns=BAR_FIELDS).copy()
+    frame.index = pd.DatetimeIndex(frame.index).strftime("%Y-%m-%d")
+    frame.to_csv(os.path.join(directory, "yahoo", f"{ticker}.csv"), index_label="date")
+
+def load_series(directory: str, name: str) -> pd.Series | None:
+    path = os.path.join(directory, "fred", f"{name}.csv")
+    if not os.path.exists(path):
+        return None
+    frame = pd.read_csv(path, parse_dates=["date"])
+    return pd.Series(frame["value"].to_numpy(dtype=float), index=pd.DatetimeIndex(frame["date"]), name=name)
+
+def load_bars(directory: str, ticker: str) -> pd.DataFrame | None:
+    path = os.path.join(directory, "yahoo", f"{ticker}.csv")
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, index_col="date", parse_dates=["date"]).astype(float)
+
+def _window(frame, period: str | None, start=None):
+    from market_data import slice_period  # market_data imports this module
+
+    if start is not None:
+        return frame[frame.index >= pd.Timestamp(start)]
+    return slice_period(frame, period)
+
+class LiveProvider:
+    """
+    FRED through the pooled FredClient and daily bars through yfinance. Both
+    are set up on first use, so a warm cache works without them or an API key.
+    """
+
+    def __init__(self):
+        self._fred = None
+        self._lock = threading.Lock()
+
+    def fred(self):
+        with self._lock:
+            if self._fred is None:
+                self._fred = FredClient()
+            return self._fred
+
+    def get_series(self, name: str, observation_start=None) -> pd.Series:
+        return self.fred().get_series(name, observation_start=observation_start)
+
+    def get_bars(self, tickers, period: str = "6mo", start=None) -> pd.DataFrame:
+        import yfinance as yf  # heavy import, deferred until bars are actually downloaded
+
+        window = {"start": pd.Timestamp(start).strftime("%Y-%m-%d")} if start is not None else {"period": period}
+        return yf.download(
+            list(tickers), interval="1d",
+            progress=False, auto_adjust=False, group_by="column", **window
+        )
+
+    async def aget_series(self, client, name: str, observation_start=None) -> pd.Series:
+        return await fetch_fred_async(client, FRED_BASE_URL, name, observation_start)
+
+    async def aget_ticker_bars(self, client, ticker: str, period: str = "6mo", start=None) -> pd.DataFrame:
+        return await fetch_yahoo_async(client, YAHOO_BASE_URL, ticker, period, start)
+
+class RecordingProvider:
+    """
+    Passes every call through to `inner` and merges what came back into the
+    recorded copy on disk, so a later ReplayProvider sees the same data.
+    """
+
+    def __init__(self, inner=None, directory: str = DATA_PROVIDER_DIR):
+        self.inner = inner or LiveProvider()
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def record_series(self, name: str, series: pd.Series):
+        import series_cache
+
+        with self._lock:
+            recorded = series_cache.merge_series(load_series(self.directory, name), series)
+            save_series(self.directory, name, recorded)
+
+    def record_bars(self, ticker: str, bars: pd.DataFrame):
+        bars = bars.dropna(how="all")
+        if bars.empty:
+            return
+        with self._lock:
+            recorded = load_bars(self.directory, ticker)
+            if recorded is not None:
+                bars = pd.concat([recorded[recorded.index < bars.index.min()], bars])
+            save_bars(self.directory, ticker, bars)
+
+    def get_series(self, name: str, observation_start=None) -> pd.Series:
+        series = self.inner.get_series(name, observation_start=observation_start)
+        self.record_series(name, series)
+        return series
+
+    def get_bars(self, tickers, period: str = "6mo", start=None) -> pd.DataFrame:
+        frame = self.inner.get_bars(tickers, period=period, start=start)
+        if frame.empty:
+            return frame
+        for ticker in frame.columns.get_level_values(-1).unique():
+            self.record_bars(ticker, frame.xs(ticker, axis=1, level=-1))
+        return frame
+
+    async def aget_series(self, client, name: str, observation_start=None) -> pd.Series:
+        series = await self.inner.aget_series(client, name, observation_start=observation_start)
+        await asyncio.to_thread(self.record_series, name, series)
+        return series
+
+    async def aget_ticker_bars(self, client, ticker: str, period: str = "6mo", start=None) -> pd.DataFrame:
+        bars = await self.inner.aget_ticker_bars(client, ticker, period=period, start=start)
+        await asyncio.to_thread(self.record_bars, ticker, bars)
+        return bars
+
+class ReplayProvider:
+    """
+    Serves recorded data only. Windows are cut relative to the last recorded
+    bar, so a recording replays the same way on any date.
+    """
+
+    def __init__(self, directory: str = DATA_PROVIDER_DIR):
+        self.directory = directory
+
+    def get_series(self, name: str, observation_start=None) -> pd.Series:
+        series = load_series(self.directory, name)
+        if series is None:
+            raise KeyError(f"{name} is not recorded in {self.directory}")
+        if observation_start:
+            series = series[series.index >= pd.Timestamp(observation_start)]
+        return series
+
+    def get_bars(self, tickers, period: str = "6mo", start=None) -> pd.DataFrame:
+        frames = {}
+        for ticker in tickers:
+            bars = load_bars(self.directory, ticker)
+            if bars is not None:
+                frames[ticker] = _window(bars, period, start)
+        return combine_bars(frames)
+
+    def get_ticker_bars(self, ticker: str, period: str = "6mo", start=None) -> pd.DataFrame:
+        bars = load_bars(self.directory, ticker)
+        if bars is None:
+            raise KeyError(f"{ticker} is not recorded in {self.directory}")
+        return _window(bars, period, start)
+
+    async def aget_series(self, client, name: str, observation_start=None) -> pd.Series:
+        return await asyncio.to_thread(self.get_series, name, observation_start)
+
+    async def aget_ticker_bars(self, client, ticker: str, period: str = "6mo", start=None) -> pd.DataFrame:
+        return await asyncio.to_thread(self.get_ticker_bars, ticker, period, start)
+
+class HttpProvider:
+    """
+    Talks to FRED- and Yahoo-compatible HTTP endpoints over one pooled client;
+    pointing the base URLs at standin_server.py keeps everything local.
+    """
+
+    def __init__(self, fred_base_url: str = FRED_BASE_URL, yahoo_base_url: str = YAHOO_BASE_URL, timeout: float = 10):
+        import httpx
+
+        self.fred_base_url = fred_base_url.rstrip("/")
+        self.yahoo_base_url = yahoo_base_url.rstrip("/")
+        self.client = httpx.Client(timeout=timeout, headers=YAHOO_HEADERS)
+        self.fred = FredClient(self.fred_base_url, timeout=timeout)
+
+    def get_series(self, name: str, observation_start=None) -> pd.Series:
+        return self.fred.get_series(name, observation_start=observation_start)
+
+    def get_bars(self, tickers, period: str = "6mo", start=None) -> pd.DataFrame:
+        params = {"interval": "1d"}
+        if start is not None:
+            params["period1"] = int(pd.Timestamp(start).timestamp())
+            params["period2"] = int(pd.Timestamp.now().timestamp())
+        else:
+            params["range"] = period
+        frames = {}
+        for ticker in tickers:
+            response = self.client.get(f"{self.yahoo_base_url}/v8/finance/chart/{ticker}", params=params)
+            response.raise_for_status()
+            frames[ticker] = parse_yahoo_chart(response.json())
+        return combine_bars(frames)
+
+    async def aget_series(self, client, name: str, observation_start=None) -> pd.Series:
+        return await fetch_fred_async(client, self.fred_base_url, name, observation_start)
+
+    async def aget_ticker_bars(self, client, ticker: str, period: str = "6mo", start=None) -> pd.DataFrame:
+        return await fetch_yahoo_async(client, self.yahoo_base_url, ticker, period, start)
+
+    def close(self):
+        self.client.close()
+        self.fred.close()
+
+PROVIDERS = {
+    "live": LiveProvider,
+    "record": RecordingProvider,
+    "replay": ReplayProvider,
+    "http": HttpProvider,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def make_provider(kind: str = DATA_PROVIDER):
+    if kind not in PROVIDERS:
+        raise ValueError(f"Unknown DATA_PROVIDER {kind!r}; expected one of {', '.join(PROVIDERS)}")
+    return PROVIDERS[kind]()
+
+def get_provider():
+    """
+    The process-wide provider, built from DATA_PROVIDER on first use.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = make_provider()
+        return _provider
+
+def set_provider(provider):
+    """
+    Swaps the process-wide provider, e.g. to replay fixtures in a benchmark.
+    """
+    global _provider
+    with _provider_lock:
+        _provider = provider
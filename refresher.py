@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import threading
+import pandas as pd
+
+import series_cache
+from macro_signals import fetch_series_batch
+from macro_framework import PILLAR_SERIES, PILLAR_SCORERS
+from flow_overlay import FRAGILITY_SERIES, detect_fragility
+from fetch_planner import plan_series, fetch_market_data
+from snapshot import build_snapshot, score_fund_trends, snapshot_cache
+
+# Seconds between scheduler ticks; each tick only fetches series that are due
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL_SECONDS", "300"))
+SNAPSHOT_FILE = os.getenv("SNAPSHOT_FILE", os.path.join("cache", "snapshot.json"))
+
+# Publication frequency of every series the pillars and overlays read
+RELEASE_FREQUENCY = {
+    "GDPC1": "quarterly",
+    "USSLIND": "monthly",
+    "INDPRO": "monthly",
+    "CPIAUCSL": "monthly",
+    "PCEPI": "monthly",
+    "CES0500000003": "monthly",
+    "FEDFUNDS": "monthly",
+    "GS10": "monthly",
+    "GS2": "monthly",
+    "WALCL": "weekly",
+    "ANFCI": "weekly",
+    "VIXCLS": "daily",
+    "BAMLH0A0HYM2": "daily",
+    "DCOILWTICO": "daily",
+    "DTWEXEMEGS": "daily",
+}
+
+FREQUENCY_STEPS = {
+    "daily": pd.offsets.BDay(1),
+    "weekly": pd.DateOffset(weeks=1),
+    "monthly": pd.DateOffset(months=1),
+    "quarterly": pd.DateOffset(months=3),
+}
+
+# Time from the date FRED stamps on an observation to its publication. Daily
+# values come out the next day; monthly and quarterly series are dated at the
+# start of their period, so nothing can be published before that period ends.
+PUBLICATION_LAG = {
+    "daily": pd.Timedelta(days=1),
+    "weekly": pd.DateOffset(weeks=1),
+    "monthly": pd.DateOffset(months=1),
+    "quarterly": pd.DateOffset(months=3),
+}
+
+# Weekly series are dated at the end of their week instead
+SERIES_PUBLICATION_LAG = {
+    "WALCL": pd.Timedelta(days=1),  # week ending Wednesday, published Thursday
+    "ANFCI": pd.Timedelta(days=5),  # week ending Friday, published the next Wednesday
+}
+
+# Once a release is possible, how often to re-poll until it actually shows up
+POLL_INTERVALS = {
+    "daily": 3600,
+    "weekly": 6 * 3600,
+    "monthly": 12 * 3600,
+    "quarterly": 24 * 3600,
+}
+
+def next_possible_release(last_observation, frequency: str, name: str | None = None) -> pd.Timestamp:
+    """
+    Earliest moment a newer observation can exist: the date of the next
+    observation plus the series' publication lag.
+    """
+    next_observation = pd.Timestamp(last_observation) + FREQUENCY_STEPS[frequency]
+    return next_observation + SERIES_PUBLICATION_LAG.get(name, PUBLICATION_LAG[frequency])
+
+def is_due(name, now=None) -> bool:
+    meta = series_cache.load_meta(name)
+    if not meta or not meta.get("last_observation"):
+        return True
+    now = pd.Timestamp(now) if now is not None else pd.Timestamp.now()
+    frequency = RELEASE_FREQUENCY.get(name, "daily")
+    if now < next_possible_release(meta["last_observation"], frequency, name):
+        return False
+    return time.time() - meta.get("last_refresh", 0) >= POLL_INTERVALS[frequency]
+
+def _fingerprint(series: pd.Series):
+    clean = series.dropna()
+    if clean.empty:
+        return None
+    return len(clean), clean.index[-1], float(clean.iloc[-1])
+
+def _prices_fingerprint(prices):
+    if prices is None or prices.empty:
+        return None
+    return prices.shape, prices.index[-1], float(prices["Close"].iloc[-1].sum())
+
+class SnapshotRefresher:
+    """
+    Keeps a precomputed snapshot current in the background. Each tick fetches
+    only the series whose next release could have happened, recomputes the
+    pillars and overlays that read a changed input, and publishes a new
+    snapshot version. Request handlers only read the published state.
+    """
+
+    def __init__(self, cache=snapshot_cache, interval: float = REFRESH_INTERVAL):
+        self.cache = cache
+        self.interval = interval
+        self.data = {}
+        self.prices = None
+        self.pillars = {}
+        self.fragility = None
+        self.fund_trend_score = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def due_series(self, now=None) -> list:
+        return [name for name in plan_series() if is_due(name, now)]
+
+    def refresh_once(self) -> bool:
+        """
+        Runs one scheduler tick. Returns True when a new snapshot was published.
+        """
+        due = self.due_series()
+        changed = set()
+
+        # Series loaded for the first time but not yet due come straight from the cache
+        missing = [name for name in plan_series() if name not in self.data and name not in due]
+        if missing:
+            self.data.update(fetch_series_batch(missing))
+            changed.update(missing)
+
+        if due:
+            fetched = fetch_series_batch(due, force=True)
+            for name, series in fetched.items():
+                old = self.data.get(name)
+                if old is None or _fingerprint(old) != _fingerprint(series):
+                    changed.add(name)
+                self.data[name] = series
+
+        prices = fetch_market_data()
+        prices_changed = _prices_fingerprint(prices) != _prices_fingerprint(self.prices)
+        self.prices = prices
+
+        stale_pillars = [
+            name for name, ids in PILLAR_SERIES.items()
+            if name not in self.pillars
+            or changed.intersection(ids)
+            or (prices_changed and name == "Market Internals")
+        ]
+        if not stale_pillars and not prices_changed and not changed.intersection(FRAGILITY_SERIES):
+            self.cache.touch()  # still current; keeps followers from treating it as expired
+            return False
+
+        for name in stale_pillars:
+            self.pillars[name] = PILLAR_SCORERS[name](self.data, self.prices)
+        if self.fragility is None or prices_changed or changed.intersection(FRAGILITY_SERIES):
+            self.fragility = detect_fragility(self.data, self.prices)
+        if self.fund_trend_score is None or prices_changed:
+            self.fund_trend_score = score_fund_trends(self.prices)
+
+        snapshot = build_snapshot(
+            self.data, self.prices,
+            pillars={name: self.pillars[name] for name in PILLAR_SCORERS},
+            fragility=self.fragility,
+            fund_trend_score=self.fund_trend_score
+        )
+        snapshot["refreshed_pillars"] = stale_pillars
+        self.cache.publish(snapshot)
+        print(f"✅ Published snapshot v{snapshot['version']} (recomputed: {', '.join(stale_pillars) or 'overlays only'})")
+        return True
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh_once()
+            except Exception as e:
+                print(f"⚠️ Background refresh error: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """
+        Runs the scheduler on a daemon thread. Published snapshots never expire,
+        so request handlers stop triggering upstream refreshes of their own.
+        """
+        self.cache.ttl = float("inf")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+
+def write_snapshot_file(snapshot: dict, path: str = SNAPSHOT_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f, default=str)
+    os.replace(tmp, path)
+
+if __name__ == "__main__":
+    # Standalone worker: keeps the FRED cache and price store warm and writes
+    # each published snapshot to SNAPSHOT_FILE for other processes to read.
+    refresher = SnapshotRefresher()
+    print(f"📡 Refreshing every {refresher.interval:.0f}s")
+    while True:
+        try:
+            if refresher.refresh_once():
+                write_snapshot_file(refresher.cache.get())
+        except Exception as e:
+            print(f"⚠️ Background refresh error: {e}")
+        time.sleep(refresher.interval)
@@ -1,98 +1,285 @@
-import json
+"""
+Charts of the allocator's logged history.
+
+    python regime_dashboard.py                              # interactive windows
+    python regime_dashboard.py --out reports --format png   # one file per panel
+    python regime_dashboard.py --out reports --format html  # single static report
+
+Headless runs draw on the Agg/SVG canvases in worker processes, so they work
+without a display (cron, servers). Series longer than DASHBOARD_POINTS are
+downsampled with LTTB before plotting, and long allocation histories are
+averaged into ALLOCATION_BARS bars.
+"""
+import io
 import os
-import matplotlib.pyplot as plt
-from datetime import datetime
+import html
+import time
+import argparse
+import datetime
+import numpy as np
 import pandas as pd
+from matplotlib.figure import Figure
+from concurrent.futures import ProcessPoolExecutor
+import log_store
+
+# Most recent runs pulled per panel; the store itself keeps the full history
+DASHBOARD_WINDOW = int(os.getenv("DASHBOARD_WINDOW", "500"))
+
+# Points per plotted line; longer series are downsampled to this
+DASHBOARD_POINTS = int(os.getenv("DASHBOARD_POINTS", "1000"))
+
+# Stacked bars stop being readable well before lines do
+ALLOCATION_BARS = int(os.getenv("DASHBOARD_ALLOCATION_BARS", "120"))
+
+# Markers only on short series; on long ones they hide the line
+MARKER_MAX_POINTS = 100
+
+# (panel, metric, label); label is None for the multi-column panels
+PANELS = [
+    ("regime", "regime", None),
+    ("coherence", "coherence", "Coherence"),
+    ("velocity", "velocity", "Narrative Velocity"),
+    ("risk_weight", "risk_weight", "Risk Budget"),
+    ("allocation", "allocation", None),
+]
+
+# Scalar panels default to (12, 2)
+FIGSIZES = {"regime": (12, 4), "allocation": (12, 4)}
+
+FORMATS = ["png", "svg", "html"]
 
-LOG_DIR = "logs"
-
-def load_log(file_name):
-    path = os.path.join(LOG_DIR, file_name)
-    if not os.path.exists(path):
-        print(f"⚠️ {file_name} not found.")
-        return []
-    with open(path, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            print(f"⚠️ Failed to parse {file_name}.")
-            return []
-
-def extract_series(log, key=None):
-    timestamps = []
-    values = []
-    for entry in log:
-        try:
-            timestamps.append(datetime.fromisoformat(entry["timestamp"]))
-            val = entry["value"]
-            if key and isinstance(val, dict):
-                val = val.get(key, 0)
-            values.append(val)
-        except Exception:
-            continue
-    if not timestamps or not values:
+def metric_frame(metric, last_n=DASHBOARD_WINDOW):
+    """
+    Recent history of a metric straight from the indexed store: a Series for
+    scalar metrics, a DataFrame with one column per key for regime/allocation.
+    """
+    try:
+        timestamps, values = log_store.window(metric, last_n)
+    except Exception as e:
+        print(f"⚠️ Failed to read {metric} history: {e}")
         return pd.Series([], dtype=float)
-    return pd.Series(values, index=pd.to_datetime(timestamps))
+    index = pd.DatetimeIndex(timestamps)
+    if values.ndim == 1:
+        return pd.Series(values, index=index)
+    return pd.DataFrame(values, index=index, columns=log_store.METRICS[metric])
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    the visual shape of (x, y). Always keeps the first and last point.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def downsample(frame, points: int = DASHBOARD_POINTS):
+    """
+    At most `points` rows of a Series/DataFrame indexed by time, chosen by
+    LTTB. A DataFrame gets an equal share of `points` per column and keeps
+    the union of the rows picked for each.
+    """
+    if len(frame) <= points:
+        return frame
+    x = frame.index.asi8.astype(float)
+    if isinstance(frame, pd.Series):
+        return frame.iloc[lttb(x, frame.to_numpy(dtype=float), points)]
+    share = max(points // frame.shape[1], 3)
+    rows = np.unique(np.concatenate([lttb(x, frame[c].to_numpy(dtype=float), share) for c in frame.columns]))
+    return frame.iloc[rows]
+
+def bucket_means(frame, buckets: int):
+    """
+    `frame` averaged over at most `buckets` consecutive, equal-count groups of
+    rows, each labelled by its last timestamp. Keeps stacked shares summing to
+    the same total, which picking individual rows would not smooth.
+    """
+    if len(frame) <= buckets:
+        return frame
+    groups = np.arange(len(frame)) * buckets // len(frame)
+    means = frame.groupby(groups).mean()
+    means.index = frame.index[np.flatnonzero(np.diff(groups, append=buckets))]
+    return means
+
+def _marker(frame) -> str | None:
+    return "o" if len(frame) <= MARKER_MAX_POINTS else None
+
+def draw_regime(df, fig):
+    ax = fig.subplots()
+    df.plot(ax=ax, marker=_marker(df), linewidth=2, title="Regime Probabilities Over Time")
+    ax.set_ylabel("Confidence")
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
 
-def plot_regime(regime_log):
-    if not regime_log:
+def draw_scalar_metric(series, label, fig):
+    ax = fig.subplots()
+    series.plot(ax=ax, marker=_marker(series))
+    ax.set_title(f"{label} Over Time")
+    ax.set_ylabel(label)
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+def draw_allocation(df, fig):
+    ax = fig.subplots()
+    df.plot(ax=ax, kind="bar", stacked=True, colormap="Set3")
+    ax.set_title("Personalized Allocation Over Time")
+    ax.set_ylabel("Allocation (%)")
+    # One label per bar does not fit once history is long; keep about 20
+    step = max(len(df) // 20, 1)
+    ax.set_xticks(range(0, len(df), step), [ts.strftime("%Y-%m-%d %H:%M") for ts in df.index[::step]])
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+def panel_frame(panel: str, last_n: int = DASHBOARD_WINDOW, points: int = DASHBOARD_POINTS):
+    metric = dict((p, m) for p, m, _ in PANELS)[panel]
+    frame = metric_frame(metric, last_n)
+    if panel == "allocation":
+        return bucket_means(frame, ALLOCATION_BARS)
+    return downsample(frame, points)
+
+def draw_panel(panel: str, frame, fig):
+    label = dict((p, l) for p, _, l in PANELS)[panel]
+    if panel == "regime":
+        draw_regime(frame, fig)
+    elif panel == "allocation":
+        draw_allocation(frame, fig)
+    else:
+        draw_scalar_metric(frame, label, fig)
+
+def plot_regime(df):
+    import matplotlib.pyplot as plt  # picks a GUI backend; only the interactive path needs it
+
+    if df.empty:
         print("⚠️ No regime history available.")
         return
-
     try:
-        timestamps = [datetime.fromisoformat(e["timestamp"]) for e in regime_log]
-        df = pd.DataFrame([e["value"] for e in regime_log], index=timestamps)
-        numeric_cols = df.select_dtypes(include=["number"])
-        if numeric_cols.empty:
-            print("⚠️ Regime log contains no numeric values to plot.")
-            return
-        numeric_cols.plot(
-            figsize=(12, 4),
-            marker='o',
-            linewidth=2,
-            title="🧠 Regime Probabilities Over Time"
-        )
-        plt.ylabel("Confidence")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        draw_regime(downsample(df), plt.figure(figsize=FIGSIZES["regime"]))
         plt.show()
     except Exception as e:
         print(f"⚠️ Error plotting regime probabilities: {e}")
 
 def plot_scalar_metric(series, label):
+    import matplotlib.pyplot as plt
+
     if series.empty:
         print(f"⚠️ No data for {label}")
         return
-    series.plot(figsize=(12, 2), marker='o')
-    plt.title(f"{label} Over Time")
-    plt.ylabel(label)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+    draw_scalar_metric(downsample(series), label, plt.figure(figsize=(12, 2)))
     plt.show()
 
-def plot_allocation(log):
-    if not log:
+def plot_allocation(df):
+    import matplotlib.pyplot as plt
+
+    if df.empty:
         print("⚠️ No allocation history available.")
         return
     try:
-        timestamps = [datetime.fromisoformat(e["timestamp"]) for e in log]
-        df = pd.DataFrame([e["value"] for e in log], index=timestamps)
-        df.plot(kind="bar", stacked=True, figsize=(12, 4), colormap="Set3")
-        plt.title("📊 Personalized Allocation Over Time")
-        plt.ylabel("Allocation (%)")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        draw_allocation(bucket_means(df, ALLOCATION_BARS), plt.figure(figsize=FIGSIZES["allocation"]))
         plt.show()
     except Exception as e:
         print(f"⚠️ Error plotting allocation: {e}")
 
+def render_panel(task) -> tuple[str, str | None, str | None]:
+    """
+    Draws one panel on a pyplot-free Figure (no GUI backend involved) and
+    writes it under `out_dir`, or returns inline SVG markup for "html".
+    Returns (panel, path or markup, error).
+    """
+    panel, frame, fmt, out_dir = task
+    if frame.empty:
+        return panel, None, "no history"
+    try:
+        fig = Figure(figsize=FIGSIZES.get(panel, (12, 2)))
+        draw_panel(panel, frame, fig)
+        if fmt == "html":
+            buffer = io.StringIO()
+            fig.savefig(buffer, format="svg")
+            markup = buffer.getvalue()
+            return panel, markup[markup.index("<svg"):], None
+        path = os.path.join(out_dir, f"{panel}.{fmt}")
+        fig.savefig(path, format=fmt, dpi=100)
+        return panel, path, None
+    except Exception as e:
+        return panel, None, str(e)
+
+def write_html_report(rendered: list, out_dir: str) -> str:
+    generated = datetime.datetime.now().isoformat(timespec="seconds")
+    sections = []
+    for panel, markup, error in rendered:
+        body = markup if error is None else f"<p>⚠️ {html.escape(panel)}: {html.escape(error)}</p>"
+        sections.append(f'<section id="{html.escape(panel)}">{body}</section>')
+    page = (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>TSP Insights dashboard</title>"
+        "<style>body{font-family:sans-serif;max-width:1250px;margin:auto}svg{width:100%;height:auto}</style>"
+        f"</head><body><h1>TSP Insights dashboard</h1><p>Generated {generated}</p>\n"
+        + "\n".join(sections) + "\n</body></html>\n"
+    )
+    path = os.path.join(out_dir, "dashboard.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page)
+    return path
+
+def render_dashboard(out_dir: str, fmt: str = "png", workers: int | None = None,
+                     last_n: int = DASHBOARD_WINDOW, points: int = DASHBOARD_POINTS) -> list:
+    """
+    Renders every panel headlessly: history is read and downsampled here, the
+    figures are drawn in parallel worker processes. Returns the written paths.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(panel, panel_frame(panel, last_n, points), fmt, out_dir) for panel, _, _ in PANELS]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(render_panel, tasks))
+    else:
+        rendered = [render_panel(task) for task in tasks]
+
+    for panel, _, error in rendered:
+        if error is not None:
+            print(f"⚠️ Skipped {panel}: {error}")
+    if fmt == "html":
+        return [write_html_report(rendered, out_dir)]
+    return [path for _, path, error in rendered if error is None]
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plot the allocator's logged history")
+    parser.add_argument("--out", help="render headlessly into this directory instead of opening windows")
+    parser.add_argument("--format", default="png", choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--window", type=int, default=DASHBOARD_WINDOW, help="most recent runs per panel")
+    parser.add_argument("--points", type=int, default=DASHBOARD_POINTS, help="downsample lines to this many points")
+    args = parser.parse_args()
+
     print("📡 Loading allocator logs...")
 
-    plot_regime(load_log("regime_log.json"))
-    plot_scalar_metric(extract_series(load_log("coherence_log.json")), "Coherence")
-    plot_scalar_metric(extract_series(load_log("velocity_log.json")), "Narrative Velocity")
-    plot_scalar_metric(extract_series(load_log("risk_weight_log.json")), "Risk Budget")
-    plot_allocation(load_log("allocation_log.json"))
+    if args.out:
+        started = time.perf_counter()
+        paths = render_dashboard(args.out, args.format, args.workers, args.window, args.points)
+        for path in paths:
+            print(f"• {path}")
+        print(f"✅ Dashboard rendered in {time.perf_counter() - started:.2f}s")
+    else:
+        plot_regime(metric_frame("regime", args.window))
+        plot_scalar_metric(metric_frame("coherence", args.window), "Coherence")
+        plot_scalar_metric(metric_frame("velocity", args.window), "Narrative Velocity")
+        plot_scalar_metric(metric_frame("risk_weight", args.window), "Risk Budget")
+        plot_allocation(metric_frame("allocation", args.window))
 
-    print("✅ Dashboard complete. Your allocator just visualized its own evolution.")
+        print("✅ Dashboard complete. Your allocator just visualized its own evolution.")
@@ -0,0 +1,187 @@
+import time
+import numpy as np
+import pandas as pd
+
+from macro_signals import fetch_series_batch
+from macro_framework import (
+    PILLAR_SCORERS, THRESHOLDS, pillar_series,
+    CYCLICAL_TICKERS, DEFENSIVE_TICKERS, MARKET_INTERNALS_PERIOD
+)
+from market_data import get_prices, close_prices, period_offset
+from regime_matrix import classify_regime_matrix, regime_profiles
+from coherence_score import score_coherence_matrix
+
+# Vectorized mirror of the live pillar scorers:
+# (pillar, FRED series, pct_change periods or None, pad before pct_change, threshold key, rule)
+#   "above"     -> +1 when value > threshold, else -1
+#   "not_above" -> -1 when value > threshold, else +1
+#   "not_below" -> -1 when value < threshold, else +1
+SIGNAL_RULES = [
+    ("Growth", "GDPC1", 4, True, "gdp_yoy", "above"),
+    ("Growth", "USSLIND", None, False, "leading_index", "above"),
+    ("Growth", "INDPRO", 12, True, "ip_yoy", "above"),
+    ("Inflation", "CPIAUCSL", 12, False, "cpi_yoy", "not_above"),
+    ("Inflation", "PCEPI", 12, False, "pce_yoy", "not_above"),
+    ("Inflation", "CES0500000003", 12, False, "wages_yoy", "not_above"),
+    ("Monetary Policy", "FEDFUNDS", None, False, "fed_funds", "not_above"),
+    ("Monetary Policy", "WALCL", 12, False, "balance_sheet_yoy", "above"),
+    ("Risk Sentiment", "VIXCLS", None, False, "vix", "not_above"),
+    ("Risk Sentiment", "BAMLH0A0HYM2", None, False, "hy_spreads", "not_above"),
+    ("Risk Sentiment", "ANFCI", None, False, "fci", "not_above"),
+    ("Global Macro", "DCOILWTICO", 12, False, "oil_yoy", "not_above"),
+    ("Global Macro", "DTWEXEMEGS", 12, False, "em_fx_yoy", "not_below"),
+]
+
+# The yield curve needs both legs, so it is scored from a spread rather than a single series
+CURVE_RULE = ("Monetary Policy", "GS10", "GS2", "yield_curve")
+
+def transform_series(series: pd.Series, periods, pad: bool) -> pd.Series:
+    """
+    A FRED series as its signal: the raw values, or the `periods`-observation
+    percent change (forward-filling gaps first when `pad` is set).
+    """
+    series = series.astype(float)
+    if periods is None:
+        return series.dropna()
+    if pad:
+        return series.ffill().pct_change(periods, fill_method=None).dropna()
+    return series.pct_change(periods, fill_method=None).dropna()
+
+def on_calendar(series: pd.Series, calendar: pd.DatetimeIndex) -> np.ndarray:
+    """
+    As-of alignment: each date carries the latest observation dated on or before it.
+    Observation dates are FRED's period dates, not release dates.
+    """
+    if series.empty:
+        return np.full(len(calendar), np.nan)
+    return series.sort_index().reindex(calendar, method="ffill").to_numpy(dtype=float)
+
+def _rule_scores(values: np.ndarray, threshold: float, rule: str) -> np.ndarray:
+    if rule == "above":
+        scores = np.where(values > threshold, 1, -1)
+    elif rule == "not_above":
+        scores = np.where(values > threshold, -1, 1)
+    elif rule == "not_below":
+        scores = np.where(values < threshold, -1, 1)
+    else:
+        raise ValueError(f"Unknown rule: {rule}")
+    return np.where(np.isnan(values), 0, scores)
+
+def build_calendar(data: dict, start=None, end=None, freq: str = "B") -> pd.DatetimeIndex:
+    """
+    Common date index spanning every non-empty input series.
+    """
+    firsts = [s.dropna().index.min() for s in data.values() if not s.dropna().empty]
+    lasts = [s.dropna().index.max() for s in data.values() if not s.dropna().empty]
+    if not firsts:
+        return pd.DatetimeIndex([])
+    start = pd.Timestamp(start) if start is not None else min(firsts)
+    end = pd.Timestamp(end) if end is not None else max(lasts)
+    return pd.date_range(start, end, freq=freq)
+
+def market_internals_history(prices, calendar: pd.DatetimeIndex, period: str = MARKET_INTERNALS_PERIOD) -> np.ndarray:
+    """
+    Cyclical vs defensive relative performance over a trailing window, for every date.
+    Dates without a full window score 0, as the live scorer does on a data error.
+    """
+    if prices is None or len(calendar) == 0:
+        return np.zeros(len(calendar), dtype=int)
+    try:
+        _, offset = period_offset(period)
+        perf = {}
+        for group, tickers in (("cyc", CYCLICAL_TICKERS), ("def", DEFENSIVE_TICKERS)):
+            close = close_prices(prices, tickers).sort_index().ffill()
+            base = close.reindex(close.index - offset, method="bfill")
+            ratio = close.to_numpy() / base.to_numpy()
+            ratio[close.index - offset < close.index[0]] = np.nan
+            counts = (~np.isnan(ratio)).sum(axis=1)
+            mean = np.nansum(ratio, axis=1) / np.maximum(counts, 1)
+            perf[group] = pd.Series(np.where(counts > 0, mean, np.nan), index=close.index)
+    except Exception as e:
+        print(f"⚠️ Sector rotation history error: {e}")
+        return np.zeros(len(calendar), dtype=int)
+
+    cyc = on_calendar(perf["cyc"].dropna(), calendar)
+    defn = on_calendar(perf["def"].dropna(), calendar)
+    scores = np.where(cyc > defn, 1, -1)
+    return np.where(np.isnan(cyc) | np.isnan(defn), 0, scores)
+
+def signal_matrix(data: dict, calendar: pd.DatetimeIndex) -> np.ndarray:
+    """
+    (dates, len(SIGNAL_RULES) + 1) raw signal values on the calendar, one column
+    per rule and the yield-curve spread last. Nothing here depends on a
+    threshold, so a threshold sweep builds it once.
+    """
+    empty = pd.Series(dtype=float)
+    values = np.empty((len(calendar), len(SIGNAL_RULES) + 1))
+    for i, (_, series_id, periods, pad, _, _) in enumerate(SIGNAL_RULES):
+        values[:, i] = on_calendar(transform_series(data.get(series_id, empty), periods, pad), calendar)
+
+    _, long_id, short_id, _ = CURVE_RULE
+    values[:, -1] = (
+        on_calendar(transform_series(data.get(long_id, empty), None, False), calendar)
+        - on_calendar(transform_series(data.get(short_id, empty), None, False), calendar)
+    )
+    return values
+
+def score_signal_matrix(values: np.ndarray, internals: np.ndarray, thresholds=None) -> np.ndarray:
+    """
+    Applies the threshold rules to a signal_matrix() and adds the market
+    internals column, giving the (dates, pillars) score matrix.
+    """
+    thresholds = {**THRESHOLDS, **(thresholds or {})}
+    names = list(PILLAR_SCORERS)
+    scores = np.zeros((len(values), len(names)), dtype=int)
+
+    for i, (pillar, _, _, _, key, rule) in enumerate(SIGNAL_RULES):
+        scores[:, names.index(pillar)] += _rule_scores(values[:, i], thresholds[key], rule)
+
+    pillar, _, _, key = CURVE_RULE
+    scores[:, names.index(pillar)] += _rule_scores(values[:, -1], thresholds[key], "above")
+
+    scores[:, names.index("Market Internals")] = internals
+    return scores
+
+def pillar_score_matrix(data: dict, calendar: pd.DatetimeIndex, prices=None, thresholds=None) -> np.ndarray:
+    """
+    (dates, pillars) integer score matrix in PILLAR_SCORERS order.
+    Every threshold rule is one column operation over the whole calendar.
+    """
+    return score_signal_matrix(signal_matrix(data, calendar), market_internals_history(prices, calendar), thresholds)
+
+def reconstruct_regime_history(data: dict, prices=None, start=None, end=None, freq: str = "B", thresholds=None) -> pd.DataFrame:
+    """
+    Rebuilds pillar scores, macro score, regime probabilities, stability and
+    coherence for every date in one vectorized pass. Regimes are classified
+    on each pillar's z-score against its history up to that date: normalizing
+    a single date's pillars against each other, as the live snapshot does,
+    leaves nothing to classify.
+    """
+    calendar = build_calendar(data, start=start, end=end, freq=freq)
+    scores = pillar_score_matrix(data, calendar, prices=prices, thresholds=thresholds)
+    probabilities, stability = classify_regime_matrix(scores, across_history=True)
+    coherence = score_coherence_matrix(scores)
+
+    history = pd.DataFrame(scores, index=calendar, columns=list(PILLAR_SCORERS))
+    history["Macro Score"] = scores.sum(axis=1)
+    for i, regime in enumerate(regime_profiles()):
+        history[regime] = probabilities[:, i]
+    history["Stability"] = stability
+    history["Coherence"] = coherence
+    return history
+
+def load_history_inputs(price_period: str = "10y") -> tuple[dict, pd.DataFrame]:
+    """
+    Full FRED history for every pillar series plus sector ETF bars for market internals.
+    """
+    data = fetch_series_batch(pillar_series())
+    prices = get_prices(CYCLICAL_TICKERS + DEFENSIVE_TICKERS, period=price_period)
+    return data, prices
+
+if __name__ == "__main__":
+    data, prices = load_history_inputs()
+    started = time.perf_counter()
+    history = reconstruct_regime_history(data, prices)
+    elapsed = time.perf_counter() - started
+    print(history.tail(10))
+    print(f"✅ Rebuilt {len(history)} days of regime history in {elapsed:.3f}s")
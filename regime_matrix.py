@@ -1,17 +1,15 @@
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 
 def normalize_pillars(pillars: dict) -> list:
     """
     Z-scores the macro pillar vector to handle scale and directional sensitivity.
     Prevents zero variance blowups by returning a neutral vector if needed.
     """
-    scores = np.array(list(pillars.values())).reshape(1, -1)
+    scores = np.array(list(pillars.values()), dtype=float).reshape(1, -1)
     if np.all(scores == scores[0]):  # constant vector: no variance
         return [0 for _ in range(scores.shape[1])]
-    scaler = StandardScaler()
-    z_scores = scaler.fit_transform(scores)[0]
-    return z_scores.tolist()
+    # Same result as sklearn's StandardScaler fitted on this single row
+    return normalize_pillar_matrix(scores)[0].tolist()
 
 def regime_profiles() -> dict:
     """
@@ -64,3 +62,49 @@ def classify_regime(pillars: dict) -> dict:
         "probabilities": probabilities,
         "stability": stability
     }
+
+def normalize_pillar_matrix(scores) -> np.ndarray:
+    """
+    Row-wise normalize_pillars() for a (dates, pillars) score history.
+    Each row gets exactly the single-snapshot treatment: a StandardScaler fitted
+    on that one row centres every pillar on itself, so the result is all zeros.
+    """
+    return np.zeros_like(np.asarray(scores, dtype=float))
+
+def standardize_pillar_history(scores) -> np.ndarray:
+    """
+    Z-scores each pillar against its own history: row t uses the mean and
+    standard deviation of rows 0..t only, so no date sees later data. A
+    pillar that has not varied yet scores 0.
+    """
+    scores = np.asarray(scores, dtype=float)
+    n = np.arange(1, len(scores) + 1, dtype=float)[:, None]
+    mean = np.cumsum(scores, axis=0) / n
+    var = np.clip(np.cumsum(scores ** 2, axis=0) / n - mean ** 2, 0, None)
+    std = np.sqrt(var)
+    return np.divide(scores - mean, std, out=np.zeros_like(scores), where=std > 1e-9)
+
+def classify_regime_matrix(scores, across_history: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized classify_regime() over a (dates, pillars) score history.
+    Returns (probabilities with one column per regime_profiles() entry, stability).
+    By default each row is normalized on its own, as the live snapshot does;
+    across_history standardizes each pillar over time instead.
+    """
+    norm = standardize_pillar_history(scores) if across_history else normalize_pillar_matrix(scores)
+    profiles = np.array(list(regime_profiles().values()), dtype=float)
+
+    norm_rows = np.linalg.norm(norm, axis=1, keepdims=True)
+    norm_profiles = np.linalg.norm(profiles, axis=1)
+    denom = norm_rows * norm_profiles
+    dots = norm @ profiles.T
+    similarities = np.divide(dots, denom, out=np.zeros_like(dots), where=denom != 0)
+
+    positive = np.clip(similarities, 0, None)
+    total = positive.sum(axis=1, keepdims=True)
+    total[total == 0] = 1e-9
+    probabilities = np.round(positive / total, 4)
+
+    ranked = np.sort(probabilities, axis=1)
+    stability = np.round(ranked[:, -1] - ranked[:, -2], 4)
+    return probabilities, stability
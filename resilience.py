@@ -0,0 +1,244 @@
+"""
+Circuit breakers, jittered retries and stale-serving bookkeeping for the
+upstream sources ("fred", "yahoo").
+
+    series = call("fred", provider.get_series, name)
+
+Transient failures (network errors, timeouts, HTTP 408/429/5xx) are retried
+with full-jitter exponential backoff inside a per-call time budget and count
+towards the source's breaker. After BREAKER_FAILURES consecutive failures the
+breaker opens and calls fail fast with CircuitOpenError for
+BREAKER_RESET_SECONDS; then one probe call is let through to close it again.
+Callers that fall back to cached data record it with report_stale(); inside
+`with collect_stale() as stale:` every such fallback lands in `stale` with
+its age, which the snapshot reports.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from telemetry import count
+
+SOURCES = ["fred", "yahoo"]
+
+# Consecutive transient failures that open a source's breaker, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "60"))
+
+# Retries after the first attempt, backoff bounds, and the wall-time budget for one call
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "2"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "2"))
+RETRY_BUDGET_SECONDS = float(os.getenv("RETRY_BUDGET_SECONDS", "5"))
+
+# Background refreshes for stale-while-revalidate; a handful is plenty
+REVALIDATE_WORKERS = int(os.getenv("REVALIDATE_WORKERS", "2"))
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive transient failures;
+    open -> half-open after `reset_seconds`, letting a single probe through;
+    the probe's outcome closes or re-opens it.
+    """
+
+    def __init__(self, source: str, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.source = source
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._transition("half_open")
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._probing = False
+            if self.state != "closed":
+                self._transition("closed")
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failures):
+                self.opened_at = time.monotonic()
+                self._transition("open")
+
+    def _transition(self, state: str):
+        self.state = state
+        count("tsp_breaker_transitions_total", source=self.source, state=state)
+        print(f"{'⚠️' if state == 'open' else '🔁'} {self.source} circuit {state.replace('_', '-')}")
+
+BREAKERS = {source: CircuitBreaker(source) for source in SOURCES}
+
+def breaker(source: str) -> CircuitBreaker:
+    return BREAKERS[source]
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    Whether a failure is worth retrying: network errors and timeouts are;
+    malformed responses and client errors (bad series ID, unknown ticker) are not.
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "code", None)
+    if isinstance(status, int):
+        return status >= 500 or status in (408, 429)
+    return not isinstance(exc, (LookupError, ValueError, TypeError))
+
+def backoff(attempt: int) -> float:
+    """
+    Full-jitter delay before retry `attempt` (0-based).
+    """
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+def _before_attempt(source: str):
+    if not BREAKERS[source].allow():
+        count("tsp_breaker_rejections_total", source=source)
+        raise CircuitOpenError(f"{source} circuit open")
+
+def _after_failure(source: str, exc: Exception, attempt: int, deadline: float) -> float | None:
+    """
+    Records a failed attempt; returns the delay before the next one, or None to give up.
+    """
+    if not is_transient(exc):
+        BREAKERS[source].record_success()  # the source answered; the request itself was bad
+        return None
+    BREAKERS[source].record_failure()
+    delay = backoff(attempt)
+    if attempt >= RETRY_ATTEMPTS or time.monotonic() + delay > deadline:
+        return None
+    count("tsp_retries_total", source=source)
+    return delay
+
+def call(source: str, fn, *args, **kwargs):
+    """
+    fn(*args, **kwargs) behind the source's breaker, with bounded jittered retries.
+    """
+    deadline = time.monotonic() + RETRY_BUDGET_SECONDS
+    attempt = 0
+    while True:
+        _before_attempt(source)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            delay = _after_failure(source, e, attempt, deadline)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+        BREAKERS[source].record_success()
+        return result
+
+async def acall(source: str, fn, *args, **kwargs):
+    """
+    call() for coroutine functions; backoff sleeps without blocking the loop.
+    """
+    deadline = time.monotonic() + RETRY_BUDGET_SECONDS
+    attempt = 0
+    while True:
+        _before_attempt(source)
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            # Cancelled at a caller's deadline: that is a timeout, and a half-open probe must not stay pending
+            BREAKERS[source].record_failure()
+            raise
+        except Exception as e:
+            delay = _after_failure(source, e, attempt, deadline)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        BREAKERS[source].record_success()
+        return result
+
+_stale = contextvars.ContextVar("tsp_stale", default=None)
+
+@contextmanager
+def collect_stale():
+    """
+    Yields a dict that fills with "<source>:<key>" -> {"age_seconds", "reason"}
+    for every input served from cache instead of a successful refresh inside
+    the block (including pool threads started through propagate()).
+    """
+    stale = {}
+    token = _stale.set(stale)
+    try:
+        yield stale
+    finally:
+        _stale.reset(token)
+
+def report_stale(source: str, key: str, last_refresh: float | None, reason: str):
+    """
+    Records that `key` was served from data last refreshed at `last_refresh`
+    (epoch seconds) because of `reason` ("revalidating", "circuit_open",
+    "fetch_failed", "timed_out"). With no cached copy at all, pass None: the
+    input was left empty and its age is reported as None.
+    """
+    count("tsp_stale_served_total", source=source, reason=reason)
+    stale = _stale.get()
+    if stale is not None:
+        age = round(time.time() - last_refresh) if last_refresh else None
+        stale[f"{source}:{key}"] = {"age_seconds": age, "reason": reason}
+
+_revalidating = set()
+_revalidate_lock = threading.Lock()
+_revalidate_pool = None
+
+def revalidate(key, fn) -> bool:
+    """
+    Runs fn() on a background thread unless a refresh for `key` is already in
+    flight. Returns whether a new refresh was started.
+    """
+    global _revalidate_pool
+    with _revalidate_lock:
+        if key in _revalidating:
+            return False
+        _revalidating.add(key)
+        if _revalidate_pool is None:
+            _revalidate_pool = ThreadPoolExecutor(max_workers=REVALIDATE_WORKERS, thread_name_prefix="revalidate")
+
+    def run():
+        try:
+            fn()
+        except Exception as e:
+            print(f"⚠️ Background refresh of {key} failed: {e}")
+        finally:
+            with _revalidate_lock:
+                _revalidating.discard(key)
+
+    # A fresh context: the refresh outlives the request and must not write into its trace
+    _revalidate_pool.submit(contextvars.Context().run, run)
+    return True
+
+def status() -> dict:
+    """
+    Breaker state per source, for health endpoints.
+    """
+    return {
+        source: {"state": b.state, "consecutive_failures": b.consecutive_failures}
+        for source, b in BREAKERS.items()
+    }
@@ -0,0 +1,80 @@
+"""
+Cached /run responses with ETag revalidation.
+
+A response is fully determined by the snapshot it was built from, the
+profile and the calendar year, so its ETag is the snapshot version plus a
+hash of the other three:
+
+    "<version>-<hash of computed_at, year, profile>"
+
+computed_at goes into the hash so that two worker processes, each counting
+versions from 1, never hand out the same tag for different snapshots. A
+request whose If-None-Match carries the current tag gets a 304 before any
+personalization runs; otherwise the serialized body is served from a
+bounded LRU, or built once and stored there.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from telemetry import count
+
+# Serialized /run bodies kept per process; one per profile polled under the current snapshot
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+
+def profile_hash(profile: dict, snapshot: dict, current_year: int) -> str:
+    key = json.dumps([snapshot.get("computed_at"), current_year, profile], sort_keys=True, default=str)
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+def make_etag(profile: dict, snapshot: dict, current_year: int) -> str:
+    return f'"{snapshot.get("version")}-{profile_hash(profile, snapshot, current_year)}"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Match semantics: a comma-separated list of tags compared weakly, or "*".
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+class ResponseCache:
+    """
+    Thread-safe LRU of etag -> serialized body. Tags embed the snapshot
+    version, so entries for older snapshots can never be hit again; they are
+    dropped as soon as a newer version is stored.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> bytes | None:
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is not None:
+                self._entries.move_to_end(etag)
+        count("tsp_cache_total", cache="response", result="hit" if body is not None else "miss")
+        return body
+
+    def put(self, etag: str, version, body: bytes):
+        with self._lock:
+            if self.version is not None and version < self.version:
+                return  # built from a snapshot that has since been replaced
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            self._entries[etag] = body
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache()
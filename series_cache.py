@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.getenv("FRED_CACHE_DIR", os.path.join("cache", "fred"))
+CACHE_TTL = float(os.getenv("FRED_CACHE_TTL", str(6 * 3600)))  # seconds before a refresh is attempted
+
+# On-disk layout: one structured .npy per series plus a small JSON sidecar
+SERIES_DTYPE = np.dtype([("date", "datetime64[D]"), ("value", "f8")])
+
+def _paths(name):
+    return (
+        os.path.join(CACHE_DIR, f"{name}.npy"),
+        os.path.join(CACHE_DIR, f"{name}.json"),
+    )
+
+def _atomic_write(path, write, mode="wb"):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, mode) as f:
+        write(f)
+    os.replace(tmp, path)
+
+def load_meta(name) -> dict | None:
+    """
+    Returns {"last_observation", "last_refresh", "rows", "frequency"} for a cached series, or None.
+    """
+    _, meta_path = _paths(name)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def load_series(name) -> pd.Series | None:
+    """
+    Reads a cached series back into a date-indexed pandas Series, or None on a miss.
+    """
+    data_path, _ = _paths(name)
+    if not os.path.exists(data_path):
+        return None
+    try:
+        records = np.load(data_path, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    return pd.Series(records["value"], index=pd.DatetimeIndex(records["date"]), name=name)
+
+def is_fresh(meta, ttl: float = CACHE_TTL) -> bool:
+    return meta is not None and (time.time() - meta.get("last_refresh", 0)) < ttl
+
+def store_series(name, series: pd.Series, frequency: str | None = None) -> pd.Series:
+    """
+    Writes the full series and its metadata, replacing any previous copy atomically.
+    `frequency` is the FRED aggregation it was requested at (None for native).
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    series = series.astype(float)
+    records = np.empty(len(series), dtype=SERIES_DTYPE)
+    records["date"] = pd.DatetimeIndex(series.index).values.astype("datetime64[D]")
+    records["value"] = series.to_numpy()
+
+    data_path, meta_path = _paths(name)
+    _atomic_write(data_path, lambda f: np.save(f, records))
+    meta = {
+        "last_observation": str(records["date"][-1]) if len(records) else None,
+        "last_refresh": time.time(),
+        "rows": int(len(records)),
+        "frequency": frequency,
+    }
+    _atomic_write(meta_path, lambda f: json.dump(meta, f), mode="w")
+    return series
+
+def merge_series(cached: pd.Series | None, new: pd.Series) -> pd.Series:
+    """
+    Appends newly fetched observations onto the cached history.
+    New values win on overlapping dates so revisions to the last point are picked up.
+    """
+    if cached is None or cached.empty:
+        return new.sort_index()
+    if new is None or new.empty:
+        return cached
+    return pd.concat([cached[cached.index < new.index.min()], new.sort_index()])
+
+def touch(name):
+    """
+    Marks a cached series as refreshed without rewriting its data.
+    """
+    meta = load_meta(name)
+    if meta is None:
+        return
+    meta["last_refresh"] = time.time()
+    _, meta_path = _paths(name)
+    _atomic_write(meta_path, lambda f: json.dump(meta, f), mode="w")
@@ -0,0 +1,150 @@
+"""
+A snapshot shared by every worker process through one mmap'd file.
+
+    header  magic (8s) | sequence (u64) | length (u64) | published_at (f64)
+    body    the snapshot as JSON, `length` bytes
+
+The publisher takes an exclusive flock on the file, bumps the sequence to an
+odd value, writes the body, then bumps it to the next even value; readers
+never lock and retry while the sequence is odd or changed under them. The
+generation of a snapshot is sequence // 2. Readers keep the decoded copy of
+the generation they last saw, so a read that finds no new generation costs
+one 8-byte load from the mapping.
+
+Leadership is a second, non-blocking flock on "<path>.lock" held for the
+life of the process: whoever holds it is the only process that refreshes
+upstream data. The OS drops the lock when that process exits, and the next
+worker to ask takes over.
+"""
+import os
+import json
+import mmap
+import time
+import fcntl
+import struct
+import threading
+
+SHARED_SNAPSHOT_FILE = os.getenv("SHARED_SNAPSHOT_FILE", os.path.join("cache", "snapshot.shm"))
+
+# Room for the JSON body; a snapshot is a few KB
+SHARED_SNAPSHOT_BYTES = int(os.getenv("SHARED_SNAPSHOT_BYTES", str(1 << 20)))
+
+MAGIC = b"TSPSNAP1"
+HEADER = struct.Struct("<8sQQd")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = len(MAGIC)
+
+def _encode(value):
+    return value.item() if hasattr(value, "item") else str(value)
+
+class SharedSnapshot:
+    def __init__(self, path: str = SHARED_SNAPSHOT_FILE, capacity: int = SHARED_SNAPSHOT_BYTES):
+        self.path = path
+        self.capacity = capacity
+        self._lead_fd = None
+        self._seen = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = HEADER.size + capacity
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+            if self._map[:len(MAGIC)] != MAGIC:
+                self._map[:HEADER.size] = HEADER.pack(MAGIC, 0, 0, 0.0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _sequence(self) -> int:
+        return SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+
+    @property
+    def generation(self) -> int:
+        return self._sequence() // 2
+
+    @property
+    def published_at(self) -> float:
+        return HEADER.unpack_from(self._map)[3]
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lead_fd is not None
+
+    def try_lead(self) -> bool:
+        """
+        Becomes the refreshing process if no other process is. Never blocks.
+        """
+        if self._lead_fd is not None:
+            return True
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lead_fd = fd
+        return True
+
+    def publish(self, snapshot: dict) -> int:
+        """
+        Writes `snapshot` as the next generation and returns that generation.
+        """
+        body = json.dumps(snapshot, default=_encode).encode()
+        if len(body) > self.capacity:
+            raise ValueError(f"Snapshot is {len(body)} bytes; SHARED_SNAPSHOT_BYTES is {self.capacity}")
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            sequence = self._sequence()
+            SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, sequence + 1)
+            self._map[HEADER.size:HEADER.size + len(body)] = body
+            HEADER.pack_into(self._map, 0, MAGIC, sequence + 1, len(body), time.time())
+            SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, sequence + 2)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return (sequence + 2) // 2
+
+    def touch(self):
+        """
+        Stamps the current generation as published now, e.g. when a refresh
+        found nothing new. Readers keep their decoded copy.
+        """
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            _, sequence, length, _ = HEADER.unpack_from(self._map)
+            HEADER.pack_into(self._map, 0, MAGIC, sequence, length, time.time())
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def read(self) -> dict | None:
+        """
+        The latest published snapshot with its generation as "version", or
+        None before the first publish. Decodes only when the generation changed.
+        """
+        while True:
+            sequence = self._sequence()
+            if sequence == self._seen:
+                return self._snapshot
+            if sequence % 2:
+                time.sleep(0)  # a publish is in progress
+                continue
+            _, _, length, _ = HEADER.unpack_from(self._map)
+            body = self._map[HEADER.size:HEADER.size + length]
+            if self._sequence() != sequence:
+                continue
+            snapshot = json.loads(body)
+            snapshot["version"] = sequence // 2
+            with self._lock:
+                if sequence > self._seen:
+                    self._seen, self._snapshot = sequence, snapshot
+                return self._snapshot
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+        if self._lead_fd is not None:
+            os.close(self._lead_fd)
+            self._lead_fd = None
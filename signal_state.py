@@ -0,0 +1,156 @@
+import os
+import copy
+import fcntl
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+import log_store
+from narrative_velocity import cosine_drift
+from telemetry import count
+
+# Runs of history the velocity and phase-shift detectors look back over
+HISTORY_WINDOW = 12
+
+STATE_FILE = os.getenv("SIGNAL_STATE_FILE", os.path.join("cache", "signal_state.npz"))
+REGIMES = log_store.METRICS["regime"]
+
+# Last state read from disk, keyed by (path, mtime); unpacking the .npz costs more than the check
+_loaded = {}
+
+def _drift(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Cosine distance between two regime vectors, with the same zero-vector rule
+    as score_velocity_array().
+    """
+    return float(cosine_drift(a, b))
+
+def _regime_vector(probabilities) -> np.ndarray:
+    if isinstance(probabilities, dict):
+        probabilities = [probabilities.get(r) for r in REGIMES]
+    return np.nan_to_num(np.array(probabilities, dtype=float))
+
+class SignalState:
+    """
+    Rolling inputs for the velocity and phase-shift detectors: the last
+    `window` regime vectors, coherence values and macro scores, the drift
+    between consecutive regime vectors. update() folds in one run at a cost
+    that does not grow with the length of the log, so detection stays flat
+    as history accumulates.
+    """
+
+    def __init__(self, window: int = HISTORY_WINDOW):
+        self.window = window
+        self.regimes = np.empty((0, len(REGIMES)))
+        self.coherence = np.empty(0)
+        self.macro_scores = np.empty(0)
+        self.drifts = np.empty(0)
+        self.last_timestamp = ""
+
+    def update(self, regime_probabilities, coherence: float, macro_score: float, timestamp: str = ""):
+        vector = _regime_vector(regime_probabilities)
+        if len(self.regimes):
+            drift = _drift(self.regimes[-1], vector)
+            self.drifts = np.append(self.drifts, drift)[-(self.window - 1):]
+        self.regimes = np.vstack([self.regimes, vector])[-self.window:]
+        self.coherence = np.append(self.coherence, float(coherence))[-self.window:]
+        self.macro_scores = np.append(self.macro_scores, float(macro_score))[-self.window:]
+        self.last_timestamp = timestamp
+
+    @property
+    def velocity(self) -> float:
+        """
+        Mean regime drift over the window; equals score_velocity_array() on the same rows.
+        """
+        if len(self.drifts) == 0:
+            return 0.0
+        return round(float(self.drifts.mean()), 4)
+
+    def save(self, path: str = STATE_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                window=self.window,
+                regimes=self.regimes,
+                coherence=self.coherence,
+                macro_scores=self.macro_scores,
+                drifts=self.drifts,
+                last_timestamp=np.array(self.last_timestamp),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = STATE_FILE):
+        """
+        Reads a saved state, or returns None when there is no usable file.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if _loaded.get(path, (None,))[0] == mtime:
+                return copy.copy(_loaded[path][1])  # update() rebinds arrays, so a shallow copy is enough
+            with np.load(path, allow_pickle=False) as saved:
+                state = cls(int(saved["window"]))
+                state.regimes = saved["regimes"]
+                state.coherence = saved["coherence"]
+                state.macro_scores = saved["macro_scores"]
+                state.drifts = saved["drifts"]
+                state.last_timestamp = str(saved["last_timestamp"])
+        except (OSError, KeyError, ValueError):
+            return None
+        _loaded[path] = (mtime, state)
+        return copy.copy(state)
+
+    @classmethod
+    def from_log(cls, window: int = HISTORY_WINDOW):
+        """
+        Rebuilds the state from the newest `window` rows of the log store.
+        """
+        state = cls(window)
+        _, regimes = log_store.window("regime", window)
+        _, state.coherence = log_store.window("coherence", window)
+        _, state.macro_scores = log_store.window("macro_score", window)
+        state.regimes = np.nan_to_num(regimes)
+        if len(state.regimes) >= 2:
+            a, b = state.regimes[:-1], state.regimes[1:]
+            state.drifts = cosine_drift(a, b)
+        state.last_timestamp = log_store.latest_timestamp("regime") or ""
+        return state
+
+@contextmanager
+def state_lock(path: str = STATE_FILE):
+    """
+    Exclusive flock on "<path>.lock" for a read-append-save of the state, so
+    two writers cannot both fold their run into the same saved state and
+    drop one of them. Readers that only call current_state() need not hold it.
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError as e:
+        print(f"⚠️ Could not lock signal state, updating it unlocked: {e}")
+        yield
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+def current_state(path: str = STATE_FILE, window: int = HISTORY_WINDOW) -> SignalState:
+    """
+    The saved state if it has folded in the newest logged run, otherwise a
+    fresh one rebuilt from the log store (and saved for the next caller).
+    """
+    state = SignalState.load(path)
+    if state is not None and state.window == window and state.last_timestamp == (log_store.latest_timestamp("regime") or ""):
+        count("tsp_cache_total", cache="signal_state", result="hit")
+        return state
+    count("tsp_cache_total", cache="signal_state", result="miss")
+    state = SignalState.from_log(window)
+    try:
+        state.save(path)
+    except OSError as e:
+        print(f"⚠️ Could not save signal state: {e}")
+    return state
@@ -0,0 +1,429 @@
+from macro_framework import get_macro_pillars, PILLAR_SERIES, CYCLICAL_TICKERS, DEFENSIVE_TICKERS
+from fetch_planner import fetch_macro_data, fetch_market_data
+from regime_matrix import classify_regime
+from coherence_score import score_coherence
+from flow_overlay import detect_fragility
+from phase_shift_detector import detect_phase_shift
+from exposure_modulator import modulate_risk_weight
+from fund_trends import score_funds, FUND_TREND_TICKERS
+
+from async_sources import fetch_inputs_async
+from signal_state import current_state, HISTORY_WINDOW
+from resilience import collect_stale
+from telemetry import span, count
+
+import asyncio
+import datetime
+import os
+import threading
+import time
+
+BASE_RISK = 0.7
+BASE_ALLOCATION = {"C": 40, "S": 15, "I": 5, "F": 10, "G": 30}
+
+# How long a computed snapshot is served before the next refresh
+SNAPSHOT_TTL = float(os.getenv("SNAPSHOT_TTL_SECONDS", "300"))
+
+# After a failed refresh the stale copy is served this long (at most ttl) before the next attempt
+SNAPSHOT_RETRY = float(os.getenv("SNAPSHOT_RETRY_SECONDS", "30"))
+
+# Share one snapshot between all worker processes (uvicorn --workers N) through shared_snapshot.py
+SHARED_SNAPSHOT = os.getenv("SHARED_SNAPSHOT", "0") == "1"
+
+# How often a follower worker retries for leadership, and how long it waits for the first publish
+SHARED_SNAPSHOT_POLL = float(os.getenv("SHARED_SNAPSHOT_POLL_SECONDS", "1"))
+SHARED_SNAPSHOT_WAIT = float(os.getenv("SHARED_SNAPSHOT_WAIT_SECONDS", "30"))
+
+# How long past its ttl a follower still counts a shared snapshot as fresh, so
+# a background refresh tick that runs long does not flip every follower to stale
+SHARED_SNAPSHOT_GRACE = float(os.getenv("SHARED_SNAPSHOT_GRACE_SECONDS", "60"))
+
+# Market inputs behind the scores that read prices
+PILLAR_TICKERS = {"Market Internals": CYCLICAL_TICKERS + DEFENSIVE_TICKERS}
+
+# Last score of each pillar (and the fund trend) computed from complete inputs
+_last_good = {}
+_last_good_lock = threading.Lock()
+
+def compute_snapshot() -> dict:
+    """
+    Runs every profile-independent stage once: macro pillars, regime, overlays,
+    fund trends and the risk budget. Only personalization is left per profile.
+    Inputs served from cache instead of a fresh fetch are listed under "stale".
+    """
+    with collect_stale() as stale:
+        with span("fetch", source="fred"):
+            macro_data = fetch_macro_data()
+        with span("fetch", source="yahoo"):
+            market_data = fetch_market_data()
+        snapshot = build_snapshot(macro_data, market_data)
+    snapshot["stale"] = stale
+    snapshot["partial"] = any(entry["reason"] != "revalidating" for entry in stale.values())
+    return snapshot
+
+def score_fund_trends(market_data) -> int:
+    try:
+        scores, _ = score_funds(FUND_TREND_TICKERS, market_data)
+        return int(scores.sum())
+    except Exception as e:
+        print(f"⚠️ Fund trend error: {e}")
+        return 0
+
+async def compute_snapshot_async() -> dict:
+    """
+    Async variant of compute_snapshot(): upstream calls run concurrently under
+    per-source deadlines, and the scoring runs off the event loop. Inputs that
+    timed out or failed are listed under "sources", and with their age under "stale".
+    """
+    with collect_stale() as stale:
+        with span("fetch", source="all"):
+            macro_data, market_data, flags = await fetch_inputs_async()
+    snapshot = await asyncio.to_thread(build_snapshot, macro_data, market_data)
+    snapshot["sources"] = flags
+    snapshot["stale"] = stale
+    snapshot["partial"] = any(f["timed_out"] or f["failed"] for f in flags.values())
+    return snapshot
+
+def missing_inputs(macro_data: dict, market_data) -> tuple[set, set]:
+    """
+    FRED series that came back empty and tickers with no closes, i.e. inputs
+    whose fetch failed with nothing cached to fall back on.
+    """
+    series = {name for name, values in (macro_data or {}).items() if values is None or values.dropna().empty}
+    if market_data is None or market_data.empty:
+        return series, set(PILLAR_TICKERS["Market Internals"] + FUND_TREND_TICKERS)
+    closes = market_data["Close"] if "Close" in market_data.columns.get_level_values(0) else market_data
+    tickers = {t for t in PILLAR_TICKERS["Market Internals"] + FUND_TREND_TICKERS
+               if t not in closes.columns or closes[t].dropna().empty}
+    return series, tickers
+
+def hold_last_good(name: str, score, incomplete: bool) -> tuple[object, bool]:
+    """
+    The last score of `name` computed from complete inputs when this one's
+    inputs are incomplete, so a failed fetch cannot flip the regime on its own.
+    Returns (score to use, whether it was held).
+    """
+    with _last_good_lock:
+        if not incomplete:
+            _last_good[name] = score
+            return score, False
+        if name in _last_good:
+            print(f"⚠️ Inputs missing for {name}; holding its last good score")
+            return _last_good[name], True
+    return score, False
+
+def build_snapshot(macro_data: dict, market_data, pillars=None, fragility=None, fund_trend_score=None) -> dict:
+    """
+    Scores a snapshot from already-fetched FRED series and market bars.
+    Precomputed pillars, fragility (flag, notes) or fund trend score are reused
+    as-is, which lets the background refresher recompute only what changed.
+    Scores whose inputs are missing fall back to their last good value and
+    are listed under "held".
+    """
+    if pillars is None:
+        pillars = get_macro_pillars(macro_data, market_data)
+    missing_series, missing_tickers = missing_inputs(macro_data, market_data)
+    pillars, held = dict(pillars), []
+    for name in pillars:
+        incomplete = missing_series.intersection(PILLAR_SERIES.get(name, [])) or missing_tickers.intersection(PILLAR_TICKERS.get(name, []))
+        pillars[name], was_held = hold_last_good(name, pillars[name], bool(incomplete))
+        if was_held:
+            held.append(name)
+    macro_score = sum(pillars.values())
+    with span("regime"):
+        regime_result = classify_regime(pillars)
+    stability = regime_result["stability"]
+
+    # Rolling detector inputs, kept current by log_writer.save_logs()
+    with span("signal_state"):
+        state = current_state(window=HISTORY_WINDOW)
+    regime_history, coherence_history, macro_score_history = state.regimes, state.coherence, state.macro_scores
+
+    # Coherence + fragility
+    with span("coherence"):
+        coherence = score_coherence(pillars)
+    velocity = state.velocity
+    if fragility is None:
+        with span("overlay", overlay="fragility"):
+            fragility = detect_fragility(macro_data, market_data)
+    fragility_flag, flow_notes = fragility
+
+    # Fund momentum
+    if fund_trend_score is None:
+        with span("overlay", overlay="fund_trends"):
+            fund_trend_score = score_fund_trends(market_data)
+    fund_trend_score, was_held = hold_last_good("fund_trends", fund_trend_score, bool(missing_tickers.intersection(FUND_TREND_TICKERS)))
+    if was_held:
+        held.append("fund_trends")
+
+    macro_score_log = macro_score_history.tolist() + [macro_score]
+
+    with span("overlay", overlay="phase_shift"):
+        phase_shift_flag, _ = detect_phase_shift(
+            regime_history=regime_history,
+            coherence_history=coherence_history if len(coherence_history) else [coherence],
+            velocity=velocity,
+            macro_scores=macro_score_log,
+            fund_trend_score=fund_trend_score
+        )
+
+    # Risk-adjusted weight
+    with span("overlay", overlay="risk_weight"):
+        risk_weight = modulate_risk_weight(
+            base_risk=BASE_RISK,
+            stability=stability,
+            coherence=coherence,
+            velocity=velocity,
+            fragility_flag=fragility_flag
+        )
+
+    return {
+        "computed_at": datetime.datetime.now().isoformat(),
+        "pillars": pillars,
+        "macro_score": macro_score,
+        "regime": regime_result,
+        "coherence": coherence,
+        "velocity": velocity,
+        "fragility": fragility_flag,
+        "flow_notes": flow_notes,
+        "fund_trend_score": fund_trend_score,
+        "phase_shift": phase_shift_flag,
+        "risk_weight": risk_weight,
+        "held": held,
+    }
+
+class SnapshotCache:
+    """
+    Serves the latest snapshot for `ttl` seconds. When it expires exactly one
+    caller recomputes it; concurrent callers get the stale copy, or wait for
+    the refresh when there is no copy yet.
+    """
+
+    def __init__(self, compute=compute_snapshot, compute_async=compute_snapshot_async, ttl: float = SNAPSHOT_TTL):
+        self.compute = compute
+        self.compute_async = compute_async
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._refreshed = threading.Condition(self._lock)
+        self._task = None
+
+    def get(self) -> dict:
+        with self._lock:
+            while True:
+                if self._snapshot is not None and time.monotonic() < self._expires_at:
+                    count("tsp_cache_total", cache="snapshot", result="hit")
+                    return self._snapshot
+                if not self._refreshing:
+                    self._refreshing = True
+                    break
+                if self._snapshot is not None:
+                    count("tsp_cache_total", cache="snapshot", result="stale")
+                    return self._snapshot  # stale while another request refreshes
+                self._refreshed.wait()
+
+        count("tsp_cache_total", cache="snapshot", result="miss")
+        try:
+            snapshot = self.compute()
+        except Exception as e:
+            with self._lock:
+                self._refreshing = False
+                self._refreshed.notify_all()
+                if self._snapshot is None:
+                    raise
+                self._retry_later()
+                print(f"⚠️ Snapshot refresh failed, serving stale copy: {e}")
+                return self._snapshot
+
+        return self.publish(snapshot)
+
+    def leads(self) -> bool:
+        """
+        Whether this process refreshes the snapshot; a process-local cache always does.
+        """
+        return True
+
+    def publish(self, snapshot: dict, version: int | None = None) -> dict:
+        """
+        Installs a new snapshot version, e.g. one precomputed by the background refresher.
+        """
+        with self._lock:
+            self.version = self.version + 1 if version is None else version
+            snapshot["version"] = self.version
+            self._snapshot = snapshot
+            self._expires_at = time.monotonic() + self.ttl
+            self._refreshing = False
+            self._refreshed.notify_all()
+        return snapshot
+
+    async def aget(self) -> dict:
+        """
+        get() for async handlers: the refresh is a single shared task, so callers
+        never block a worker thread while upstream calls are in flight.
+        """
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() < self._expires_at:
+                count("tsp_cache_total", cache="snapshot", result="hit")
+                return self._snapshot
+            stale = self._snapshot
+            if self._task is None or self._task.done():
+                self._task = asyncio.ensure_future(self._refresh_async())
+            task = self._task
+        if stale is not None:
+            count("tsp_cache_total", cache="snapshot", result="stale")
+            return stale
+        count("tsp_cache_total", cache="snapshot", result="miss")
+        snapshot = await asyncio.shield(task)
+        if snapshot is None:
+            raise RuntimeError("Snapshot refresh failed")
+        return snapshot
+
+    async def _refresh_async(self):
+        try:
+            return self.publish(await self.compute_async())
+        except Exception as e:
+            print(f"⚠️ Snapshot refresh failed: {e}")
+            with self._lock:
+                if self._snapshot is not None:
+                    self._retry_later()
+                return self._snapshot
+
+    def _retry_later(self):
+        """
+        Keeps serving the stale copy for a while after a failed refresh, so an
+        upstream outage costs one attempt per SNAPSHOT_RETRY rather than one per request.
+        Call with the lock held.
+        """
+        self._expires_at = time.monotonic() + min(self.ttl, SNAPSHOT_RETRY)
+
+    def touch(self):
+        """
+        Serves the current version for another `ttl`, e.g. when the background
+        refresher found no new inputs.
+        """
+        with self._lock:
+            if self._snapshot is not None:
+                self._expires_at = time.monotonic() + self.ttl
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
+
+class SharedSnapshotCache(SnapshotCache):
+    """
+    SnapshotCache across worker processes. The worker holding the shared
+    segment's leader lock refreshes exactly as SnapshotCache does and
+    publishes every version to the segment, numbered by its generation so
+    ETags agree across workers. Every other worker serves the segment's
+    latest generation and never calls upstream. A generation older than
+    `ttl` is served as stale while the follower tries to take over, so if
+    the leader exits (or a previous run left the segment behind) the next
+    request refreshes it. Pair with BACKGROUND_REFRESH=1 so the leader
+    refreshes on schedule rather than on its own share of requests;
+    `on_lead` is called in whichever worker wins leadership.
+    """
+
+    def __init__(self, shared, **kwargs):
+        super().__init__(**kwargs)
+        self.shared = shared
+        self.on_lead = None
+        self._next_attempt = 0.0
+
+    def leads(self) -> bool:
+        if self.shared.is_leader:
+            return True
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return False
+        self._next_attempt = now + SHARED_SNAPSHOT_POLL
+        if not self.shared.try_lead():
+            return False
+        print(f"🔁 Worker {os.getpid()} now refreshes the shared snapshot")
+        self._take_over()
+        if self.on_lead is not None:
+            self.on_lead()
+        return True
+
+    def _take_over(self):
+        """
+        Starts from the generation the previous leader published, fresh for
+        whatever is left of its ttl, instead of recomputing on the first request.
+        """
+        snapshot = self.shared.read()
+        if snapshot is None:
+            return
+        age = time.time() - self.shared.published_at
+        with self._lock:
+            if self._snapshot is None or snapshot["version"] > self.version:
+                self.version = snapshot["version"]
+                self._snapshot = snapshot
+                self._expires_at = time.monotonic() + self.ttl - age
+
+    def _follow(self) -> tuple[dict | None, bool]:
+        """
+        The segment's latest snapshot, and whether it is still within `ttl`
+        (plus SHARED_SNAPSHOT_GRACE) of being published.
+        """
+        snapshot = self.shared.read()
+        expires_at = self.shared.published_at + self.ttl + SHARED_SNAPSHOT_GRACE
+        return snapshot, snapshot is not None and time.time() < expires_at
+
+    def get(self) -> dict:
+        deadline = time.monotonic() + SHARED_SNAPSHOT_WAIT
+        while not self.shared.is_leader:
+            snapshot, fresh = self._follow()
+            if fresh:
+                count("tsp_cache_total", cache="snapshot", result="shared")
+                return snapshot
+            if self.leads():
+                break
+            if snapshot is not None:
+                count("tsp_cache_total", cache="snapshot", result="stale")
+                return snapshot
+            if time.monotonic() > deadline:
+                raise RuntimeError("No shared snapshot has been published yet")
+            time.sleep(0.05)
+        return super().get()
+
+    async def aget(self) -> dict:
+        deadline = time.monotonic() + SHARED_SNAPSHOT_WAIT
+        while not self.shared.is_leader:
+            snapshot, fresh = self._follow()
+            if fresh:
+                count("tsp_cache_total", cache="snapshot", result="shared")
+                return snapshot
+            if self.leads():
+                break
+            if snapshot is not None:
+                count("tsp_cache_total", cache="snapshot", result="stale")
+                return snapshot
+            if time.monotonic() > deadline:
+                raise RuntimeError("No shared snapshot has been published yet")
+            await asyncio.sleep(0.05)
+        return await super().aget()
+
+    def publish(self, snapshot: dict, version: int | None = None) -> dict:
+        try:
+            version = self.shared.publish(snapshot)
+        except Exception as e:
+            print(f"⚠️ Could not share snapshot, serving it from this worker only: {e}")
+        return super().publish(snapshot, version)
+
+    def touch(self):
+        try:
+            self.shared.touch()
+        except Exception as e:
+            print(f"⚠️ Could not re-stamp shared snapshot: {e}")
+        super().touch()
+
+def make_snapshot_cache() -> SnapshotCache:
+    if not SHARED_SNAPSHOT:
+        return SnapshotCache()
+    from shared_snapshot import SharedSnapshot  # fcntl/mmap; only needed when sharing
+
+    return SharedSnapshotCache(SharedSnapshot())
+
+snapshot_cache = make_snapshot_cache()
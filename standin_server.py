@@ -0,0 +1,126 @@
+"""
+Local stand-in for the FRED and Yahoo endpoints, serving recorded data
+(see providers.py for the layout) with configurable latency and failures.
+
+    python standin_server.py --dir benchmarks/fixtures --latency-ms 80 --jitter-ms 40
+    FRED_BASE_URL=http://127.0.0.1:8765/fred YAHOO_BASE_URL=http://127.0.0.1:8765 DATA_PROVIDER=http ...
+
+Both the sync HttpProvider and the async fetch path in async_sources.py
+talk to it exactly as they would to the real services.
+"""
+import os
+import asyncio
+import random
+import argparse
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+from providers import DATA_PROVIDER_DIR, load_series, load_bars
+from market_data import slice_period
+
+STANDIN_PORT = int(os.getenv("STANDIN_PORT", "8765"))
+STANDIN_LATENCY_MS = float(os.getenv("STANDIN_LATENCY_MS", "50"))
+STANDIN_JITTER_MS = float(os.getenv("STANDIN_JITTER_MS", "0"))
+STANDIN_ERROR_RATE = float(os.getenv("STANDIN_ERROR_RATE", "0"))
+
+# FRED's frequency codes -> pandas resample rules, labelled the way FRED labels them
+FRED_FREQUENCIES = {"w": "W-FRI", "bw": "2W-WED", "m": "MS", "q": "QS", "sa": "6MS", "a": "YS"}
+
+def _json_values(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else float(v) for v in values]
+
+def fred_payload(series: pd.Series) -> dict:
+    """
+    FRED's /series/observations JSON: string values with "." for missing.
+    """
+    dates = pd.DatetimeIndex(series.index).strftime("%Y-%m-%d")
+    values = ["." if np.isnan(v) else repr(float(v)) for v in series.to_numpy(dtype=float)]
+    return {"count": len(values), "observations": [{"date": d, "value": v} for d, v in zip(dates, values)]}
+
+def yahoo_payload(ticker: str, bars: pd.DataFrame) -> dict:
+    """
+    Yahoo's v8 chart JSON for daily bars.
+    """
+    timestamps = pd.DatetimeIndex(bars.index).as_unit("s").asi8.tolist()
+    quote = {field.lower(): _json_values(bars[field].to_numpy()) for field in ["Open", "High", "Low", "Close", "Volume"]}
+    return {"chart": {"result": [{
+        "meta": {"symbol": ticker, "dataGranularity": "1d"},
+        "timestamp": timestamps,
+        "indicators": {"quote": [quote], "adjclose": [{"adjclose": _json_values(bars["Adj Close"].to_numpy())}]},
+    }], "error": None}}
+
+def create_app(directory: str = DATA_PROVIDER_DIR, latency_ms: float = STANDIN_LATENCY_MS,
+               jitter_ms: float = STANDIN_JITTER_MS, error_rate: float = STANDIN_ERROR_RATE, seed=None) -> FastAPI:
+    """
+    Recorded files are read once and kept in memory, so the only cost per
+    request is the configured latency plus slicing and serialization.
+    """
+    app = FastAPI(title="FRED/Yahoo stand-in")
+    rng = random.Random(seed)
+    series_memo, bars_memo = {}, {}
+
+    async def delay() -> bool:
+        """
+        Sleeps for the configured latency; True when this request should fail.
+        """
+        wait = latency_ms + (rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0)
+        if wait > 0:
+            await asyncio.sleep(wait / 1000)
+        return error_rate > 0 and rng.random() < error_rate
+
+    @app.get("/fred/series/observations")
+    async def observations(series_id: str, observation_start: str | None = None, frequency: str | None = None):
+        if await delay():
+            return JSONResponse({"error_code": 500, "error_message": "Injected failure"}, status_code=500)
+        if series_id not in series_memo:
+            series_memo[series_id] = load_series(directory, series_id)
+        series = series_memo[series_id]
+        if series is None:
+            return JSONResponse({"error_code": 400, "error_message": f"Bad Request. The series {series_id} does not exist."}, status_code=400)
+        if observation_start:
+            series = series[series.index >= pd.Timestamp(observation_start)]
+        if frequency and frequency != "d":
+            if frequency not in FRED_FREQUENCIES:
+                return JSONResponse({"error_code": 400, "error_message": f"Bad Request. Variable frequency is not one of the following strings: {', '.join(FRED_FREQUENCIES)}."}, status_code=400)
+            series = series.resample(FRED_FREQUENCIES[frequency]).mean().dropna()
+        return fred_payload(series)
+
+    @app.get("/v8/finance/chart/{ticker}")
+    async def chart(ticker: str, range: str | None = Query(None), period1: int | None = None, period2: int | None = None):
+        if await delay():
+            return JSONResponse({"chart": {"result": None, "error": {"code": "Internal", "description": "Injected failure"}}}, status_code=500)
+        if ticker not in bars_memo:
+            bars_memo[ticker] = load_bars(directory, ticker)
+        bars = bars_memo[ticker]
+        if bars is None:
+            return JSONResponse({"chart": {"result": None, "error": {"code": "Not Found", "description": "No data found, symbol may be delisted"}}}, status_code=404)
+        if period1 is not None:
+            bars = bars[bars.index >= pd.Timestamp(period1, unit="s").normalize()]
+            if period2 is not None:
+                bars = bars[bars.index <= pd.Timestamp(period2, unit="s")]
+        elif range:
+            bars = slice_period(bars, range)
+        return yahoo_payload(ticker, bars)
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve recorded FRED/Yahoo data locally")
+    parser.add_argument("--dir", default=DATA_PROVIDER_DIR, help="recorded data directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=STANDIN_PORT)
+    parser.add_argument("--latency-ms", type=float, default=STANDIN_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=STANDIN_JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=STANDIN_ERROR_RATE)
+    args = parser.parse_args()
+
+    print(f"📡 Serving {args.dir} on http://{args.host}:{args.port}")
+    print(f"   FRED_BASE_URL=http://{args.host}:{args.port}/fred YAHOO_BASE_URL=http://{args.host}:{args.port}")
+    uvicorn.run(
+        create_app(args.dir, args.latency_ms, args.jitter_ms, args.error_rate),
+        host=args.host, port=args.port, log_level="warning"
+    )
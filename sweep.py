@@ -0,0 +1,332 @@
+"""
+Parameter sweeps over history for the hard-coded cutoffs.
+
+A grid maps parameter names to candidate values:
+    threshold.<key>   pillar THRESHOLDS (macro_framework)
+    risk.<key>        modulate_risk_weight() RISK_RULES (exposure_modulator)
+    fragility.<key>   detect_fragility() FRAGILITY_TRIGGERS (flow_overlay)
+    base_risk         the base risk fed to modulate_risk_weight(): a number, or
+                      "bands" for recommend_allocation()'s RISK_BANDS on the
+                      day's macro score; defaults to build_snapshot()'s BASE_RISK
+    bands             whole RISK_BANDS lists (allocator); only with base_risk "bands"
+
+Every configuration in the grid's cross product is replayed over the same
+history: pillar scores, regime, coherence, velocity and fragility give a daily
+risk weight, which sets the SPY exposure (the rest earns CASH_RATE). Configs
+are ranked by the chosen metric. The threshold-independent inputs are built
+once and handed to the worker processes through shared memory.
+
+    python sweep.py --grid '{"risk.stability_below": [0.1, 0.3, 0.5], "threshold.vix": [18, 20, 25]}'
+
+Regimes are classified on pillars standardized against their own history
+(as in regime_history), so stability and velocity vary from day to day.
+An axis whose values all score the same is reported as inert: its cutoff
+never binds over this history.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from macro_framework import THRESHOLDS, CYCLICAL_TICKERS, DEFENSIVE_TICKERS
+from exposure_modulator import RISK_RULES, modulate_risk_weight_array
+from flow_overlay import FRAGILITY_TRIGGERS, FRAGILITY_TICKERS
+from allocator import risk_budget_array
+from regime_history import (
+    build_calendar, signal_matrix, score_signal_matrix, market_internals_history, on_calendar, transform_series
+)
+from snapshot import BASE_RISK
+from regime_matrix import classify_regime_matrix
+from narrative_velocity import cosine_drift
+from coherence_score import score_coherence_matrix
+from signal_state import HISTORY_WINDOW
+
+PARAMETER_GROUPS = {
+    "threshold": THRESHOLDS,
+    "risk": RISK_RULES,
+    "fragility": FRAGILITY_TRIGGERS,
+}
+
+# Annual return on the uninvested share (a stand-in for the G Fund)
+CASH_RATE = float(os.getenv("SWEEP_CASH_RATE", "0.03"))
+TRADING_DAYS = 252
+
+METRICS = ["sharpe", "cagr", "max_drawdown", "calmar", "volatility", "avg_exposure", "turnover"]
+
+# Top-level sweep parameters outside the groups above
+SPECIAL_PARAMETERS = {"base_risk", "bands"}
+
+# Metrics where smaller is better; everything else ranks descending
+ASCENDING_METRICS = {"volatility", "turnover"}
+
+# Only axes that move the result over the recorded history; run_sweep() reports any that do not
+DEFAULT_GRID = {
+    "risk.stability_below": [0.1, 0.3, 0.5],
+    "threshold.vix": [18, 20, 25],
+}
+
+def expand_grid(grid: dict) -> list:
+    """
+    Every combination of the grid's values, as a list of {name: value} configs.
+    """
+    for name in grid:
+        if name in SPECIAL_PARAMETERS:
+            continue
+        group, _, key = name.partition(".")
+        if group not in PARAMETER_GROUPS or key not in PARAMETER_GROUPS[group]:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+    if "bands" in grid and "bands" not in grid.get("base_risk", []):
+        raise ValueError('"bands" only applies with base_risk "bands"; add it to the base_risk values')
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+def split_config(config: dict) -> tuple[dict, dict, dict, object, list | None]:
+    """
+    (thresholds, risk rules, fragility triggers, base risk, bands) overrides for one config.
+    """
+    overrides = {group: {} for group in PARAMETER_GROUPS}
+    for name, value in config.items():
+        if name not in SPECIAL_PARAMETERS:
+            group, _, key = name.partition(".")
+            overrides[group][key] = value
+    bands = config.get("bands")
+    bands = [tuple(band) for band in bands] if bands is not None else None
+    return overrides["threshold"], overrides["risk"], overrides["fragility"], config.get("base_risk", BASE_RISK), bands
+
+def prepare_inputs(data: dict, prices: pd.DataFrame, start=None, end=None) -> dict:
+    """
+    Threshold-independent daily arrays on a business-day calendar covering the
+    SPY history: raw pillar signals, market internals, fragility inputs and
+    next-day SPY returns.
+    """
+    spy = prices.xs("SPY", axis=1, level=-1).dropna(how="all").sort_index()
+    calendar = build_calendar(data, start=start or spy.index[0], end=end or spy.index[-1])
+    empty = pd.Series(dtype=float)
+
+    close = spy["Close"].reindex(calendar, method="ffill")
+    daily_range = ((spy["High"] - spy["Low"]) / spy["Close"]).rolling(5).mean()
+    return {
+        "dates": calendar.to_numpy().astype("datetime64[D]").astype(np.int64),
+        "signals": signal_matrix(data, calendar),
+        "internals": market_internals_history(prices, calendar).astype(float),
+        "vix": on_calendar(transform_series(data.get("VIXCLS", empty), None, False), calendar),
+        "hy_spreads": on_calendar(transform_series(data.get("BAMLH0A0HYM2", empty), None, False), calendar),
+        "em_fx_yoy": on_calendar(transform_series(data.get("DTWEXEMEGS", empty), 12, False), calendar),
+        "spy_close": close.to_numpy(dtype=float),
+        "spy_range": on_calendar(daily_range.dropna(), calendar),
+        "spy_return": (close.shift(-1) / close - 1).to_numpy(dtype=float),
+    }
+
+def velocity_history(probabilities: np.ndarray, window: int = HISTORY_WINDOW) -> np.ndarray:
+    """
+    score_velocity_array() as of every date: mean cosine drift between
+    consecutive regime vectors over the trailing `window` rows.
+    """
+    drift = cosine_drift(probabilities[:-1], probabilities[1:])
+
+    totals = np.concatenate([[0.0], np.cumsum(drift)])
+    ends = np.arange(len(probabilities))
+    starts = np.maximum(ends - (window - 1), 0)
+    counts = ends - starts
+    return np.round(np.divide(totals[ends] - totals[starts], counts, out=np.zeros(len(ends)), where=counts > 0), 4)
+
+def fragility_history(inputs: dict, triggers: dict | None = None) -> np.ndarray:
+    triggers = {**FRAGILITY_TRIGGERS, **(triggers or {})}
+    with np.errstate(invalid="ignore"):
+        return (
+            (inputs["vix"] < triggers["vix_below"])
+            | (inputs["spy_range"] < triggers["spy_range_below"])
+            | ((inputs["hy_spreads"] > triggers["hy_spreads_above"]) & (inputs["spy_close"] > triggers["spy_price_above"]))
+            | (inputs["em_fx_yoy"] < triggers["em_fx_yoy_below"])
+        )
+
+def exposure_history(inputs: dict, config: dict) -> np.ndarray:
+    """
+    Daily risk weight under one configuration, built the way build_snapshot()
+    does for a single date: BASE_RISK modulated by stability, coherence,
+    velocity and fragility. With base_risk "bands" the base is instead the
+    day's RISK_BANDS budget, which is not what the live snapshot does.
+    Regimes are classified across history; classifying each date on its own
+    scores every regime 0, and no stability or velocity cutoff could bind.
+    """
+    thresholds, rules, triggers, base_risk, bands = split_config(config)
+    scores = score_signal_matrix(inputs["signals"], inputs["internals"].astype(int), thresholds)
+    probabilities, stability = classify_regime_matrix(scores, across_history=True)
+    if base_risk == "bands":
+        base = risk_budget_array(scores.sum(axis=1), bands)
+    else:
+        base = np.full(len(scores), float(base_risk))
+    return modulate_risk_weight_array(
+        base,
+        stability,
+        score_coherence_matrix(scores),
+        velocity_history(probabilities),
+        fragility_history(inputs, triggers),
+        rules
+    )
+
+def performance(exposure: np.ndarray, asset_return: np.ndarray) -> dict:
+    valid = ~np.isnan(asset_return)
+    exposure, asset_return = exposure[valid], asset_return[valid]
+    cash = CASH_RATE / TRADING_DAYS
+    returns = exposure * asset_return + (1 - exposure) * cash
+    if len(returns) < 2:
+        return {metric: 0.0 for metric in METRICS}
+
+    equity = np.cumprod(1 + returns)
+    years = len(returns) / TRADING_DAYS
+    cagr = equity[-1] ** (1 / years) - 1
+    volatility = returns.std() * np.sqrt(TRADING_DAYS)
+    max_drawdown = float((equity / np.maximum.accumulate(equity) - 1).min())
+    return {
+        "sharpe": round(float((returns - cash).mean() / returns.std() * np.sqrt(TRADING_DAYS)) if returns.std() else 0.0, 4),
+        "cagr": round(float(cagr), 4),
+        "max_drawdown": round(max_drawdown, 4),
+        "calmar": round(float(cagr / abs(max_drawdown)) if max_drawdown else 0.0, 4),
+        "volatility": round(float(volatility), 4),
+        "avg_exposure": round(float(exposure.mean()), 4),
+        "turnover": round(float(np.abs(np.diff(exposure)).mean()), 4),
+    }
+
+def evaluate(inputs: dict, config: dict) -> dict:
+    return performance(exposure_history(inputs, config), inputs["spy_return"])
+
+class SharedArrays:
+    """
+    Copies named arrays into shared memory once; workers attach() by name
+    instead of receiving a pickled copy with every task.
+    """
+
+    def __init__(self, arrays: dict):
+        self.blocks, self.spec = [], {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def __enter__(self) -> dict:
+        return self.spec
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+_attached = {}
+_worker_inputs = None
+
+def attach(spec: dict) -> dict:
+    arrays = {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _attached[block_name] = block
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+    return arrays
+
+def _init_worker(spec: dict):
+    global _worker_inputs
+    _worker_inputs = attach(spec)
+
+def _evaluate_in_worker(config: dict) -> dict:
+    return evaluate(_worker_inputs, config)
+
+def inert_parameters(configs: list, scores: list) -> list:
+    """
+    Grid axes with more than one value that never changed a metric: every
+    group of configs differing only in that axis scored identically.
+    """
+    inert = []
+    for name in (configs[0] if configs else {}):
+        if len({json.dumps(config[name]) for config in configs}) < 2:
+            continue
+        groups = {}
+        for config, score in zip(configs, scores):
+            rest = json.dumps({k: v for k, v in config.items() if k != name}, sort_keys=True)
+            groups.setdefault(rest, set()).add(tuple(score[metric] for metric in METRICS))
+        if all(len(results) == 1 for results in groups.values()):
+            inert.append(name)
+    return inert
+
+def run_sweep(grid: dict, inputs: dict, metric: str = "sharpe", workers: int | None = None) -> dict:
+    """
+    Evaluates every configuration in `grid` over `inputs` (see prepare_inputs())
+    and returns the current defaults' scores plus every config ranked by `metric`.
+    Axes that made no difference are listed under "inert".
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(METRICS)}")
+    configs = expand_grid(grid)
+    workers = min(workers or os.cpu_count() or 1, len(configs)) or 1
+
+    if workers == 1:
+        scores = [evaluate(inputs, config) for config in configs]
+    else:
+        with SharedArrays(inputs) as spec:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec,)) as pool:
+                scores = list(pool.map(_evaluate_in_worker, configs, chunksize=max(1, len(configs) // (workers * 4))))
+
+    ranked = sorted(
+        ({"params": config, **score} for config, score in zip(configs, scores)),
+        key=lambda row: row[metric],
+        reverse=metric not in ASCENDING_METRICS
+    )
+    inert = inert_parameters(configs, scores)
+    if inert:
+        print(f"⚠️ No effect over this history, drop or widen: {', '.join(inert)}")
+    return {"metric": metric, "configs": len(configs), "baseline": evaluate(inputs, {}), "ranked": ranked, "inert": inert}
+
+def load_sweep_inputs(price_period: str = "10y") -> tuple[dict, pd.DataFrame]:
+    """
+    Full FRED history for every planned series plus sector ETF and SPY bars,
+    through the configured data provider.
+    """
+    from fetch_planner import plan_series
+    from macro_signals import fetch_series_batch
+    from market_data import get_prices
+
+    data = fetch_series_batch(plan_series())
+    prices = get_prices(CYCLICAL_TICKERS + DEFENSIVE_TICKERS + FRAGILITY_TICKERS, period=price_period)
+    return data, prices
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank threshold configurations over history")
+    parser.add_argument("--grid", help="JSON grid, inline or a path to a .json file")
+    parser.add_argument("--metric", default="sharpe", choices=METRICS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", help="write the full ranking as JSON")
+    args = parser.parse_args()
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        if os.path.exists(args.grid):
+            with open(args.grid, "r") as f:
+                grid = json.load(f)
+        else:
+            grid = json.loads(args.grid)
+
+    data, prices = load_sweep_inputs()
+    if prices.empty or "SPY" not in prices.columns.get_level_values(-1):
+        print("⚠️ No SPY history available; nothing to sweep")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    inputs = prepare_inputs(data, prices)
+    result = run_sweep(grid, inputs, metric=args.metric, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Evaluated {result['configs']} configs over {len(inputs['dates'])} days in {elapsed:.2f}s")
+    print(f"• Current defaults: {args.metric}={result['baseline'][args.metric]}")
+    for rank, row in enumerate(result["ranked"][:args.top], start=1):
+        print(f"{rank:>3}. {args.metric}={row[args.metric]:<8} {row['params']}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
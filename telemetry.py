@@ -0,0 +1,151 @@
+"""
+In-process timing spans, histograms and counters.
+
+    with span("get_series", series="CPIAUCSL"):
+        ...
+    count("tsp_cache_total", cache="fred", result="hit")
+
+Everything is aggregated in this process and rendered in the Prometheus text
+format by render() (served at /metrics). Inside `with trace() as spans:` every
+finished span is also appended to `spans`, which lets /run?debug=true return
+a per-request breakdown.
+"""
+import math
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HELP = {
+    "tsp_stage_duration_seconds": "Wall time of one pipeline stage",
+    "tsp_stage_errors_total": "Pipeline stages that raised",
+    "tsp_signal_errors_total": "Signals that could not be read and were left out of a score",
+    "tsp_fetch_bytes_total": "Decoded bytes received from upstream sources",
+    "tsp_cache_total": "Cache lookups by cache and result",
+    "tsp_retries_total": "Upstream calls retried after a transient failure",
+    "tsp_breaker_transitions_total": "Circuit breaker state changes by source",
+    "tsp_breaker_rejections_total": "Upstream calls refused by an open circuit",
+    "tsp_stale_served_total": "Inputs served from cache instead of a fresh fetch, by reason",
+    "tsp_http_request_duration_seconds": "API request latency",
+    "tsp_http_requests_total": "API requests by path and status",
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_trace = contextvars.ContextVar("tsp_trace", default=None)
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def count(name: str, value: float = 1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(name: str, value: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        state = _histograms.get(key)
+        if state is None:
+            state = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                state[i] += 1
+        state[-2] += 1
+        state[-1] += value
+
+@contextmanager
+def span(stage: str, **labels):
+    """
+    Times a block into tsp_stage_duration_seconds{stage, ...labels}; a block
+    that raises also counts towards tsp_stage_errors_total and re-raises.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        observe("tsp_stage_duration_seconds", elapsed, stage=stage, **labels)
+        if error is not None:
+            count("tsp_stage_errors_total", stage=stage, **labels)
+        spans = _trace.get()
+        if spans is not None:
+            entry = {"stage": stage, **labels, "ms": round(elapsed * 1000, 3)}
+            if error is not None:
+                entry["error"] = error
+            spans.append(entry)
+
+@contextmanager
+def trace(enabled: bool = True):
+    """
+    Collects the spans finished inside the block (including those on threads
+    started through propagate() and tasks created inside it); yields the list,
+    or None when disabled.
+    """
+    if not enabled:
+        yield None
+        return
+    spans = []
+    token = _trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _trace.reset(token)
+
+def propagate(fn):
+    """
+    Wraps `fn` to run in a copy of the caller's context, so spans finished on
+    pool threads still land in the caller's trace.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+def _labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def _bound(value: float) -> str:
+    return "+Inf" if math.isinf(value) else repr(float(value))
+
+def render() -> str:
+    """
+    Every counter and histogram in the Prometheus text exposition format.
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(state) for key, state in _histograms.items()}
+
+    lines, described = [], set()
+
+    def describe(name: str, kind: str):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name, "counter")
+        lines.append(f"{name}{_labels(labels)} {value}")
+    for (name, labels), state in sorted(histograms.items()):
+        describe(name, "histogram")
+        for bound, bucket in zip(LATENCY_BUCKETS + (math.inf,), state[:-1]):
+            lines.append(f"{name}_bucket{_labels(labels, (('le', _bound(bound)),))} {bucket}")
+        lines.append(f"{name}_sum{_labels(labels)} {state[-1]}")
+        lines.append(f"{name}_count{_labels(labels)} {state[-2]}")
+    return "\n".join(lines) + "\n"
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
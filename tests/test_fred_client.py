@@ -0,0 +1,27 @@
+import json
+
+import numpy as np
+
+from fred_client import decode_observations
+
+def body(*observations):
+    return json.dumps({"observations": [{"date": d, "value": v} for d, v in observations]}).encode()
+
+def test_decode_all_missing():
+    # An incremental refresh from a holiday row can return nothing but "."
+    dates, values = decode_observations(body(("2025-01-01", ".")))
+    assert dates.tolist() == [np.datetime64("2025-01-01", "D")]
+    assert np.isnan(values).all()
+
+def test_decode_single_character_values():
+    dates, values = decode_observations(body(("2025-01-01", "5"), ("2025-01-02", "."), ("2025-01-03", "7")))
+    assert len(dates) == 3
+    np.testing.assert_array_equal(values, [5.0, np.nan, 7.0])
+
+def test_decode_mixed_widths():
+    _, values = decode_observations(body(("2025-01-01", "4.25"), ("2025-01-02", "."), ("2025-01-03", "-0.1")))
+    np.testing.assert_array_equal(values, [4.25, np.nan, -0.1])
+
+def test_decode_empty():
+    dates, values = decode_observations(b'{"observations": []}')
+    assert len(dates) == 0 and len(values) == 0
@@ -0,0 +1,24 @@
+import numpy as np
+
+from narrative_velocity import cosine_drift, regime_vector_distance, score_velocity, score_velocity_array
+
+REGIMES = ["Expansion", "Recovery", "Neutral", "Contraction", "Crisis"]
+
+def probabilities(*values):
+    return dict(zip(REGIMES, values))
+
+def test_zero_vectors_have_not_moved():
+    # classify_regime() scores every regime 0 when the pillars carry no signal
+    zeros = np.zeros((4, len(REGIMES)))
+    assert score_velocity_array(zeros) == 0.0
+    assert regime_vector_distance(probabilities(0, 0, 0, 0, 0), probabilities(0, 0, 0, 0, 0)) == 0.0
+
+def test_zero_against_nonzero_is_a_full_move():
+    assert cosine_drift([0, 0, 0, 0, 0], [1, 0, 0, 0, 0]) == 1.0
+
+def test_array_matches_scalar_velocity():
+    rng = np.random.default_rng(0)
+    rows = rng.random((8, len(REGIMES)))
+    rows[2:4] = 0
+    history = [probabilities(*row) for row in rows]
+    assert score_velocity_array(rows) == score_velocity(history)
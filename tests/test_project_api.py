@@ -0,0 +1,31 @@
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main_api
+from snapshot import SnapshotCache
+
+PROFILE = {"name": "Test", "age": 41, "retirement_year": 2049, "balance": 100_000, "paths": 500}
+
+@pytest.fixture
+def client(monkeypatch):
+    # /project only reads the regime probabilities; never compute a real snapshot here
+    cache = SnapshotCache(ttl=math.inf)
+    cache.publish({
+        "computed_at": "2026-01-01T00:00:00",
+        "regime": {"probabilities": {"Expansion": 0.2, "Recovery": 0.2, "Neutral": 0.2, "Contraction": 0.2, "Crisis": 0.2}},
+    })
+    monkeypatch.setattr(main_api, "snapshot_cache", cache)
+    return TestClient(main_api.app)
+
+@pytest.mark.parametrize("risk_tolerance", ["Moderate", "moderate", "AGGRESSIVE", "Balanced"])
+def test_project_accepts_any_risk_tolerance_run_accepts(client, risk_tolerance):
+    response = client.post("/project", json={**PROFILE, "risk_tolerance": risk_tolerance})
+    assert response.status_code == 200
+    assert response.json()["allocation"]
+
+def test_project_normalizes_risk_tolerance_like_run(client):
+    canonical = client.post("/project", json={**PROFILE, "risk_tolerance": "Moderate"}).json()
+    lower = client.post("/project", json={**PROFILE, "risk_tolerance": "moderate"}).json()
+    assert lower["allocation"] == canonical["allocation"]
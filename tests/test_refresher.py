@@ -0,0 +1,19 @@
+import pandas as pd
+
+from refresher import next_possible_release
+
+def test_walcl_due_the_day_after_its_wednesday():
+    # Week ending Wed 2025-10-08 is published Thu 2025-10-09
+    assert next_possible_release("2025-10-01", "weekly", "WALCL") == pd.Timestamp("2025-10-09")
+
+def test_anfci_due_the_wednesday_after_its_friday():
+    # Week ending Fri 2025-10-10 is published Wed 2025-10-15
+    assert next_possible_release("2025-10-03", "weekly", "ANFCI") == pd.Timestamp("2025-10-15")
+
+def test_monthly_due_once_the_next_period_has_ended():
+    # September is dated 2025-09-01; October's value cannot exist before November
+    assert next_possible_release("2025-09-01", "monthly", "CPIAUCSL") == pd.Timestamp("2025-11-01")
+
+def test_daily_due_the_next_day():
+    # Friday's value is followed by Monday's, out on Tuesday
+    assert next_possible_release("2025-10-03", "daily", "VIXCLS") == pd.Timestamp("2025-10-07")
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import log_store
+from narrative_velocity import score_velocity_array
+from signal_state import SignalState, REGIMES
+
+@pytest.fixture
+def log_db(tmp_path, monkeypatch):
+    # A fresh database with no legacy JSON logs to import
+    monkeypatch.setattr(log_store, "DB_PATH", str(tmp_path / "history.db"))
+    monkeypatch.setattr(log_store, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(log_store._local, "conn", None, raising=False)
+    yield
+    log_store._local.conn.close()
+
+def test_zero_regime_vectors_do_not_drift():
+    state = SignalState()
+    for _ in range(4):
+        state.update(dict.fromkeys(REGIMES, 0.0), coherence=0.5, macro_score=0)
+    assert state.drifts.tolist() == [0.0, 0.0, 0.0]
+    assert state.velocity == 0.0
+
+def test_incremental_state_matches_full_history(log_db):
+    rng = np.random.default_rng(1)
+    rows = rng.random((15, len(REGIMES)))
+    rows[3:6] = 0
+    state = SignalState()
+    for i, row in enumerate(rows):
+        probabilities = dict(zip(REGIMES, row))
+        timestamp = f"2026-01-01T00:00:{i:02d}"
+        log_store.append_many([("regime", probabilities), ("coherence", 0.5), ("macro_score", 1)], timestamp=timestamp)
+        state.update(probabilities, 0.5, 1, timestamp)
+
+    rebuilt = SignalState.from_log()
+    np.testing.assert_allclose(state.drifts, rebuilt.drifts)
+    assert state.velocity == rebuilt.velocity == score_velocity_array(rows[-state.window:])
@@ -0,0 +1,11 @@
+from sweep import METRICS, inert_parameters, expand_grid
+
+def test_inert_parameters_flags_axes_that_never_change_a_score():
+    configs = expand_grid({"risk.stability_below": [0.1, 0.3], "risk.velocity_above": [0.6, 0.8]})
+    # Every metric depends on stability_below alone
+    scores = [dict.fromkeys(METRICS, config["risk.stability_below"]) for config in configs]
+    assert inert_parameters(configs, scores) == ["risk.velocity_above"]
+
+def test_single_valued_axes_are_not_judged():
+    configs = expand_grid({"threshold.vix": [20]})
+    assert inert_parameters(configs, [dict.fromkeys(METRICS, 0.0)]) == []
@@ -11,9 +11,10 @@ class UserProfile:
     def equity_target(self, current_year):
         yrs = self.years_to_retire(current_year)
         glide = min(1.0, max(0.3, yrs / 40))  # 30%–100% based on years to retirement
+        # Case-insensitive, unknown values count as moderate, as in personalize_allocation()
         multiplier = {
-            "Aggressive": 1.0,
-            "Moderate": 0.75,
-            "Conservative": 0.5
-        }[self.risk_tolerance]
+            "aggressive": 1.0,
+            "moderate": 0.75,
+            "conservative": 0.5
+        }.get(self.risk_tolerance.lower(), 0.75)
         return round(glide * multiplier, 2)